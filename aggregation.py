@@ -0,0 +1,197 @@
+# Estatísticas móveis, médias sazonais e reamostragem dos índices (calculadas no servidor)
+import numpy as np
+import pandas as pd
+
+# Rótulo exibido -> (método, parâmetro)
+MONTHLY_AGGREGATIONS = {
+    "Running mean (3 months)": ("rolling", 3),
+    "Running mean (12 months)": ("rolling", 12),
+    "Running mean (5 years)": ("rolling", 60),
+    "Seasonal mean (DJF, MAM, JJA, SON)": ("seasonal", None),
+}
+
+DAILY_AGGREGATIONS = {
+    "Weekly mean": ("resample", "W"),
+    "Monthly mean": ("resample", "MS"),
+}
+
+SEASONS = np.array(["DJF", "MAM", "JJA", "SON"])
+
+# Períodos base da climatologia (anos inclusivos); os dados publicados usam 1991-2020
+BASE_PERIODS = {
+    "1991–2020": (1991, 2020),
+    "1981–2010": (1981, 2010),
+    "1971–2000": (1971, 2000),
+}
+# Anos mínimos com dado, em cada mês do calendário, para a climatologia ser válida
+MIN_BASE_YEARS = 24
+
+
+def rolling_stats(values, window, center=True):
+    """Média e desvio padrão móveis em O(n) a partir de somas acumuladas.
+
+    Só há resultado quando a janela inteira tem dados (como o pandas com min_periods=window).
+    Com center=True a janela é centrada no mês, como no ONI (mesmo alinhamento do
+    pandas rolling(center=True)). Retorna (média, desvio padrão, contagem).
+    """
+    n = len(values)
+    valid = ~np.isnan(values)
+    # Subtrair a média geral evita perda de precisão na variância (soma dos quadrados)
+    shift = np.nanmean(values) if valid.any() else 0.0
+    x = np.where(valid, values - shift, 0.0)
+
+    counts = np.concatenate([[0], np.cumsum(valid)])
+    sums = np.concatenate([[0.0], np.cumsum(x)])
+    squares = np.concatenate([[0.0], np.cumsum(x * x)])
+
+    end = np.arange(1, n + 1)
+    start = np.maximum(end - window, 0)
+    count = counts[end] - counts[start]
+    total = sums[end] - sums[start]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = total / count
+        var = (squares[end] - squares[start] - total * mean) / (count - 1)
+    full = count == window
+    mean = np.where(full, mean + shift, np.nan)
+    std = np.where(full, np.sqrt(np.maximum(var, 0.0)), np.nan)
+
+    if center:
+        offset = (window - 1) // 2
+        pad = np.full(offset, np.nan)
+        mean = np.concatenate([mean[offset:], pad])
+        std = np.concatenate([std[offset:], pad])
+        count = np.concatenate([count[offset:], np.zeros(offset, dtype=count.dtype)])
+    return mean, std, count
+
+
+def continuous_monthly(store, var):
+    """Série mensal do índice em meses consecutivos (meses sem dado viram NaN)."""
+    matrix = store.monthly_matrix()
+    if var not in matrix:
+        return None
+    column = matrix[var]
+    first, last = column.first_valid_index(), column.last_valid_index()
+    if first is None:
+        return pd.Series(dtype="float64", index=pd.DatetimeIndex([], name="time"))
+    months = pd.period_range(first, last, freq="M", name="time")
+    return column.reindex(months).set_axis(months.to_timestamp())
+
+
+def running_mean(serie, window):
+    mean, std, count = rolling_stats(serie.to_numpy(dtype="float64"), window)
+    return pd.DataFrame({"mean": mean, "std": std, "count": count}, index=serie.index)
+
+
+def seasonal_means(serie):
+    """Médias por estação (DJF, MAM, JJA, SON) de cada ano, só para estações completas.
+
+    O dezembro entra no DJF do ano seguinte; cada estação é datada pelo seu mês central.
+    """
+    values = serie.to_numpy(dtype="float64")
+    valid = ~np.isnan(values)
+    years = serie.index.year.to_numpy()[valid]
+    months = serie.index.month.to_numpy()[valid]
+    values = values[valid]
+    if values.size == 0:
+        return pd.DataFrame(
+            {"season": pd.Series(dtype="object"), "mean": pd.Series(dtype="float64"),
+             "std": pd.Series(dtype="float64"), "count": pd.Series(dtype="int64")},
+            index=pd.DatetimeIndex([], name="time")
+        )
+
+    season = (months % 12) // 3
+    season_year = years + (months == 12)
+    first_year = season_year.min()
+    key = (season_year - first_year) * 4 + season
+
+    count = np.bincount(key)
+    total = np.bincount(key, weights=values)
+    squares = np.bincount(key, weights=values * values)
+    keep = count == 3
+    mean = total[keep] / 3
+    std = np.sqrt(np.maximum((squares[keep] - total[keep] * mean) / 2, 0.0))
+
+    slots = np.flatnonzero(keep)
+    time = pd.to_datetime({"year": first_year + slots // 4, "month": (slots % 4) * 3 + 1, "day": 1})
+    return pd.DataFrame(
+        {"season": SEASONS[slots % 4], "mean": mean, "std": std, "count": count[keep]},
+        index=pd.DatetimeIndex(time, name="time")
+    )
+
+
+def monthly_climatology(serie, first_year, last_year, min_years=MIN_BASE_YEARS):
+    """Média, desvio padrão e contagem de cada mês do calendário (1-12) entre first_year e last_year.
+
+    Uma única passada agrupando por mês (bincount); meses com menos de `min_years` anos de
+    dado ficam NaN.
+    """
+    values = serie.to_numpy(dtype="float64")
+    years = serie.index.year.to_numpy()
+    keep = (years >= first_year) & (years <= last_year) & ~np.isnan(values)
+    months = serie.index.month.to_numpy()[keep] - 1
+    values = values[keep]
+
+    count = np.bincount(months, minlength=12)
+    total = np.bincount(months, weights=values, minlength=12)
+    squares = np.bincount(months, weights=values * values, minlength=12)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = total / count
+        std = np.sqrt(np.maximum((squares - total * mean) / (count - 1), 0.0))
+    valid = count >= min_years
+    return pd.DataFrame(
+        {"mean": np.where(valid, mean, np.nan), "std": np.where(valid, std, np.nan), "count": count},
+        index=pd.RangeIndex(1, 13, name="month")
+    )
+
+
+def climatology(store, var, base):
+    """Climatologia (12 valores) do índice no período base, memorizada por (índice, período)."""
+    def compute():
+        serie = continuous_monthly(store, var)
+        return None if serie is None else monthly_climatology(serie, *BASE_PERIODS[base])
+    return store.memo(("climatology", var, base), compute)
+
+
+def apply_climatology(serie, clim, standardize=False):
+    """Anomalias em relação à climatologia (divididas pelo desvio padrão do período base se standardize)."""
+    month = serie.index.month.to_numpy() - 1
+    values = serie.to_numpy(dtype="float64") - clim["mean"].to_numpy()[month]
+    if standardize:
+        values = values / clim["std"].to_numpy()[month]
+    return pd.Series(values, index=serie.index, name=serie.name)
+
+
+def rebaseline(store, var, base, standardize=False):
+    """Série do índice (mesmas datas do arquivo) com anomalias recalculadas no período base."""
+    def compute():
+        clim = climatology(store, var, base)
+        return None if clim is None else apply_climatology(store.series(var), clim, standardize)
+    return store.memo(("rebaseline", var, base, standardize), compute)
+
+
+def resample_daily(serie, rule):
+    """Média, desvio padrão e contagem por semana ("W", rotulada pelo domingo) ou mês ("MS")."""
+    return serie.dropna().resample(rule).agg(["mean", "std", "count"]).rename_axis("time")
+
+
+def aggregate(store, var, method, param, base=None, standardize=False):
+    """Série agregada (colunas mean, std, count) memorizada por (índice, método, parâmetro) no store.
+
+    Com `base`, as séries mensais são agregadas depois de recalculadas no período base.
+    """
+    def compute():
+        if method == "resample":
+            serie = store.series(var)
+            return None if serie is None else resample_daily(serie, param)
+        serie = continuous_monthly(store, var)
+        if serie is None:
+            return None
+        if base is not None:
+            serie = apply_climatology(serie, climatology(store, var, base), standardize)
+        if method == "rolling":
+            return running_mean(serie, param)
+        if method == "seasonal":
+            return seasonal_means(serie)
+        raise ValueError(f"Agregação desconhecida: {method}")
+    return store.memo(("aggregate", var, method, param, base, standardize), compute)
+
@@ -0,0 +1,79 @@
+# Análises sobre a matriz mês × índice (correlações entre índices)
+import numpy as np
+import pandas as pd
+
+# Defasagem máxima (meses) e número mínimo de meses em comum para uma correlação válida
+MAX_LAG = 24
+MIN_PERIODS = 24
+
+
+def continuous_matrix(store):
+    """Matriz mensal reindexada para meses consecutivos (as defasagens são em meses reais)."""
+    matrix = store.monthly_matrix()
+    if matrix.empty:
+        return matrix
+    months = pd.period_range(matrix.index[0], matrix.index[-1], freq="M", name="time")
+    return matrix.reindex(months)
+
+
+def lag_correlation_cube(values, max_lag=MAX_LAG, min_periods=MIN_PERIODS):
+    """Correlações de Pearson de todos os pares para as defasagens -max_lag..max_lag.
+
+    cube[l, i, j] = corr(x_i(t), x_j(t + lag_l)), usando apenas os meses em que os dois
+    índices têm dado (NaN tratado par a par). Cada defasagem é resolvida com produtos
+    matriciais sobre as máscaras de dados válidos; as defasagens negativas são a transposta
+    das positivas.
+    """
+    n, k = values.shape
+    valid = ~np.isnan(values)
+    x = np.where(valid, values, 0.0)
+    m = valid.astype("float64")
+    x2 = x * x
+
+    lags = np.arange(-max_lag, max_lag + 1)
+    cube = np.full((len(lags), k, k), np.nan)
+    counts = np.zeros((len(lags), k, k), dtype="int64")
+    for lag in range(0, min(max_lag, n - 1) + 1):
+        a, ma, a2 = x[:n - lag], m[:n - lag], x2[:n - lag]
+        b, mb, b2 = x[lag:], m[lag:], x2[lag:]
+
+        count = ma.T @ mb
+        sum_a, sum_b = a.T @ mb, ma.T @ b
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = a.T @ b - sum_a * sum_b / count
+            var_a = a2.T @ mb - sum_a ** 2 / count
+            var_b = ma.T @ b2 - sum_b ** 2 / count
+            corr = cov / np.sqrt(var_a * var_b)
+        corr[(count < min_periods) | ~np.isfinite(corr)] = np.nan
+        corr = np.clip(corr, -1.0, 1.0)
+
+        cube[max_lag + lag] = corr
+        cube[max_lag - lag] = corr.T
+        counts[max_lag + lag] = count
+        counts[max_lag - lag] = count.T
+    return lags, cube, counts
+
+
+def lag_correlations(store, max_lag=MAX_LAG, min_periods=MIN_PERIODS):
+    """Cubo de correlações defasadas de todos os índices mensais, calculado uma vez por versão dos dados."""
+    def compute():
+        matrix = continuous_matrix(store)
+        lags, cube, counts = lag_correlation_cube(matrix.to_numpy(dtype="float64"), max_lag, min_periods)
+        return {"names": list(matrix.columns), "lags": lags, "cube": cube, "counts": counts}
+    return store.memo(("lag_correlations", max_lag, min_periods), compute)
+
+
+def correlation_matrix(store, lag=0, names=None):
+    """DataFrame índice × índice com corr(linha(t), coluna(t + lag))."""
+    result = lag_correlations(store)
+    if not -MAX_LAG <= lag <= MAX_LAG:
+        raise ValueError(f"lag must be between -{MAX_LAG} and {MAX_LAG}")
+    df = pd.DataFrame(result["cube"][lag + MAX_LAG], index=result["names"], columns=result["names"])
+    return df if names is None else df.loc[names, names]
+
+
+def pair_lag_correlation(store, var_a, var_b):
+    """Correlação de var_a(t) com var_b(t + lag) para todas as defasagens."""
+    result = lag_correlations(store)
+    i, j = result["names"].index(var_a), result["names"].index(var_b)
+    return pd.Series(result["cube"][:, i, j], index=pd.Index(result["lags"], name="lag"), name="correlation")
@@ -0,0 +1,298 @@
+# API HTTP/JSON somente leitura para os índices (sem sessão do Streamlit)
+#
+# Rotas:
+#   GET /indices                                   lista de índices e metadados
+#   GET /indices/{nome}?start=&end=&format=        série do índice (csv, txt, json, parquet, nc)
+#       &base=1981-2010&standardize=1              anomalias recalculadas em outro período base
+#   GET /latest                                    resumo dos valores mais recentes (aba Home)
+#   GET /correlations?lag=&format=                 matriz de correlação (json ou csv) na defasagem
+#   GET /correlations?a=&b=                        correlação de um par para todas as defasagens
+#   GET /stats                                     cargas sob demanda das séries (contagem e tempo)
+#   GET /metrics                                   métricas no formato texto do Prometheus
+#
+# As respostas têm ETag (derivado da versão do conteúdo dos dados e da codificação: a versão
+# gzip leva o sufixo -gzip), respondem 304 para If-None-Match e são comprimidas com gzip
+# quando o cliente aceita. Para rodar:
+#
+#     python api_server.py --port 8502
+import argparse
+from functools import lru_cache
+import gzip
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+from pathlib import Path
+import threading
+import time
+from urllib.parse import parse_qs, unquote, urlsplit
+import pandas as pd
+from aggregation import BASE_PERIODS, climatology, rebaseline
+from analysis import MAX_LAG, correlation_matrix, pair_lag_correlation
+from exports import FORMATS, encode_frame, netcdf_available
+from index_store import alias, dataset_fingerprint, is_mjo, open_index_store
+from metrics import REGISTRY
+from shared_cache import cache_root
+
+base_path = Path(__file__).resolve().parent
+
+# Intervalo mínimo (s) entre verificações de alteração na pasta de dados
+REFRESH_INTERVAL = 5.0
+# Abaixo disso não compensa comprimir
+GZIP_MIN_SIZE = 1024
+
+EXT_MIME = {ext: mime for ext, mime in FORMATS.values()}
+ROUTES = ("indices", "latest", "correlations", "stats", "metrics")
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class StoreHolder:
+    """Mantém o IndexStore atual e o reconstrói quando a assinatura da pasta muda."""
+
+    def __init__(self, dir_dataset, dir_cache):
+        self.dir_dataset = dir_dataset
+        self.dir_cache = dir_cache
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._checked = 0.0
+        self._store = None
+
+    def get(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._store is None or now - self._checked >= REFRESH_INTERVAL:
+                self._checked = now
+                fingerprint = dataset_fingerprint(self.dir_dataset)
+                if fingerprint != self._fingerprint:
+                    self._store = open_index_store(self.dir_dataset, self.dir_cache)
+                    self._fingerprint = fingerprint
+                    render.cache_clear()
+            return self._store
+
+
+def _timestamp(value):
+    return None if value is None or pd.isna(value) else pd.Timestamp(value).strftime("%Y-%m-%d")
+
+
+def _number(value):
+    return None if pd.isna(value) else float(value)
+
+
+def _full_meta(store, var):
+    """Metadados completos do índice: sem o cache colunar (sem pyarrow) só os de cabeçalho
+    são conhecidos, e count/first_valid/last_valid exigem carregar a série."""
+    if store.meta[var]["count"] is None:
+        store.series(var)
+    return store.meta[var]
+
+
+def list_indices(store):
+    return [
+        {
+            "name": var,
+            "frequency": "daily" if meta["freq"] == "D" else "monthly",
+            "first_valid": _timestamp(meta["first_valid"]),
+            "last_valid": _timestamp(meta["last_valid"]),
+            "count": meta["count"],
+        }
+        for var, meta in ((var, _full_meta(store, var)) for var in store.names)
+    ]
+
+
+def latest(store):
+    summary = store.latest_summary()
+    return {
+        "month": _timestamp(summary["month"]),
+        "values": {var: _number(val) for var, val in summary["values"].items()},
+        "daily_date": _timestamp(summary["daily_date"]),
+        "daily_values": {var: _number(val) for var, val in summary["daily_values"].items()},
+    }
+
+
+def _parse_date(query, name):
+    """Data do parâmetro como Timestamp ingênuo em ns (o índice das séries).
+
+    Datas com fuso são convertidas para UTC e datas fora do intervalo do datetime64[ns]
+    (anos 1677-2262) são limitadas a ele: ?start=1500-01-01 é "desde o início".
+    """
+    value = query.get(name, [None])[0]
+    if not value:
+        return None
+    try:
+        date = pd.Timestamp(value)
+    except (ValueError, OverflowError):
+        raise ApiError(400, f"Invalid '{name}' date: {value}")
+    if pd.isna(date):
+        raise ApiError(400, f"Invalid '{name}' date: {value}")
+    if date.tzinfo is not None:
+        date = date.tz_convert(None)
+    return min(max(date, pd.Timestamp.min), pd.Timestamp.max).as_unit("ns")
+
+
+def index_data(store, name, query):
+    """Série de um índice recortada por data (busca binária no índice ordenado, sem cópia)."""
+    var = store.resolve(name, alias) or store.resolve(name.replace("-", "/"), alias)
+    if var is None:
+        raise ApiError(404, f"Unknown index: {name}")
+
+    ext = query.get("format", ["json"])[0].lower()
+    if ext not in EXT_MIME or (ext == "nc" and not netcdf_available()):
+        raise ApiError(400, f"Unknown format: {ext} (use one of {', '.join(sorted(EXT_MIME))})")
+
+    serie = store.series(var)
+    base = query.get("base", [None])[0]
+    standardize = query.get("standardize", ["0"])[0].lower() in ("1", "true", "yes")
+    if base or standardize:
+        serie = _rebaselined(store, var, base or "1991-2020", standardize)
+    start, end = _parse_date(query, "start"), _parse_date(query, "end")
+    lo = serie.index.searchsorted(start, side="left") if start is not None else 0
+    hi = serie.index.searchsorted(end, side="right") if end is not None else len(serie)
+    return encode_frame(serie.iloc[lo:hi].rename("value").reset_index(), ext), EXT_MIME[ext]
+
+
+def _rebaselined(store, var, base, standardize):
+    """Anomalias em relação a outro período base (aceita hífen no lugar do travessão: 1981-2010)."""
+    key = base.replace("-", "–")
+    if key not in BASE_PERIODS:
+        raise ApiError(400, f"Unknown base period: {base} (use one of {', '.join(k.replace('–', '-') for k in BASE_PERIODS)})")
+    clim = climatology(store, var, key)
+    if clim is None:
+        raise ApiError(400, f"Base periods apply only to monthly indices: {var}")
+    if clim["mean"].isna().any():
+        raise ApiError(400, f"{var} does not cover the {base} base period")
+    return rebaseline(store, var, key, standardize)
+
+
+def correlations(store, query):
+    """Matriz de correlação em uma defasagem, ou a curva de defasagens de um par (a, b)."""
+    if "a" in query or "b" in query:
+        names = [store.resolve(query.get(key, [""])[0], alias) for key in ("a", "b")]
+        if None in names or any(is_mjo(name) or name not in store.monthly_matrix() for name in names):
+            raise ApiError(404, "Parameters 'a' and 'b' must be monthly indices")
+        serie = pair_lag_correlation(store, *names)
+        body = {"a": names[0], "b": names[1], "lags": serie.index.tolist(), "correlation": [_number(v) for v in serie]}
+        return json.dumps(body).encode("utf-8"), "application/json"
+
+    try:
+        lag = int(query.get("lag", ["0"])[0])
+        df = correlation_matrix(store, lag)
+    except ValueError:
+        raise ApiError(400, f"'lag' must be an integer between -{MAX_LAG} and {MAX_LAG}")
+
+    if query.get("format", ["json"])[0].lower() == "csv":
+        return df.round(4).to_csv(index_label="index").encode("utf-8"), "text/csv"
+    body = {"lag": lag, "names": list(df.columns), "matrix": [[_number(v) for v in row] for row in df.to_numpy()]}
+    return json.dumps(body).encode("utf-8"), "application/json"
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "TeleconnectionIndexAPI/1.0"
+    holder = None
+
+    def do_GET(self):
+        inicio = time.perf_counter()
+        try:
+            self._get()
+        except Exception as err:
+            # Qualquer outra falha vira uma resposta 500 (e não uma conexão fechada sem resposta)
+            self.log_error("Erro em %s: %r", self.path, err)
+            self._send_error(500, f"Internal error: {type(err).__name__}")
+        finally:
+            route = self.path.lstrip("/").split("/", 1)[0].split("?", 1)[0]
+            # Rotas desconhecidas agrupadas para não multiplicar as séries de métricas
+            route = route if route in ROUTES else "other"
+            REGISTRY.observe("api_request_seconds", time.perf_counter() - inicio, route=route)
+
+    def _get(self):
+        url = urlsplit(self.path)
+        if url.path.rstrip("/") == "/metrics":
+            self._send(200, REGISTRY.exposition().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8")
+            return
+        store = self.holder.get()
+        if url.path.rstrip("/") == "/stats":
+            # Contadores mudam a cada carga: sem ETag nem cache
+            self._send(200, json.dumps(store.stats()).encode("utf-8"), "application/json")
+            return
+        try:
+            # Já em cache (render) nas requisições repetidas, que são as que recebem 304
+            body, content_type = render(store, url.path, url.query)
+        except ApiError as err:
+            self._send_error(err.status, str(err))
+            return
+
+        # Um ETag por representação: a versão gzip é outro corpo, então outro ETag (forte)
+        encoding = self._encoding(body)
+        digest = hashlib.sha256(f"{store.version}|{url.path}|{url.query}".encode("utf-8")).hexdigest()[:32]
+        etag = f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
+        if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return
+        self._send(200, body, content_type, etag)
+
+    def _send_error(self, status, message):
+        self._send(status, json.dumps({"error": message}).encode("utf-8"), "application/json")
+
+    def _encoding(self, body):
+        """Codificação da resposta: gzip se o cliente aceita e o corpo é grande o bastante."""
+        if len(body) >= GZIP_MIN_SIZE and "gzip" in self.headers.get("Accept-Encoding", ""):
+            return "gzip"
+        return None
+
+    def _send(self, status, body, content_type, etag=None):
+        encoding = self._encoding(body)
+        if encoding:
+            body = gzip.compress(body)
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Vary", "Accept-Encoding")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "public, max-age=300")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+# Respostas já codificadas por (store, rota, query); limpo a cada atualização dos dados
+@lru_cache(maxsize=256)
+def render(store, path, query_string):
+    query = parse_qs(query_string)
+    parts = [unquote(part) for part in path.strip("/").split("/", 1)]
+
+    if parts == ["indices"]:
+        return json.dumps(list_indices(store)).encode("utf-8"), "application/json"
+    if parts[0] == "indices" and len(parts) == 2:
+        return index_data(store, parts[1], query)
+    if parts == ["correlations"]:
+        return correlations(store, query)
+    if parts == ["latest"]:
+        return json.dumps(latest(store)).encode("utf-8"), "application/json"
+    raise ApiError(404, f"Unknown route: {path}")
+
+
+def make_server(host, port, dir_dataset, dir_cache):
+    ApiHandler.holder = StoreHolder(dir_dataset, dir_cache)
+    return ThreadingHTTPServer((host, port), ApiHandler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API somente leitura dos índices de teleconexão.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", default=8502, type=int)
+    parser.add_argument("--dataset", default=base_path / "dataset", type=Path)
+    parser.add_argument("--cache", default=cache_root(base_path), type=Path)
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.dataset, args.cache)
+    print(f"🚀 API em http://{args.host}:{args.port}")
+    server.serve_forever()
@@ -1,11 +1,16 @@
 # Importação das bibliotecas
+# Só o necessário para a primeira pintura: pandas, Plotly e o store são importados mais
+# abaixo, depois que a aba Home (com o resumo pré-montado) já foi enviada ao navegador.
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-from datetime import datetime
 from pathlib import Path
-import re
-from io import BytesIO
+import threading
+import functools
+import uuid
+from home_summary import SUMMARY_FILE, display_order_tab, display_order_tab_mjo, read_summary, source_files, summary_html, write_summary
+from metrics import (
+    REGISTRY, begin_rerun, debug_enabled, end_rerun, first_paint, rerun_in_progress, span, start_metrics_server, tracked
+)
+from shared_cache import SharedCache, cache_root
 import warnings
 warnings.filterwarnings("ignore")
 
@@ -21,55 +26,71 @@ def layouts():
 if __name__ == "__main__":
     layouts()
 
+# ======================
+# MÉTRICAS
+# ======================
+# Servidor /metrics (Prometheus) uma vez por processo, se APP_INDEX_METRICS_PORT estiver definida
+@st.cache_resource
+def metrics_server():
+    return start_metrics_server()
+
+metrics_server()
+
+# Cada sessão recebe um identificador para a contagem de reruns
+if "metrics_session" not in st.session_state:
+    st.session_state["metrics_session"] = uuid.uuid4().hex
+session_reruns = begin_rerun(st.session_state["metrics_session"])
+
+
+def fragmento(func):
+    """st.fragment medido como um rerun próprio (scope="fragment:<nome>").
+
+    Quando o widget de um fragmento muda, só ele reexecuta: o rerun é contado na sessão, vai para
+    app_rerun_seconds e, com a depuração ligada, as etapas aparecem no fim do próprio fragmento.
+    Chamado durante o script completo, o fragmento só entra nos spans do rerun da página.
+    """
+    scope = f"fragment:{func.__name__}"
+
+    @functools.wraps(func)
+    def executar(*args, **kwargs):
+        if rerun_in_progress():
+            return func(*args, **kwargs)
+        reruns = begin_rerun(st.session_state["metrics_session"], scope=scope)
+        try:
+            resultado = func(*args, **kwargs)
+        finally:
+            spans = end_rerun()
+        if debug_enabled(st.query_params):
+            with st.expander(f"🐞 Debug ({scope})", expanded=False):
+                st.markdown(f"**Reruns in this session:** {reruns}")
+                st.dataframe(pd.DataFrame(spans, columns=["stage", "seconds"]).round(4), hide_index=True, use_container_width=True)
+        return resultado
+
+    return st.fragment(executar)
+
 display_order = [
     "AAO", "PSA1", "PSA2", "AO", "PNA", "NAO", "DMI/IOD", "IOSD",
     "NINO12", "NINO3", "NINO34", "NINO4", "SOI", "TNA", "TSA", "SASAI",
     "SSTRG2", "SAODI", "SASDI", "SAD", "SWSA","ONI", "QBO", "PDO", "AMO", "MJO"
 ]
 
-
-display_order_tab = [
-    "AAO", "PSA1", "PSA2", "AO", "PNA", "NAO", "DMI/IOD", "IOSD",
-    "NINO12", "NINO3", "NINO34", "NINO4", "SOI", "TNA", "TSA", "SASAI",
-    "SSTRG2", "SAODI", "SASDI", "SAD", "SWSA","ONI", "QBO", "PDO", "AMO"
-]
-
-display_order_tab_mjo = ["Amplitude MJO", "Phase MJO"]
-
-# Mapeamento rótulos -> nomes reais nos dados
-alias = {
-    "NINO12": "NIN12",
-    "NINO3":  "NIN03",
-    "NINO34": "NIN34",
-    "NINO4":  "NIN04",
-    "DNI/IOD": "DMI/IOD",
-    "Amplitude MJO": "Amplitude MJO/RMM",
-    "Phase MJO": "Fase MJO/RMM"
-}
-
 # Diretório da pasta do projeto
 base_path = Path(__file__).resolve().parent
 
-@st.cache_data
-def load_datasets():
-    dir_dataset = base_path / "dataset"
-    datasets = []
-    for dataset_path in dir_dataset.glob("*.txt"):
-        df = pd.read_csv(dataset_path, sep="\t")
-        var = df.columns[1] if len(df.columns) > 1 else df.columns[0]
-        datasets.append((var, df))
-    return datasets
-
-@st.cache_data
-def get_list_dataset_and_vars():
-    datasets = load_datasets()
-    vars_sorted = sorted(var for var, _ in datasets)
-    return datasets, vars_sorted
+dir_dataset = base_path / "dataset"
+# Cache colunar, resumo pré-montado e downloads: compartilhados entre as réplicas do app
+# (APP_INDEX_SHARED_CACHE aponta para um volume comum; por padrão, a pasta .cache)
+dir_cache = cache_root(base_path)
 
-list_dataset, list_var = get_list_dataset_and_vars()
+# Tabela de resumo como fragmento: não depende de nenhum widget das outras abas
+@fragmento
+def resumo_indices(html, html_mjo):
+    with span("home.render"):
+        st.markdown(html, unsafe_allow_html=True)
+        st.markdown(html_mjo, unsafe_allow_html=True)
 
 # Função para plotagem das páginas do APP
-tab1, tab2 = st.tabs(["Home", "Indices"])
+tab1, tab2, tab3, tab4 = st.tabs(["Home", "Indices", "Correlations", "Compare"])
 
 with tab1:
     def introducao():
@@ -132,146 +153,429 @@ with tab1:
         # ======================
         # TABELA DE RESUMO DOS INDICES
         # ======================
+        # Preenchida logo abaixo com o resumo pré-montado ou, se os dados mudaram, depois de abrir o store
+        return st.container()
 
-        last_values = {}
-        last_date = None 
-        last_date_mjo = None 
-
-        # Primeiro, encontra a data mais recente entre os índices NÃO-MJO
-        latest_date_non_mjo = None
-        for var, data in list_dataset:
-            if "MJO" in var.upper():
-                continue
-            df_temp = data.copy()
-            df_temp.columns = ["time", "value"]
-            df_temp["time"] = pd.to_datetime(df_temp["time"], errors='coerce')
-            df_temp.dropna(subset=["time"], inplace=True)
-            if not df_temp.empty:
-                max_date = df_temp["time"].max()
-                if latest_date_non_mjo is None or max_date > latest_date_non_mjo:
-                    latest_date_non_mjo = max_date
-
-        for var, data in list_dataset:
-            df_temp = data.copy()
-            df_temp.columns = ["time", "value"]
-            df_temp["time"] = pd.to_datetime(df_temp["time"], errors='coerce')
-            df_temp.dropna(subset=["time"], inplace=True)
-            df_temp.sort_values("time", inplace=True)
-
-            if not df_temp.empty:
-                last_row = df_temp.iloc[-1]
-                val = last_row["value"]
-                
-                # MODIFICAÇÃO: Para índices não-MJO, verificar se tem dado na data mais recente
-                if "MJO" in var.upper():
-                    # MJO mantém comportamento original
-                    last_values[var] = "-" if pd.isna(val) else round(val, 2)
-                    if last_date_mjo is None or last_row["time"] > last_date_mjo:
-                        last_date_mjo = last_row["time"]
-                else:
-                    # Verifica se o índice tem dado exatamente na data mais recente
-                    if latest_date_non_mjo is not None:
-                        if (last_row["time"].year == latest_date_non_mjo.year and 
-                            last_row["time"].month == latest_date_non_mjo.month):
-                            last_values[var] = "-" if pd.isna(val) else round(val, 2)
-                        else:
-                            last_values[var] = "-"
-                    else:
-                        last_values[var] = "-" if pd.isna(val) else round(val, 2)
-                    
-                    if last_date is None or last_row["time"] == last_date:
-                        last_date = latest_date_non_mjo
-            else:
-                last_values[var] = "-"
-
-        def get_from_last_values(label: str):
-            """Retorna o valor usando o rótulo desejado, respeitando alias e case-insensitive."""
-            key = alias.get(label, label)
-            if key in last_values:
-                return last_values[key]
-            for k in last_values.keys():
-                if k.casefold() == key.casefold():
-                    return last_values[k]
-            return "-"
-
-        def get_from_last_values_mjo(label: str):
-            """Retorna o valor usando o rótulo desejado, respeitando alias e case-insensitive."""
-            key = alias.get(label, label)
-            if key in last_values:
-                return last_values[key]
-            for k in last_values.keys():
-                if k.casefold() == key.casefold():
-                    return last_values[k]
-                return "-"
-
-        # quebra em 3 linhas com 9 colunas cada, mantendo a ordem fixa
-        rows = [display_order_tab[i:i + 9] for i in range(0, len(display_order_tab), 9)]
-        rows_mjo = [display_order_tab_mjo[i:i + 2] for i in range(0, len(display_order_tab_mjo), 2)]
-
-        formatted_date = last_date.strftime("%B %Y") if last_date else "Last month"
-        formatted_date_mjo = last_date_mjo.strftime("%B %dth, %Y") if last_date_mjo else "Last month"
-
-        # bloco HTML
-        html = f"""
-        <div style="background-color:#e3e2e2ff; padding:20px; border-radius:10px; color:black; font-family:monospace; text-align:center;">
-            <h4 style="color:black; margin-bottom:25px;">Indices for {formatted_date}</h4>
-        """
+    resumo_pronto = None
+    if __name__ == "__main__":
+        with span("home"):
+            resumo_home = introducao()
+            with span("home.prebuilt"):
+                # O do cache compartilhado (prewarm.py ou outra réplica) ou o que vem com o repositório
+                resumo_pronto = (
+                    read_summary(dir_cache / SUMMARY_FILE, dir_dataset, dir_cache)
+                    or read_summary(base_path / SUMMARY_FILE, dir_dataset, dir_cache)
+                )
+            if resumo_pronto is not None:
+                with resumo_home:
+                    resumo_indices(*resumo_pronto)
+                first_paint()
+
+# ======================
+# IMPORTAÇÕES PESADAS
+# ======================
+# Depois da primeira pintura; nos reruns seguintes os módulos já estão carregados (custo zero)
+with span("import.pandas"):
+    import pandas as pd
+with span("import.modules"):
+    from index_store import MJO_AMPLITUDE, MJO_PHASE, MJO_WINDOW_DAYS, alias, dataset_fingerprint, open_index_store
+    from aggregation import BASE_PERIODS, DAILY_AGGREGATIONS, MONTHLY_AGGREGATIONS, aggregate, climatology, rebaseline
+    from events import describe_rule, event_catalog
+    from analysis import MAX_LAG, correlation_matrix, pair_lag_correlation
+    from exports import FORMATS, available_formats
+    from methodology import CATALOG_FILE, EXCEL_FILE, load_catalog, lookup
+    import products
+with span("import.figures"):
+    from figures import (
+        DAILY_PERIODS, DEFAULT_DAILY_PERIOD, MONTHLY_PERIODS, PHASE_SPACE_WINDOWS, comparison_figure,
+        correlation_heatmap, daily_figure, lag_correlation_figure, monthly_figure, phase_space_figure
+    )
 
-        for row in rows:
-            html += "<table style='width:100%; border-collapse:collapse; margin-bottom:20px;'>"
-            # cabeçalho
-            html += "<tr>" + "".join(
-                f"<th style='padding:6px; font-size:16px; color:black;'>{label}</th>" for label in row
-            ) + "<tr>"
-
-            # valores
-            html += "<tr>"
-            for label in row:
-                val = get_from_last_values(label)
-                if val == "-":
-                    color = "black"
-                    display_val = "-"
-                else:
-                    color = "red" if val > 0 else "blue" if val < 0 else "black"
-                    display_val = f"{val:.2f}"
-                html += f"<td style='padding:6px; font-size:16px; font-weight:bold; color:{color};'>{display_val}</td>"
-            html += "</tr></table>"
-
-        html += "</div>"
-
-        html_mjo = f"""
-        <div style="background-color:#e3e2e2ff; padding:20px; border-radius:10px; color:black; font-family:monospace; text-align:center;">
-            <h4 style="color:black; margin-bottom:25px;">Indices for {formatted_date_mjo}</h4>
-        """
-        print(formatted_date_mjo)
-        for row_mjo in rows_mjo:
-            html_mjo += "<table style='width:100%; border-collapse:collapse; margin-bottom:20px;'>"
-            # cabeçalho
-            html_mjo += "<tr>" + "".join(
-                f"<th style='padding:6px; font-size:16px; color:black;'>{label_mjo}</th>" for label_mjo in row_mjo
-            ) + "</tr>"
-            
-            # valores
-            html_mjo += "<tr>"
-            for label_mjo in row_mjo:
-                val_mjo = get_from_last_values_mjo(label_mjo)
-                if val_mjo == "-":
-                    color = "black"
-                    display_val_mjo = "-"
-                else:
-                    color = "red" if val_mjo > 0 else "blue" if val_mjo < 0 else "black"
-                    display_val_mjo = f"{val_mjo:.2f}"
-                html_mjo += f"<td style='padding:6px; font-size:16px; font-weight:bold; color:{color};'>{display_val_mjo}</td>"
-                print(label_mjo, val_mjo)
-            html_mjo += "<tr></tr>"
-            
-        html_mjo += "</div>"
+# Parseia os índices uma única vez por processo (sem cópias entre reruns).
+# A chave é a assinatura (nome, mtime, tamanho) da pasta: se um arquivo mudar,
+# o store é reconstruído a partir do cache colunar, re-codificando só o que mudou.
+@tracked("load_index_store", st.cache_resource(max_entries=1))
+def load_index_store(fingerprint):
+    return open_index_store(dir_dataset, dir_cache)
+
+with span("store.open"):
+    store = load_index_store(dataset_fingerprint(dir_dataset))
+shared = SharedCache(dir_cache)
+
+# Catálogo de metodologias já compilado (JSON, chave normalizada e alias, símbolo de grau
+# corrigido); a planilha só é lida se o JSON faltar ou estiver desatualizado
+metodologia_excel = base_path / EXCEL_FILE
+metodologia_catalogo = base_path / CATALOG_FILE
+
+@tracked("load_metodologias", st.cache_resource(max_entries=1, show_spinner=False))
+def load_metodologias(assinatura):
+    return load_catalog(metodologia_excel, metodologia_catalogo)
+
+def metodologia(indice):
+    """Entrada do catálogo para o índice (None se não houver); recarrega se algum arquivo mudar."""
+    assinatura = tuple(path.stat().st_mtime_ns if path.exists() else None for path in (metodologia_excel, metodologia_catalogo))
+    return lookup(load_metodologias(assinatura), indice)
+
+# ======================
+# CACHE DAS FIGURAS
+# ======================
+# Figuras prontas por (hash do conteúdo do índice, índice, período) em um LRU limitado:
+# trocar de índice no selectbox passa a ser uma consulta ao cache, não uma nova figura, e
+# uma atualização dos dados só invalida as figuras dos índices cujo arquivo mudou.
+# As figuras são compartilhadas entre sessões e não devem ser modificadas.
+@tracked("get_monthly_figure", st.cache_resource(max_entries=64, show_spinner=False))
+def get_monthly_figure(file_hash, var, periodo, agregacao=None, eventos=False, base=None, padronizar=False):
+    entrada = metodologia(var)
+    full_index_name = entrada["name"] if entrada else var
+    titulo = f"{full_index_name} ({var}) - Monthly"
+    serie = store.series(var)
+    if base is not None:
+        # Anomalias recalculadas no período base escolhido
+        serie = rebaseline(store, var, base, padronizar)
+        titulo += f" - {'standardized ' if padronizar else ''}anomalies relative to {base}"
+    overlay = None
+    if agregacao is not None:
+        overlay = aggregate(store, var, *MONTHLY_AGGREGATIONS[agregacao], base, padronizar)["mean"]
+    return monthly_figure(
+        serie, titulo, var, MONTHLY_PERIODS[periodo],
+        overlay=overlay, overlay_name=agregacao, events=event_catalog(store).get(var) if eventos else None
+    )
 
-        st.markdown(html, unsafe_allow_html=True)
-        st.markdown(html_mjo, unsafe_allow_html=True)
+@tracked("get_mjo_figures", st.cache_resource(max_entries=16, show_spinner=False))
+def get_mjo_figures(file_hashes, periodo, agregacao=None, eventos=False):
+    # Só a janela escolhida (fatia sem cópia do store), não a série diária inteira
+    df_mjo = store.mjo_window(DAILY_PERIODS[periodo])
+    if agregacao is None:
+        amplitude, titulo = df_mjo["amplitude"], "MJO Amplitude (Daily)"
+    else:
+        amplitude = aggregate(store, MJO_AMPLITUDE, *DAILY_AGGREGATIONS[agregacao])["mean"]
+        amplitude = amplitude.iloc[amplitude.index.searchsorted(df_mjo.index[0], side="left"):]
+        titulo = f"MJO Amplitude ({agregacao})"
+    fig_amp = daily_figure(
+        amplitude, titulo, "Amplitude", "Amplitude", "red",
+        "Date: %{x|%b-%d-%Y}<br>Amplitude: %{y:.2f}",
+        events=event_catalog(store).get(MJO_AMPLITUDE) if eventos else None
+    )
+    fig_fase = daily_figure(
+        df_mjo["phase"], "MJO Phase (Daily)", "Phase", "Phase", "blue",
+        "Date: %{x|%b-%d-%Y}<br>Phase: %{y}", categorical=True
+    )
+    return fig_amp, fig_fase
 
-    if __name__ == "__main__":
-        introducao()
+@tracked("get_mjo_phase_space", st.cache_resource(max_entries=16, show_spinner=False))
+def get_mjo_phase_space(file_hashes, dias):
+    df_mjo = store.mjo_window(dias)
+    return phase_space_figure(
+        df_mjo, f"MJO Phase Space - last {dias} days ({df_mjo.index[0]:%b-%d-%Y} to {df_mjo.index[-1]:%b-%d-%Y})"
+    )
+
+def mjo_hashes():
+    return (store.hashes.get(MJO_AMPLITUDE), store.hashes.get(MJO_PHASE))
+
+# A chave do st.cache_resource vem só dos argumentos passados (não dos padrões): a interface
+# e o pré-aquecimento chamam as figuras por aqui, sempre com todos os argumentos
+def monthly_figure_for(var, periodo, agregacao=None, eventos=False, base=None, padronizar=False):
+    return get_monthly_figure(store.hashes.get(var), var, periodo, agregacao, eventos, base, padronizar)
+
+def mjo_figures_for(periodo, agregacao=None, eventos=False):
+    return get_mjo_figures(mjo_hashes(), periodo, agregacao, eventos)
+
+# Pré-constrói em segundo plano a visão completa de cada índice (uma vez por versão)
+@tracked("warm_figure_cache", st.cache_resource(max_entries=1, show_spinner=False))
+def warm_figure_cache(version):
+    def warm():
+        # Catálogo de eventos de todos os índices: calculado uma vez por versão dos dados
+        event_catalog(store)
+        for label in display_order:
+            var = alias.get(label, label)
+            if label == "MJO":
+                if store.mjo_frame() is not None:
+                    mjo_figures_for(DEFAULT_DAILY_PERIOD)
+                    get_mjo_phase_space(mjo_hashes(), MJO_WINDOW_DAYS)
+            elif var in store:
+                var = store.resolve(var)
+                monthly_figure_for(var, "All")
+
+    thread = threading.Thread(target=warm, name="warm-figure-cache", daemon=True)
+    thread.start()
+    return thread
+
+warm_figure_cache(store.version)
+
+# ======================
+# CACHE DOS DOWNLOADS
+# ======================
+# Bytes já codificados por (índice, hash do arquivo, formato): cada arquivo é codificado
+# uma única vez, e em uma atualização só os índices cujo conteúdo mudou são refeitos.
+# Os bytes vêm do cache compartilhado em disco (products.py); aqui ficam só os mais usados.
+@tracked("get_download", st.cache_resource(max_entries=64, show_spinner=False))
+def get_download(var, file_hash, ext):
+    return products.index_download(shared, store, var, ext)
+
+@tracked("get_mjo_download", st.cache_resource(max_entries=32, show_spinner=False))
+def get_mjo_download(column, file_hash, ext):
+    return products.mjo_download(shared, store, column, ext)
+
+# Séries agregadas (média móvel, sazonal ou reamostrada) por (índice, hash do arquivo, agregação, formato)
+@tracked("get_aggregate_download", st.cache_resource(max_entries=64, show_spinner=False))
+def get_aggregate_download(var, file_hash, method, param, ext, base=None, padronizar=False):
+    return products.aggregate_download(shared, store, var, method, param, ext, base, padronizar)
+
+# Série com anomalias recalculadas por (índice, hash do arquivo, período base, padronização, formato)
+@tracked("get_rebaselined_download", st.cache_resource(max_entries=64, show_spinner=False))
+def get_rebaselined_download(var, file_hash, base, padronizar, ext):
+    return products.rebaselined_download(shared, store, var, base, padronizar, ext)
+
+def base_suffix(base, padronizar):
+    """Sufixo do nome do arquivo para séries recalculadas (ex.: _base1981-2010_std)."""
+    if base is None:
+        return ""
+    return f"_base{base.replace('–', '-')}" + ("_std" if padronizar else "")
+
+def aggregate_download_button(var, label, aggregations, ext, mime_type, base_filename, base=None, padronizar=False):
+    method, param = aggregations[label]
+    st.download_button(
+        label=f"⬇️ Download aggregated series ({label})",
+        data=get_aggregate_download(var, store.hashes.get(var), method, param, ext, base, padronizar),
+        file_name=f"{base_filename}_{method}{param or ''}{base_suffix(base, padronizar)}.{ext}",
+        mime=mime_type,
+        help="Click to download the aggregated series (mean, standard deviation and number of values) in the chosen format."
+    )
+
+# Catálogos de eventos: por índice (hash do arquivo) e completo (versão dos dados)
+@tracked("get_events_download", st.cache_resource(max_entries=64, show_spinner=False))
+def get_events_download(var, file_hash, ext):
+    return products.events_download(shared, store, var, ext)
+
+@tracked("get_catalog_download", st.cache_resource(max_entries=8, show_spinner=False))
+def get_catalog_download(version, ext):
+    return products.catalog_download(shared, store, ext)
+
+def events_download_buttons(var, ext, mime_type, base_filename):
+    if var in event_catalog(store):
+        st.download_button(
+            label="⬇️ Download event catalog",
+            data=get_events_download(var, store.hashes.get(var), ext),
+            file_name=f"{base_filename}_events.{ext}",
+            mime=mime_type,
+            help="Click to download the events of this index (start, end, length, peak and mean) in the chosen format."
+        )
+    st.download_button(
+        label="⬇️ Download event catalog (all indices)",
+        data=get_catalog_download(store.version, ext),
+        file_name=f"events_all_indices.{ext}",
+        mime=mime_type,
+        help="Click to download the events detected in every index in the chosen format."
+    )
+
+# Pacote com todos os índices, montado a partir dos arquivos já codificados
+@tracked("get_bundle", st.cache_resource(max_entries=8, show_spinner=False))
+def get_bundle(version, ext):
+    return products.bundle(shared, store, ext)
+
+# ======================
+# CACHE DAS CORRELAÇÕES
+# ======================
+# O cubo de correlações defasadas é calculado uma vez por versão dos dados (no store);
+# aqui ficam as figuras e o CSV de cada defasagem.
+def index_label(var):
+    """Rótulo exibido (ex.: NINO34) para o nome da variável nos dados (ex.: NIN34)."""
+    return next((label for label in display_order_tab if alias.get(label, label) == var), var)
+
+def correlation_table(lag):
+    """Matriz na defasagem escolhida, na mesma ordem e com os mesmos rótulos da aba Home."""
+    names = [alias.get(label, label) for label in display_order_tab]
+    names = [var for var in names if var in store.monthly_matrix()]
+    return correlation_matrix(store, lag, names).rename(index=index_label, columns=index_label)
+
+@tracked("get_correlation_figure", st.cache_resource(max_entries=64, show_spinner=False))
+def get_correlation_figure(version, lag):
+    return correlation_heatmap(correlation_table(lag), f"Correlation between indices (lag {lag} months)")
+
+@tracked("get_correlation_csv", st.cache_resource(max_entries=64, show_spinner=False))
+def get_correlation_csv(version, lag):
+    return correlation_table(lag).round(4).to_csv(index_label="index").encode("utf-8")
+
+@tracked("get_lag_correlation_figure", st.cache_resource(max_entries=64, show_spinner=False))
+def get_lag_correlation_figure(version, var_a, var_b):
+    serie = pair_lag_correlation(store, var_a, var_b)
+    return lag_correlation_figure(serie, f"{index_label(var_a)}(t) × {index_label(var_b)}(t + lag)")
+
+# Figura de comparação por (hash dos arquivos, rótulos escolhidos, padronização)
+@tracked("get_comparison_figure", st.cache_resource(max_entries=32, show_spinner=False))
+def get_comparison_figure(file_hashes, labels, padronizar):
+    series = {}
+    for label in labels:
+        serie = store.series(label, alias).dropna()
+        if padronizar:
+            serie = (serie - serie.mean()) / serie.std()
+        series[label] = serie
+    y_title = "Standardized value" if padronizar else "Value"
+    return comparison_figure(series, "Comparison of indices", y_title)
+
+def download_bundle_button(ext):
+    st.download_button(
+        label="⬇️ Download all indices (.zip)",
+        data=get_bundle(store.version, ext),
+        file_name=f"teleconnection_indices_{ext}.zip",
+        mime="application/zip",
+        help="Click to download every index in the chosen format as a single ZIP file."
+    )
+
+# Tabela de resumo da aba Home (HTML pronto), montada uma vez por versão dos dados e
+# gravada como resumo pré-montado para a primeira pintura das próximas partidas a frio
+@tracked("get_summary_html", st.cache_resource(max_entries=1, show_spinner=False))
+def get_summary_html(version):
+    files = source_files(dir_dataset, dir_cache)
+    html, html_mjo = summary_html(store, alias)
+    write_summary(dir_cache / SUMMARY_FILE, files, html, html_mjo)
+    return html, html_mjo
+
+# Resumo da Home, se não havia um pré-montado válido para os dados atuais
+if __name__ == "__main__" and resumo_pronto is None:
+    with resumo_home:
+        with span("home.html"):
+            html, html_mjo = get_summary_html(store.version)
+        resumo_indices(html, html_mjo)
+    first_paint()
+
+# ======================
+# FRAGMENTOS DA ABA INDICES
+# ======================
+# Cada painel reexecuta sozinho quando um widget dele muda (período, formato do arquivo...);
+# o seletor da barra lateral e as opções que mudam tanto o gráfico quanto os downloads
+# (agregação, período base) ficam fora e reexecutam a página inteira (com tudo em cache).
+@fragmento
+def painel_metodologia(indice_escolhido):
+    # -----------------------------
+    # Explicar metodologia
+    # -----------------------------
+    with span("indices.methodology"):
+        entrada = metodologia(indice_escolhido)
+
+    st.markdown("<h2 style='font-size:24px; color:black;'>🛠️ Methodology</h2>", unsafe_allow_html=True)
+    if entrada:
+        # Texto já com o símbolo de grau corrigido na compilação do catálogo
+        st.markdown(f"<p style='text-align: justify;'> {entrada['methodology']}</p>", unsafe_allow_html=True)
+        st.markdown(f"<p style='text-align: justify;'><strong>🔗 Access:</strong> {entrada['access']}</p>", unsafe_allow_html=True)
+        st.markdown(f"<p style='text-align: justify;'><strong>📚 Reference:</strong> {entrada['reference']}</p>", unsafe_allow_html=True)
+    else:
+        st.markdown(f"⏳ Methodology for the **{indice_escolhido}** index under development.")
+
+@fragmento
+def grafico_mjo(agregacao):
+    # Período escolhido no servidor: visão reduzida (picos preservados) para
+    # janelas longas e resolução completa para as janelas curtas
+    periodo = st.radio(
+        "Period:", list(DAILY_PERIODS), index=list(DAILY_PERIODS).index(DEFAULT_DAILY_PERIOD), horizontal=True,
+        key="mjo_period"
+    )
+    eventos = st.checkbox("Shade events", value=False, key="mjo_events", help=describe_rule(MJO_AMPLITUDE))
+
+    # Figuras de amplitude e fase vindas do cache
+    with span("indices.figure"):
+        fig_amp, fig_fase = mjo_figures_for(periodo, agregacao, eventos)
+
+    # Serialização das figuras (Plotly -> JSON) enviadas ao navegador
+    with span("indices.plotly_chart"):
+        st.plotly_chart(fig_amp, use_container_width=True)
+        st.plotly_chart(fig_fase, use_container_width=True)
+
+@fragmento
+def diagrama_fase_mjo():
+    # Diagrama RMM1 × RMM2 montado só com a janela escolhida (padrão: últimos 90 dias)
+    dias = st.select_slider(
+        "Phase-space window (days):", options=list(PHASE_SPACE_WINDOWS), value=MJO_WINDOW_DAYS, key="mjo_phase_days"
+    )
+    with span("indices.figure"):
+        fig = get_mjo_phase_space(mjo_hashes(), dias)
+    with span("indices.plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
+    st.caption(
+        "RMM1 and RMM2 are approximated from the daily amplitude and phase: each day is placed at the centre "
+        "of its phase sector, so the distance from the origin is exact but the angle is accurate to ±22.5°."
+    )
+
+@fragmento
+def downloads_mjo(agregacao):
+    # -----------------------------
+    # Botão para download dos dados
+    # -----------------------------
+    st.markdown("<h2 style='font-size:24px; color:black;'>📥 Download data</h2>", unsafe_allow_html=True)
+    file_format = st.selectbox("Choose file format:", options=available_formats(), key="mjo_download_format")
+    base_filename_amp = "MJO_amplitude_data"
+    base_filename_fase = "MJO_phase_data"
+
+    # Bytes já codificados (cache por hash do arquivo de cada série e formato)
+    ext, mime_type = FORMATS[file_format]
+    with span("indices.download"):
+        data_to_download_amp = get_mjo_download("amplitude", store.hashes.get(MJO_AMPLITUDE), ext)
+        data_to_download_fase = get_mjo_download("phase", store.hashes.get(MJO_PHASE), ext)
+    file_name_amp = f"{base_filename_amp}.{ext}"
+    file_name_fase = f"{base_filename_fase}.{ext}"
+
+    st.download_button(
+        label="⬇️ Download amplitude file",
+        data=data_to_download_amp,
+        file_name=file_name_amp,
+        mime=mime_type,
+        help="Click to download the MJO amplitude data in the chosen format."
+    )
+    st.download_button(
+        label="⬇️ Download phase file",
+        data=data_to_download_fase,
+        file_name=file_name_fase,
+        mime=mime_type,
+        help="Click to download the MJO phase data in the chosen format."
+    )
+    if agregacao is not None:
+        aggregate_download_button(MJO_AMPLITUDE, agregacao, DAILY_AGGREGATIONS, ext, mime_type, base_filename_amp)
+    events_download_buttons(MJO_AMPLITUDE, ext, mime_type, "MJO_amplitude")
+    download_bundle_button(ext)
+
+@fragmento
+def grafico_mensal(var, agregacao, base, padronizar):
+    periodo = st.radio("Period:", list(MONTHLY_PERIODS), horizontal=True, key="monthly_period")
+    eventos = st.checkbox("Shade events", value=False, key="monthly_events", help=describe_rule(var))
+
+    # Figura vinda do cache (série reduzida no servidor quando longa)
+    with span("indices.figure"):
+        fig = monthly_figure_for(var, periodo, agregacao, eventos, base, padronizar)
+    with span("indices.plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
+
+@fragmento
+def downloads_mensal(indice_escolhido, agregacao, base, padronizar):
+    # -----------------------------
+    # Botão para download dos dados
+    # -----------------------------
+    st.markdown("<h2 style='font-size:24px; color:black;'>📥 Download data</h2>", unsafe_allow_html=True)
+
+    file_format = st.selectbox("Choose file format:", options=available_formats(), key="other_download_format")
+    base_filename = f"{indice_escolhido}_indice data"
+
+    # Bytes já codificados (cache por hash do arquivo do índice e formato)
+    ext, mime_type = FORMATS[file_format]
+    var = store.resolve(indice_escolhido)
+    with span("indices.download"):
+        if base is None:
+            data_to_download = get_download(var, store.hashes.get(var), ext)
+        else:
+            data_to_download = get_rebaselined_download(var, store.hashes.get(var), base, padronizar, ext)
+    file_name = f"{base_filename}{base_suffix(base, padronizar)}.{ext}"
+
+    st.download_button(
+        label="⬇️ Download file",
+        data=data_to_download,
+        file_name=file_name,
+        mime=mime_type,
+        help="Click to download the selected indice data in the chosen format."
+    )
+    if indice_escolhido in store and agregacao is not None:
+        aggregate_download_button(var, agregacao, MONTHLY_AGGREGATIONS, ext, mime_type, base_filename, base, padronizar)
+    if indice_escolhido in store:
+        events_download_buttons(var, ext, mime_type, base_filename)
+    download_bundle_button(ext)
 
 with tab2:
     def plot_indices():
@@ -294,263 +598,135 @@ with tab2:
             unsafe_allow_html=True
         )
 
-        # Carrega metodologias apenas uma vez e normaliza coluna
-        @st.cache_data
-        def load_metodologias(path):
-            df = pd.read_excel(path)
-            df["Index_normalizado"] = df["Index"].astype(str).str.strip().str.lower()
-            return df
-
-        metodologia_excel = base_path / "Metodologias.xlsx"
-        df_metodologias = load_metodologias(metodologia_excel)
-
-        def corrigir_simbolo_grau(texto):
-            return re.sub(r'(?<=\d)o(?=[A-Za-z-])', '°', texto)
-
-        index_name_normalizado = indice_escolhido.strip().lower()
-        linha = df_metodologias[df_metodologias["Index_normalizado"] == index_name_normalizado]
-
-        # Cria um dicionário para acesso rápido aos datasets
-        @st.cache_data
-        def get_dataset_dict(list_dataset):
-            return {var: data for var, data in list_dataset}
-
-        dataset_dict = get_dataset_dict(list_dataset)
-
         # Caso especial para MJO
         if indice_escolhido_label == "MJO":
-            amplitude_path = base_path / "dataset" / "amplitude_mjo.txt"
-            fase_path = base_path / "dataset" / "fase_mjo.txt"
-            if amplitude_path.exists() and fase_path.exists():
-                df_amp = pd.read_csv(amplitude_path, sep="\t", names=["time", "amplitude"], header=0)
-                df_fase = pd.read_csv(fase_path, sep="\t", names=["time", "phase"], header=0)
-
-                # Processa datas
-                for df in [df_amp, df_fase]:
-                    df["time"] = pd.to_datetime(df["time"], errors='coerce')
-                    df.dropna(subset=["time"], inplace=True)
-                    df.sort_values("time", inplace=True)
-
-                # ---------------- FIGURA AMPLITUDE ----------------
-                fig_amp = go.Figure([
-                    go.Bar(x=df_amp["time"], y=df_amp["amplitude"], marker_color="red", name="Amplitude")
-                ])
-                fig_amp.update_layout(
-                    title="MJO Amplitude (Daily)",
-                    showlegend=False,
-                    bargap=0,
-                    height=500,
-                    xaxis=dict(
-                        title=dict(text="Date", font=dict(color="black")),
-                        tickfont=dict(color="black"),
-                        rangeselector=dict(
-                            font=dict(color="black"),
-                            buttons=[
-                                dict(step="all", label="All"),
-                                dict(count=1, label="1 year", step="year", stepmode="backward"),
-                                dict(count=6, label="6 months", step="month", stepmode="backward"),
-                                dict(count=3, label="3 months", step="month", stepmode="backward"),
-                                dict(count=1, label="1 month", step="month", stepmode="backward")
-
-                            ]
-                        ),
-                        rangeslider=dict(visible=True),
-                        type="date"
-                    ),
-                    yaxis=dict(
-                        title=dict(text="Amplitude", font=dict(color="black")),
-                        tickfont=dict(color="black")
-                    )
-                )
-                fig_amp.update_traces(hovertemplate="Date: %{x|%b-%d-%Y}<br>Amplitude: %{y:.2f}")
-
-                # ---------------- FIGURA FASE ----------------
-                fig_fase = go.Figure([
-                    go.Bar(x=df_fase["time"], y=df_fase["phase"], marker_color="blue", name="Phase")
-                ])
-                fig_fase.update_layout(
-                    title="MJO Phase (Daily)",
-                    showlegend=False,
-                    bargap=0,
-                    height=500,
-                    xaxis=dict(
-                        title=dict(text="Date", font=dict(color="black")),
-                        tickfont=dict(color="black"),
-                        rangeselector=dict(
-                            font=dict(color="black"),
-                            buttons=[
-                                dict(step="all", label="All"),
-                                dict(count=1, label="1 year", step="year", stepmode="backward"),
-                                dict(count=6, label="6 months", step="month", stepmode="backward"),
-                                dict(count=3, label="3 months", step="month", stepmode="backward"),
-                                dict(count=1, label="1 month", step="month", stepmode="backward")
-                            ]
-                        ),
-                        rangeslider=dict(visible=True),
-                        type="date"
-                    ),
-                    yaxis=dict(
-                        title=dict(text="Phase", font=dict(color="black")),
-                        tickfont=dict(color="black")
-                    )
-                )
-                fig_fase.update_traces(hovertemplate="Date: %{x|%b-%d-%Y}<br>Phase: %{y}")
-
-                st.plotly_chart(fig_amp, use_container_width=True)
-                st.plotly_chart(fig_fase, use_container_width=True)
-
-                # -----------------------------
-                # Botão para download dos dados
-                # -----------------------------
-                st.markdown("<h2 style='font-size:24px; color:black;'>📥 Download data</h2>", unsafe_allow_html=True)
-                file_format = st.selectbox("Choose file format:", options=["CSV (.csv)", "Text (.txt)"], key="mjo_download_format")
-                base_filename_amp = "MJO_amplitude_data"
-                base_filename_fase = "MJO_phase_data"
-
-                if file_format == "CSV (.csv)":
-                    data_to_download_amp = df_amp.to_csv(index=False).encode("utf-8")
-                    data_to_download_fase = df_fase.to_csv(index=False).encode("utf-8")
-                    mime_type = "text/csv"
-                    file_name_amp = f"{base_filename_amp}.csv"
-                    file_name_fase = f"{base_filename_fase}.csv"
-                else:
-                    data_to_download_amp = df_amp.to_csv(index=False, sep="\t").encode("utf-8")
-                    data_to_download_fase = df_fase.to_csv(index=False, sep="\t").encode("utf-8")
-                    mime_type = "text/plain"
-                    file_name_amp = f"{base_filename_amp}.txt"
-                    file_name_fase = f"{base_filename_fase}.txt"
-
-                st.download_button(
-                    label="⬇️ Download amplitude file",
-                    data=data_to_download_amp,
-                    file_name=file_name_amp,
-                    mime=mime_type,
-                    help="Click to download the MJO amplitude data in the chosen format."
-                )
-                st.download_button(
-                    label="⬇️ Download phase file",
-                    data=data_to_download_fase,
-                    file_name=file_name_fase,
-                    mime=mime_type,
-                    help="Click to download the MJO phase data in the chosen format."
-                )
-
-                # -----------------------------
-                # Explicar metodologia
-                # -----------------------------
-                st.markdown("<h2 style='font-size:24px; color:black;'>🛠️ Methodology</h2>", unsafe_allow_html=True)
-                if not linha.empty:
-                    metodologia_texto = linha["Methodology"].values[0]
-                    acesso = linha["Access"].values[0]
-                    referencia = linha["Reference"].values[0]
-                    metodologia_texto_corrigido = corrigir_simbolo_grau(metodologia_texto)
-
-                    st.markdown(f"<p style='text-align: justify;'> {metodologia_texto_corrigido}</p>", unsafe_allow_html=True)
-                    st.markdown(f"<p style='text-align: justify;'><strong>🔗 Access:</strong> {acesso}</p>", unsafe_allow_html=True)
-                    st.markdown(f"<p style='text-align: justify;'><strong>📚 Reference:</strong> {referencia}</p>", unsafe_allow_html=True)
-                else:
-                    st.markdown(f"⏳ Methodology for the **{indice_escolhido}** index under development.")
+            # Amplitude e fase já alinhadas por data, memorizadas no store
+            df_mjo = store.mjo_frame()
+            if df_mjo is not None:
+                # Amplitude reamostrada para médias semanais ou mensais (calculadas no servidor)
+                agregacao = st.selectbox("Amplitude resampling:", ["Daily"] + list(DAILY_AGGREGATIONS), key="mjo_aggregation")
+                agregacao = None if agregacao == "Daily" else agregacao
+
+                grafico_mjo(agregacao)
+                diagrama_fase_mjo()
+                downloads_mjo(agregacao)
+                painel_metodologia(indice_escolhido)
 
             else:
                 st.warning("MJO data files not found.")
 
         else:
-            # Busca o DataFrame correspondente ao índice selecionado via dicionário
-            df = dataset_dict.get(indice_escolhido)
-            if df is not None:
-                df = df.copy()
-                df.columns = ["time", "value"]
-                df["time"] = pd.to_datetime(df["time"], errors='coerce')
-                df.dropna(subset=["time"], inplace=True)
-                df.sort_values("time", inplace=True)
-
-                # Separar positivos e negativos
-                df_pos = df.copy()
-                df_neg = df.copy()
-                df_pos["value"] = df_pos["value"].clip(lower=0)
-                df_neg["value"] = df_neg["value"].clip(upper=0)
-
-                # Plotagem utilizando o Plotly
-                fig = go.Figure([
-                    go.Bar(x=df_pos["time"], y=df_pos["value"], marker_color="red", name="Positive"),
-                    go.Bar(x=df_neg["time"], y=df_neg["value"], marker_color="blue", name="Negative")
-                ])
-
-                full_index_name = linha["Name_Index"].values[0] if not linha.empty else indice_escolhido
-                title_axis_y = indice_escolhido
-
-                fig.update_layout(
-                    title=f"{full_index_name} ({indice_escolhido}) - Monthly",
-                    showlegend=False,
-                    bargap=0,
-                    height=500,
-                    xaxis=dict(
-                        title=dict(text="Date", font=dict(color="black")),
-                        tickfont=dict(color="black"),
-                        rangeselector=dict(
-                            font=dict(color="black"),
-                            buttons=[
-                                dict(step="all", label="All"),
-                                dict(count=30, label="30 years", step="year", stepmode="backward"),
-                                dict(count=20, label="20 years", step="year", stepmode="backward"),
-                                dict(count=10, label="10 years", step="year", stepmode="backward"),
-                                dict(count=5, label="5 years", step="year", stepmode="backward"),
-                                dict(count=1, label="1 year", step="year", stepmode="backward")
-                            ]
-                        ),
-                        rangeslider=dict(visible=True),
-                        type="date"
-                    ),
-                    yaxis=dict(
-                        title=dict(text=title_axis_y, font=dict(color="black")),
-                        tickfont=dict(color="black")
-                    )
+            # Índice selecionado já processado no store
+            agregacao, base, padronizar = None, None, False
+            if indice_escolhido in store:
+                var = store.resolve(indice_escolhido)
+                # Média móvel ou sazonal desenhada sobre as barras (calculada no servidor)
+                agregacao = st.selectbox("Overlay:", ["None"] + list(MONTHLY_AGGREGATIONS), key="monthly_aggregation")
+                agregacao = None if agregacao == "None" else agregacao
+
+                # Climatologia alternativa: anomalias recalculadas sobre outro período base
+                col1, col2 = st.columns(2)
+                base = col1.selectbox(
+                    "Climatology base period:", ["As published (1991–2020)"] + list(BASE_PERIODS), key="monthly_base"
+                )
+                padronizar = col2.checkbox(
+                    "Standardize by the base-period standard deviation", value=False, key="monthly_standardize"
                 )
+                base = base if base in BASE_PERIODS else None
+                if base is None and padronizar:
+                    base = "1991–2020"
+                if base is not None and climatology(store, var, base)["mean"].isna().any():
+                    st.warning(f"The {indice_escolhido_label} series does not cover the {base} base period; showing the published anomalies.")
+                    base, padronizar = None, False
 
-                fig.update_traces(hovertemplate="Date: %{x|%b %Y}<br>Value: %{y:.2f}")
-                st.plotly_chart(fig, use_container_width=True)
+                grafico_mensal(var, agregacao, base, padronizar)
 
-            # -----------------------------
-            # Botão para download dos dados
-            # -----------------------------
-            st.markdown("<h2 style='font-size:24px; color:black;'>📥 Download data</h2>", unsafe_allow_html=True)
+            downloads_mensal(indice_escolhido, agregacao, base, padronizar)
+            painel_metodologia(indice_escolhido)
 
-            file_format = st.selectbox("Choose file format:", options=["CSV (.csv)", "Text (.txt)"], key="other_download_format")
-            base_filename = f"{indice_escolhido}_indice data"
+    if __name__ == "__main__":
+        with span("indices"):
+            plot_indices()
+
+with tab3:
+    # Fragmento: o slider de defasagem e os seletores reexecutam só esta aba
+    @fragmento
+    def plot_correlations():
+        st.markdown("<h2 style='font-size:24px; color:black;'>🔗 Correlation between indices</h2>", unsafe_allow_html=True)
+        st.markdown(
+            "<p style='text-align: justify;'>Pearson correlation between the monthly indices, computed over the months "
+            "in which both indices have data (at least 24 months). With a lag, each cell shows the correlation between "
+            "the row index at month <i>t</i> and the column index at month <i>t + lag</i>.</p>",
+            unsafe_allow_html=True
+        )
+
+        lag = st.slider("Lag (months):", min_value=-MAX_LAG, max_value=MAX_LAG, value=0, key="correlation_lag")
+        st.plotly_chart(get_correlation_figure(store.version, lag), use_container_width=True)
+        st.download_button(
+            label="⬇️ Download correlation matrix (.csv)",
+            data=get_correlation_csv(store.version, lag),
+            file_name=f"correlation_matrix_lag{lag}.csv",
+            mime="text/csv",
+            help="Click to download the correlation matrix for the selected lag."
+        )
+
+        # Correlação defasada de um par de índices
+        st.markdown("<h2 style='font-size:24px; color:black;'>⏱️ Lagged correlation</h2>", unsafe_allow_html=True)
+        labels = [label for label in display_order_tab if alias.get(label, label) in store]
+        col1, col2 = st.columns(2)
+        label_a = col1.selectbox("Index at month t:", labels, index=labels.index("NINO34") if "NINO34" in labels else 0, key="correlation_a")
+        label_b = col2.selectbox("Index at month t + lag:", labels, index=labels.index("SOI") if "SOI" in labels else 0, key="correlation_b")
+        fig = get_lag_correlation_figure(store.version, store.resolve(label_a, alias), store.resolve(label_b, alias))
+        st.plotly_chart(fig, use_container_width=True)
 
-            if file_format == "CSV (.csv)":
-                data_to_download = df.to_csv(index=False).encode("utf-8")
-                mime_type = "text/csv"
-                file_name = f"{base_filename}.csv"
-            else:
-                data_to_download = df.to_csv(index=False, sep="\t").encode("utf-8")
-                mime_type = "text/plain"
-                file_name = f"{base_filename}.txt"
-
-            st.download_button(
-                label="⬇️ Download file",
-                data=data_to_download,
-                file_name=file_name,
-                mime=mime_type,
-                help="Click to download the selected indice data in the chosen format."
-            )
-
-            # -----------------------------
-            # Explicar metodologia
-            # -----------------------------
-            st.markdown("<h2 style='font-size:24px; color:black;'>🛠️ Methodology</h2>", unsafe_allow_html=True)
-
-            if not linha.empty:
-                metodologia_texto = linha["Methodology"].values[0]
-                acesso = linha["Access"].values[0]
-                referencia = linha["Reference"].values[0]
-                metodologia_texto_corrigido = corrigir_simbolo_grau(metodologia_texto)
-
-                st.markdown(f"<p style='text-align: justify;'> {metodologia_texto_corrigido}</p>", unsafe_allow_html=True)
-                st.markdown(f"<p style='text-align: justify;'><strong>🔗 Access:</strong> {acesso}</p>", unsafe_allow_html=True)
-                st.markdown(f"<p style='text-align: justify;'><strong>📚 Reference:</strong> {referencia}</p>", unsafe_allow_html=True)
-            else:
-                st.markdown(f"⏳ Methodology for the **{indice_escolhido}** index under development.")
-                
     if __name__ == "__main__":
-        plot_indices()
\ No newline at end of file
+        with span("correlations"):
+            plot_correlations()
+
+with tab4:
+    # Fragmento: a seleção de índices reexecuta só esta aba
+    @fragmento
+    def plot_comparison():
+        st.markdown("<h2 style='font-size:24px; color:black;'>📊 Compare indices</h2>", unsafe_allow_html=True)
+        opcoes = [label for label in display_order_tab + display_order_tab_mjo if label in store or alias.get(label) in store]
+        escolhidos = st.multiselect(
+            "Select indices:", opcoes, default=[label for label in ["NINO34", "SOI"] if label in opcoes],
+            key="comparison_indices"
+        )
+        padronizar = st.checkbox(
+            "Standardize (z-score)", value=False, key="comparison_standardize",
+            help="Subtract the mean and divide by the standard deviation of each index, so indices with different units share one scale."
+        )
+
+        if escolhidos:
+            file_hashes = tuple(store.hashes.get(store.resolve(label, alias)) for label in escolhidos)
+            fig = get_comparison_figure(file_hashes, tuple(escolhidos), padronizar)
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.markdown("Select one or more indices to compare.")
+
+    if __name__ == "__main__":
+        with span("compare"):
+            plot_comparison()
+
+# ======================
+# PAINEL DE DEPURAÇÃO
+# ======================
+# Etapas deste rerun, caches e reruns da sessão (APP_INDEX_DEBUG=1 ou ?debug=1 na URL)
+spans_rerun = end_rerun()
+if __name__ == "__main__" and debug_enabled(st.query_params):
+    with st.sidebar.expander("🐞 Debug", expanded=False):
+        st.markdown(f"**Reruns in this session:** {session_reruns}")
+        st.markdown("**Stages (this rerun)**")
+        st.dataframe(
+            pd.DataFrame(spans_rerun, columns=["stage", "seconds"]).round(4),
+            hide_index=True, use_container_width=True
+        )
+        st.markdown("**Caches (process)**")
+        st.dataframe(
+            pd.DataFrame(
+                [(name, calls - misses, misses) for name, (calls, misses) in sorted(REGISTRY.cache_stats().items())],
+                columns=["cache", "hits", "misses"]
+            ),
+            hide_index=True, use_container_width=True
+        )
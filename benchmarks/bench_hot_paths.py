@@ -0,0 +1,216 @@
+# Benchmark dos caminhos críticos do app (carga, resumo da Home, figuras e downloads)
+#
+# Mede tempo de parede (perf_counter) e pico de memória Python (tracemalloc) sobre pastas
+# sintéticas 1×, 10× e 100× a pasta dataset/, e grava cada execução em um histórico JSON.
+# Comparando com a execução anterior (mesmo caso e escala), aponta regressões:
+#
+#     python benchmarks/bench_hot_paths.py --scales 1 10 100
+#     python benchmarks/bench_hot_paths.py --cases figure export --fail-on-regression
+import argparse
+from datetime import datetime, timezone
+import json
+from pathlib import Path
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from exports import encode_frame  # noqa: E402
+from figures import DAILY_PERIODS, MONTHLY_PERIODS, daily_figure, monthly_figure, phase_space_figure  # noqa: E402
+from index_store import build_cache, build_index_store, open_index_store  # noqa: E402
+from synthetic import base_path, make_synthetic_dataset, synthetic_dir  # noqa: E402
+
+HISTORY_FILE = Path(__file__).resolve().parent / "history.json"
+# Mediana acima de (anterior × REGRESSION_RATIO) é apontada como regressão
+REGRESSION_RATIO = 1.25
+MONTHLY_INDEX = "AMO"
+
+
+def _load_all(store):
+    for var in store.names:
+        store.series(var)
+    return store
+
+
+# ======================
+# CASOS
+# ======================
+# Cada caso é setup(dir_dataset, dir_cache) -> estado, e run(estado) -> resultado (a parte medida).
+
+def _fresh_cache(dir_dataset, dir_cache):
+    shutil.rmtree(dir_cache, ignore_errors=True)
+    return dir_dataset, dir_cache
+
+
+def _warm_cache(dir_dataset, dir_cache):
+    build_cache(dir_dataset, dir_cache)
+    return dir_dataset, dir_cache
+
+
+def _warm_store(dir_dataset, dir_cache):
+    return open_index_store(*_warm_cache(dir_dataset, dir_cache))
+
+
+def _loaded_store(dir_dataset, dir_cache):
+    return _load_all(_warm_store(dir_dataset, dir_cache))
+
+
+def _summary(store):
+    summary = store.latest_summary()
+    return store.lookup(summary["values"], store.names), store.lookup(summary["daily_values"], store.names)
+
+
+def _monthly_figure(store):
+    fig = monthly_figure(store.series(MONTHLY_INDEX), MONTHLY_INDEX, MONTHLY_INDEX, MONTHLY_PERIODS["All"])
+    return fig.to_json()
+
+
+def _mjo_figures(store):
+    df_mjo = store.mjo_frame()
+    figs = [
+        daily_figure(df_mjo[column], column, column, column, "red", "%{y}", DAILY_PERIODS["All"], categorical=column == "phase")
+        for column in ("amplitude", "phase")
+    ]
+    return [fig.to_json() for fig in figs]
+
+
+def _mjo_window_figures(store):
+    df_mjo = store.mjo_window()
+    figs = [
+        daily_figure(df_mjo[column], column, column, column, "red", "%{y}", categorical=column == "phase")
+        for column in ("amplitude", "phase")
+    ]
+    figs.append(phase_space_figure(df_mjo, "MJO"))
+    return [fig.to_json() for fig in figs]
+
+
+def _export(ext):
+    def run(store):
+        return [encode_frame(store.frame(var), ext) for var in store.names]
+    return run
+
+
+CASES = {
+    # Equivalente ao antigo load_datasets(): parse de todos os TSVs
+    "load.tsv": (lambda d, c: d, lambda d: _load_all(build_index_store(d))),
+    # Cache colunar: construção do zero e abertura (mmap) com todas as séries carregadas
+    "load.cache_build": (_fresh_cache, lambda args: build_cache(*args)),
+    "load.cache_open": (_warm_cache, lambda args: _load_all(open_index_store(*args))),
+    # Resumo da aba Home (introducao) em um store recém-aberto
+    "summary.latest": (_warm_store, _summary),
+    # Figuras do plot_indices (construção + serialização para o navegador)
+    "figure.monthly": (_loaded_store, _monthly_figure),
+    "figure.mjo": (_warm_store, _mjo_figures),
+    # Visão padrão da aba MJO: últimos 90 dias (fatia do store) e diagrama de fase
+    "figure.mjo_window": (_warm_store, _mjo_window_figures),
+    # Codificação dos downloads de todos os índices
+    "export.csv": (_loaded_store, _export("csv")),
+    "export.txt": (_loaded_store, _export("txt")),
+}
+
+
+def measure(setup, run, repeat):
+    """Mediana e mínimo do tempo de `run` e o pico de memória em uma execução à parte.
+
+    O tracemalloc deixa cada alocação bem mais lenta, então o tempo é medido sem ele.
+    """
+    times = []
+    for _ in range(repeat):
+        state = setup()
+        inicio = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - inicio)
+
+    state = setup()
+    tracemalloc.start()
+    run(state)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "median_s": statistics.median(times),
+        "min_s": min(times),
+        "peak_mb": peak / 2 ** 20,
+        "repeat": repeat,
+    }
+
+
+def run_benchmarks(scales, cases, repeat, work_dir):
+    results = {}
+    for scale in scales:
+        dir_dataset = make_synthetic_dataset(base_path / "dataset", synthetic_dir(scale), scale)
+        dir_cache = Path(work_dir) / f"cache-x{scale}"
+        for name in cases:
+            setup, run = CASES[name]
+            results[f"{name}@x{scale}"] = result = measure(
+                lambda: setup(dir_dataset, dir_cache), run, repeat
+            )
+            print(f"{name:<18} x{scale:<4} {result['median_s'] * 1000:>10.1f} ms  {result['peak_mb']:>8.1f} MB")
+    return results
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=base_path, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def load_history(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def regressions(history, results, ratio=REGRESSION_RATIO):
+    """Casos cuja mediana piorou mais que `ratio` em relação à última execução que os mediu."""
+    found = []
+    for key, result in results.items():
+        previous = next((run["results"][key] for run in reversed(history) if key in run["results"]), None)
+        if previous and result["median_s"] > previous["median_s"] * ratio:
+            found.append((key, previous["median_s"], result["median_s"]))
+    return found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dos caminhos críticos do app.")
+    parser.add_argument("--scales", nargs="+", type=int, default=[1, 10, 100])
+    parser.add_argument("--cases", nargs="+", default=list(CASES),
+                        help="Nomes (ou prefixos, ex.: load figure) dos casos a medir.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--history", type=Path, default=HISTORY_FILE)
+    parser.add_argument("--threshold", type=float, default=REGRESSION_RATIO)
+    parser.add_argument("--no-save", action="store_true", help="Não grava a execução no histórico.")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    cases = [name for name in CASES if any(name == c or name.startswith(c + ".") for c in args.cases)]
+    with tempfile.TemporaryDirectory(prefix="app-index-bench-") as work_dir:
+        results = run_benchmarks(args.scales, cases, args.repeat, work_dir)
+
+    history = load_history(args.history)
+    found = regressions(history, results, args.threshold)
+    for key, before, after in found:
+        print(f"⚠️ Regressão em {key}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms")
+
+    if not args.no_save:
+        history.append({
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        })
+        with open(args.history, "w", encoding="utf-8") as f:
+            json.dump(history, f, indent=1)
+        print(f"📝 Histórico atualizado: {args.history}")
+
+    sys.exit(1 if found and args.fail_on_regression else 0)
@@ -0,0 +1,159 @@
+# Partida a frio do app: tempo de importação das dependências e tempo até a primeira pintura
+#
+# Cada repetição roda em um processo novo, sobre uma cópia do projeto sem a pasta .cache
+# (como um container recém-criado pelo autoscaling):
+#   - importações: `python -X importtime` de cada dependência pesada, com o streamlit já
+#     importado (como no servidor);
+#   - primeira pintura: o app roda uma vez no AppTest e os tempos vêm das métricas
+#     (app_first_paint_seconds e app_stage_seconds: home, import.*, store.open, ...),
+#     com e sem o resumo pré-montado da Home (home_summary.json).
+# Os resultados entram no mesmo histórico do bench_hot_paths.py (casos startup.*):
+#
+#     python benchmarks/bench_startup.py --repeat 5
+import argparse
+from datetime import datetime, timezone
+import json
+from pathlib import Path
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_hot_paths import HISTORY_FILE, REGRESSION_RATIO, _git_commit, load_history, regressions  # noqa: E402
+from home_summary import SUMMARY_FILE  # noqa: E402
+from synthetic import base_path  # noqa: E402
+
+# Dependências medidas, na ordem em que o app as importa
+IMPORTS = ["pandas", "pyarrow.feather", "plotly.graph_objects", "openpyxl", "xarray"]
+# Etapas do primeiro rerun reportadas (app_stage_seconds). import.pandas e import.figures
+# ficam de fora: o AppTest já importa pandas e o streamlit já importa o Plotly, então no
+# processo filho elas custam zero; o custo real está em startup.import.*
+STAGES = ["home", "home.prebuilt", "import.modules", "store.open", "home.html", "indices"]
+# Cópia do projeto: sem git, caches e benchmarks
+IGNORE = shutil.ignore_patterns(".git", ".cache", "__pycache__", "benchmarks", "*.pyc")
+
+
+def import_times():
+    """Tempo cumulativo (s) de cada dependência em IMPORTS, importada depois do streamlit."""
+    code = "import streamlit\n" + "\n".join(f"import {name}" for name in IMPORTS)
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True)
+    times = {}
+    for line in out.stderr.splitlines():
+        # "import time:  self [us] | cumulative | nome" (nome sem recuo = import de topo)
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].startswith(" ") and not parts[2].startswith("  "):
+            name = parts[2].strip()
+            if name in IMPORTS:
+                times[name] = int(parts[1]) / 1e6
+    # Sem linha própria: o módulo já veio com o streamlit (ex.: plotly.graph_objects)
+    return {name: times.get(name, 0.0) for name in IMPORTS}
+
+
+def run_app(project_dir):
+    """Processo filho: roda o app uma vez no AppTest e imprime os tempos em JSON."""
+    sys.path.insert(0, str(project_dir))
+    from streamlit.testing.v1 import AppTest
+    from metrics import REGISTRY
+
+    inicio = time.perf_counter()
+    at = AppTest.from_file(str(Path(project_dir) / "app_index.py"), default_timeout=300).run()
+    script = time.perf_counter() - inicio
+    if at.exception:
+        raise SystemExit(f"O app falhou: {at.exception}")
+
+    stages = {}
+    first_paint = None
+    for (name, labels), hist in REGISTRY.histograms.items():
+        if name == "app_stage_seconds":
+            stages[dict(labels)["stage"]] = hist["sum"]
+        elif name == "app_first_paint_seconds":
+            first_paint = hist["sum"]
+    print(json.dumps({
+        "script": script,
+        "first_paint": first_paint,
+        "stages": stages,
+        "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def cold_start(prebuilt, work_dir):
+    """Cópia nova do projeto (sem .cache) e um processo novo rodando o app."""
+    project_dir = Path(work_dir) / "project"
+    shutil.rmtree(project_dir, ignore_errors=True)
+    shutil.copytree(base_path, project_dir, ignore=IGNORE)
+    if not prebuilt:
+        (project_dir / SUMMARY_FILE).unlink(missing_ok=True)
+    out = subprocess.run(
+        [sys.executable, __file__, "--run-app", str(project_dir)], capture_output=True, text=True, cwd=project_dir
+    )
+    if out.returncode != 0:
+        raise SystemExit(out.stderr or out.stdout)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples, peak_mb=0.0):
+    return {"median_s": statistics.median(samples), "min_s": min(samples), "peak_mb": peak_mb, "repeat": len(samples)}
+
+
+def run_benchmarks(repeat, work_dir):
+    results = {}
+    imports = [import_times() for _ in range(repeat)]
+    for name in IMPORTS:
+        results[f"startup.import.{name}"] = summarize([run[name] for run in imports])
+
+    for mode, prebuilt in (("prebuilt", True), ("no_prebuilt", False)):
+        runs = [cold_start(prebuilt, work_dir) for _ in range(repeat)]
+        peak = max(run["peak_mb"] for run in runs)
+        results[f"startup.first_paint@{mode}"] = summarize([run["first_paint"] for run in runs], peak)
+        results[f"startup.script@{mode}"] = summarize([run["script"] for run in runs], peak)
+        for stage in STAGES:
+            samples = [run["stages"][stage] for run in runs if stage in run["stages"]]
+            if samples:
+                results[f"startup.stage.{stage}@{mode}"] = summarize(samples)
+
+    for key, result in results.items():
+        print(f"{key:<40} {result['median_s'] * 1000:>10.1f} ms")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Partida a frio do app (importações e primeira pintura).")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--history", type=Path, default=HISTORY_FILE)
+    parser.add_argument("--threshold", type=float, default=REGRESSION_RATIO)
+    parser.add_argument("--no-save", action="store_true", help="Não grava a execução no histórico.")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--run-app", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_app:
+        run_app(args.run_app)
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory(prefix="app-index-startup-") as work_dir:
+        results = run_benchmarks(args.repeat, work_dir)
+
+    history = load_history(args.history)
+    found = regressions(history, results, args.threshold)
+    for key, before, after in found:
+        print(f"⚠️ Regressão em {key}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms")
+
+    if not args.no_save:
+        history.append({
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        })
+        with open(args.history, "w", encoding="utf-8") as f:
+            json.dump(history, f, indent=1)
+        print(f"📝 Histórico atualizado: {args.history}")
+
+    sys.exit(1 if found and args.fail_on_regression else 0)
@@ -0,0 +1,319 @@
+# Teste de carga do app: N sessões simultâneas contra um servidor `streamlit run` local
+#
+# Cada sessão fala o protocolo do navegador pelo websocket do Streamlit (/_stcore/stream,
+# mensagens protobuf BackMsg/ForwardMsg, cliente websocket do tornado) e segue um roteiro
+# realista: abre a Home, troca de índice no seletor da barra lateral (incluindo a MJO),
+# muda o formato do arquivo e clica nos botões de download (GET do arquivo + o rerun do
+# clique). O AppTest não serve aqui: várias instâncias em threads disputam o mesmo runtime.
+#
+# Reporta latência dos reruns (p50/p95/p99), throughput (reruns/s) e memória por sessão
+# (RSS do servidor, Linux), sobre a pasta dataset/ ou as pastas sintéticas 10×, 100×...
+# Tudo local, sem rede externa:
+#
+#     python benchmarks/load_test.py --sessions 1 5 10 20
+#     python benchmarks/load_test.py --scale 10 --sessions 10 --switches 6
+import argparse
+import asyncio
+from datetime import datetime, timezone
+import json
+from pathlib import Path
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ClientState_pb2 import ClientState
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState, WidgetStates
+from tornado.httpclient import AsyncHTTPClient
+from tornado.websocket import websocket_connect
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_hot_paths import HISTORY_FILE, REGRESSION_RATIO, _git_commit, load_history, regressions  # noqa: E402
+from synthetic import base_path, make_synthetic_dataset, synthetic_dir  # noqa: E402
+
+# Índices percorridos pelas sessões (rótulos do seletor da barra lateral)
+INDICES = ["NINO34", "MJO", "AMO", "SOI", "DMI/IOD", "PDO", "AAO", "MJO"]
+FORMATS = ["CSV (.csv)", "Text (.txt)", "JSON (.json)", "Parquet (.parquet)"]
+SIDEBAR_LABEL = "Select index:"
+FORMAT_LABEL = "Choose file format:"
+# Cópia do projeto para o servidor: sem git, caches, benchmarks e dados (ligados à parte)
+IGNORE = shutil.ignore_patterns(".git", ".cache", "__pycache__", "benchmarks", "dataset", "*.pyc")
+
+
+# ======================
+# SERVIDOR
+# ======================
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid):
+    """Memória residente do processo (VmRSS em /proc; None fora do Linux)."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def start_server(project_dir, port, timeout=120):
+    """Sobe `streamlit run app_index.py` em `project_dir` e espera o /_stcore/health."""
+    cmd = [
+        sys.executable, "-m", "streamlit", "run", "app_index.py",
+        "--server.headless", "true", "--server.port", str(port), "--server.address", "127.0.0.1",
+        "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false",
+    ]
+    proc = subprocess.Popen(cmd, cwd=project_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=2) as r:
+                if r.read() == b"ok":
+                    return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise SystemExit("O servidor do Streamlit não respondeu ao /_stcore/health.")
+
+
+def project_copy(work_dir, dir_dataset):
+    """Cópia do projeto apontando para a pasta de dados escolhida (cache vazio, como num container novo)."""
+    project_dir = Path(work_dir) / "project"
+    shutil.copytree(base_path, project_dir, ignore=IGNORE)
+    (project_dir / "dataset").symlink_to(Path(dir_dataset).resolve(), target_is_directory=True)
+    return project_dir
+
+
+# ======================
+# SESSÃO (protocolo do navegador)
+# ======================
+class Session:
+    """Uma aba do navegador: websocket, estado dos widgets e elementos da última execução."""
+
+    def __init__(self, port):
+        self.port = port
+        self.conn = None
+        self.widgets = {}
+        self.elements = {}
+        self.latencies = []
+        self.downloads = []
+
+    async def connect(self):
+        self.conn = await websocket_connect(f"ws://127.0.0.1:{self.port}/_stcore/stream")
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+
+    async def rerun(self, fragment_id="", trigger=None):
+        """Envia um rerun (como o navegador) e espera o script_finished. Retorna a latência (s)."""
+        widgets = list(self.widgets.values())
+        if trigger is not None:
+            widgets.append(WidgetState(id=trigger, trigger_value=True))
+        msg = BackMsg(rerun_script=ClientState(
+            query_string="", page_script_hash="", fragment_id=fragment_id,
+            widget_states=WidgetStates(widgets=widgets)
+        ))
+        inicio = time.perf_counter()
+        await self.conn.write_message(msg.SerializeToString(), binary=True)
+        while True:
+            data = await self.conn.read_message()
+            if data is None:
+                raise ConnectionError("websocket fechado pelo servidor")
+            fwd = ForwardMsg()
+            fwd.ParseFromString(data)
+            kind = fwd.WhichOneof("type")
+            if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                self._record(fwd.delta)
+            elif kind == "script_finished":
+                if fwd.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    continue
+                if fwd.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise RuntimeError("erro de compilação no app")
+                break
+        elapsed = time.perf_counter() - inicio
+        self.latencies.append(elapsed)
+        return elapsed
+
+    def _record(self, delta):
+        element = delta.new_element
+        kind = element.WhichOneof("type")
+        if kind in ("selectbox", "download_button"):
+            widget = getattr(element, kind)
+            self.elements.setdefault(kind, {})[widget.label] = (widget, delta.fragment_id)
+
+    def element(self, kind, label):
+        return self.elements.get(kind, {}).get(label, (None, ""))
+
+    async def select(self, label, value):
+        widget, fragment_id = self.element("selectbox", label)
+        if widget is None or value not in widget.options:
+            return None
+        self.widgets[widget.id] = WidgetState(id=widget.id, string_value=value)
+        self.elements.pop("download_button", None)
+        return await self.rerun(fragment_id)
+
+    async def download_all(self, client):
+        """Baixa cada arquivo oferecido e clica no primeiro botão (rerun do clique)."""
+        buttons = list(self.elements.get("download_button", {}).values())
+        for widget, _ in buttons:
+            inicio = time.perf_counter()
+            response = await client.fetch(f"http://127.0.0.1:{self.port}{widget.url}", raise_error=False)
+            self.downloads.append((time.perf_counter() - inicio, response.code, len(response.body or b"")))
+        if buttons:
+            widget, fragment_id = buttons[0]
+            await self.rerun(fragment_id, trigger=widget.id)
+
+
+async def run_session(port, rng, switches, think, client):
+    """Roteiro de uma sessão: Home, troca de índices (com MJO), formato e downloads."""
+    session = Session(port)
+    await session.connect()
+    try:
+        await session.rerun()
+        roteiro = rng.sample(INDICES, k=min(switches, len(INDICES)))
+        if "MJO" not in roteiro:
+            roteiro[-1] = "MJO"
+        for label in roteiro:
+            await asyncio.sleep(think * rng.random())
+            await session.select(SIDEBAR_LABEL, label)
+            await session.select(FORMAT_LABEL, rng.choice(FORMATS))
+            await session.download_all(client)
+    finally:
+        session.close()
+    return session
+
+
+async def run_sessions(port, n, switches, think, seed):
+    client = AsyncHTTPClient(max_clients=max(n, 10))
+    rngs = [random.Random(seed + i) for i in range(n)]
+    return await asyncio.gather(
+        *(run_session(port, rng, switches, think, client) for rng in rngs), return_exceptions=True
+    )
+
+
+# ======================
+# MEDIÇÃO
+# ======================
+def measure(proc, port, n, switches, think, seed):
+    """Roda `n` sessões simultâneas e resume latências, throughput e memória."""
+    samples = []
+    done = False
+
+    async def sample_memory():
+        while not done:
+            samples.append(rss_mb(proc.pid) or 0.0)
+            await asyncio.sleep(0.2)
+
+    async def main():
+        nonlocal done
+        sampler = asyncio.ensure_future(sample_memory())
+        try:
+            return await run_sessions(port, n, switches, think, seed)
+        finally:
+            done = True
+            await sampler
+
+    rss_before = rss_mb(proc.pid) or 0.0
+    inicio = time.perf_counter()
+    sessions = asyncio.run(main())
+    wall = time.perf_counter() - inicio
+
+    errors = [s for s in sessions if isinstance(s, BaseException)]
+    ok = [s for s in sessions if not isinstance(s, BaseException)]
+    latencies = np.array([lat for s in ok for lat in s.latencies])
+    downloads = [d for s in ok for d in s.downloads]
+    peak = max(samples + [rss_mb(proc.pid) or 0.0])
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if latencies.size else (np.nan,) * 3
+    return {
+        "sessions": n,
+        "errors": len(errors),
+        "error_types": sorted({type(e).__name__ for e in errors}),
+        "reruns": int(latencies.size),
+        "median_s": float(p50),
+        "p95_s": float(p95),
+        "p99_s": float(p99),
+        "max_s": float(latencies.max()) if latencies.size else float("nan"),
+        "throughput_rps": latencies.size / wall,
+        "wall_s": wall,
+        "downloads": len(downloads),
+        "download_errors": sum(1 for _, code, _ in downloads if code != 200),
+        "download_mb": sum(size for _, _, size in downloads) / 2 ** 20,
+        "rss_before_mb": rss_before,
+        "peak_mb": peak,
+        "per_session_mb": max(peak - rss_before, 0.0) / n,
+    }
+
+
+def run_load_test(scale, session_counts, switches, think, seed, work_dir):
+    dir_dataset = base_path / "dataset" if scale == 1 else make_synthetic_dataset(base_path / "dataset", synthetic_dir(scale), scale)
+    project_dir = project_copy(work_dir, dir_dataset)
+    port = _free_port()
+    proc = start_server(project_dir, port)
+    results = {}
+    try:
+        # Uma sessão de aquecimento: caches do processo preenchidos, como num servidor em uso
+        measure(proc, port, 1, 1, 0.0, seed)
+        print(f"{'x' + str(scale):<5} {'sessões':>7} {'reruns':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+              f"{'rerun/s':>8} {'MB/sessão':>10} {'erros':>6}")
+        for n in session_counts:
+            result = measure(proc, port, n, switches, think, seed)
+            results[f"loadtest.rerun@x{scale}.n{n}"] = result
+            print(f"{'':<5} {n:>7} {result['reruns']:>7} {result['median_s'] * 1000:>8.0f} {result['p95_s'] * 1000:>8.0f} "
+                  f"{result['p99_s'] * 1000:>8.0f} {result['throughput_rps']:>8.1f} {result['per_session_mb']:>10.1f} "
+                  f"{result['errors'] + result['download_errors']:>6}")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Teste de carga do app com sessões simultâneas.")
+    parser.add_argument("--sessions", nargs="+", type=int, default=[1, 5, 10, 20])
+    parser.add_argument("--scale", type=int, default=1, help="1 = dataset/; N = pasta sintética N× maior.")
+    parser.add_argument("--switches", type=int, default=4, help="Trocas de índice por sessão (a MJO sempre entra).")
+    parser.add_argument("--think", type=float, default=0.5, help="Pausa máxima (s) entre as ações de uma sessão.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--history", type=Path, default=HISTORY_FILE)
+    parser.add_argument("--threshold", type=float, default=REGRESSION_RATIO)
+    parser.add_argument("--no-save", action="store_true", help="Não grava a execução no histórico.")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="app-index-load-") as work_dir:
+        results = run_load_test(args.scale, args.sessions, args.switches, args.think, args.seed, work_dir)
+
+    history = load_history(args.history)
+    found = regressions(history, results, args.threshold)
+    for key, before, after in found:
+        print(f"⚠️ Regressão em {key}: p50 {before * 1000:.1f} ms -> {after * 1000:.1f} ms")
+
+    if not args.no_save:
+        history.append({
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        })
+        with open(args.history, "w", encoding="utf-8") as f:
+            json.dump(history, f, indent=1)
+        print(f"📝 Histórico atualizado: {args.history}")
+
+    failed = any(result["errors"] or result["download_errors"] for result in results.values())
+    sys.exit(1 if failed or (found and args.fail_on_regression) else 0)
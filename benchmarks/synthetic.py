@@ -0,0 +1,82 @@
+# Pastas de dados sintéticas, N vezes maiores que a pasta dataset/ (benchmarks e testes de carga)
+#
+# O intervalo de datas do pandas (datetime64[ns], anos 1677-2262) não comporta séries
+# mensais 100× mais longas, então a escala vem do número de arquivos: a cópia 0 mantém os
+# nomes originais (AMO, MJO, ...) e as demais recebem um sufixo e ruído nos valores, para
+# que o conteúdo (e o sha256) de cada arquivo seja diferente.
+from pathlib import Path
+import shutil
+import sys
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from index_store import parse_index_file  # noqa: E402
+
+base_path = Path(__file__).resolve().parent.parent
+
+
+def make_synthetic_dataset(dir_source, dir_target, scale, seed=0):
+    """Escreve em `dir_target` `scale` cópias de cada arquivo *.txt de `dir_source`.
+
+    Reaproveita a pasta se ela já tiver o número esperado de arquivos (o conteúdo é
+    determinístico para a mesma semente). Retorna o caminho da pasta.
+    """
+    dir_target = Path(dir_target)
+    sources = sorted(Path(dir_source).glob("*.txt"))
+    if dir_target.is_dir() and len(list(dir_target.glob("*.txt"))) == len(sources) * scale:
+        return dir_target
+
+    shutil.rmtree(dir_target, ignore_errors=True)
+    dir_target.mkdir(parents=True)
+    rng = np.random.default_rng(seed)
+    for path in sources:
+        shutil.copy2(path, dir_target / path.name)
+        var, serie = parse_index_file(path)
+        for copy in range(1, scale):
+            noisy = serie + rng.normal(0.0, 0.01, len(serie))
+            name = f"{var} r{copy:03d}"
+            noisy.rename(name).to_csv(
+                dir_target / f"{path.stem}_r{copy:03d}.txt", sep="\t", header=[name], float_format="%.6g"
+            )
+    return dir_target
+
+
+def synthetic_dir(scale):
+    """Pasta padrão (ignorada pelo git) para a escala pedida."""
+    return base_path / ".cache" / "synthetic" / f"x{scale}"
+
+
+def make_synthetic_grid(path, variable="sst", start="1985-01", months=480, anomaly=None, resolution=2.0, seed=0,
+                        pattern=None):
+    """NetCDF global com climatologia sazonal + `anomaly` (série mensal) × `pattern` (padrão espacial).
+
+    Sem `anomaly` é usado um sinal senoidal conhecido; `pattern(lat, lon)` recebe as grades
+    (lon em 0..360) e retorna o peso de cada ponto (padrão: 1 em todos). Os pontos de
+    continente não entram (uma faixa sem dado, como na TSM). Retorna a série injetada, que é
+    o valor esperado de um índice de área onde o peso é 1 (o ruído é pequeno e sem média).
+    """
+    import pandas as pd
+    import xarray as xr
+
+    times = pd.date_range(start, periods=months, freq="MS")
+    lat = np.arange(-89.0, 90.0, resolution)
+    lon = np.arange(0.0, 360.0, resolution)
+    if anomaly is None:
+        anomaly = np.sin(np.arange(months) * 2 * np.pi / 43.0)
+    anomaly = pd.Series(np.asarray(anomaly, dtype="float64"), index=times)
+    # Anomalia com média zero no período base, para que a climatologia não a absorva
+    base = (times.year >= 1991) & (times.year <= 2020)
+    anomaly -= anomaly[base].groupby(times[base].month).mean().reindex(times.month).to_numpy()
+
+    rng = np.random.default_rng(seed)
+    seasonal = 25.0 - 0.2 * np.abs(lat)[None, :, None] + 2.0 * np.cos(2 * np.pi * (times.month.to_numpy() - 3) / 12)[:, None, None]
+    weights = np.ones((lat.size, lon.size)) if pattern is None else pattern(*np.meshgrid(lat, lon, indexing="ij"))
+    field = seasonal + anomaly.to_numpy()[:, None, None] * weights[None] + rng.normal(0.0, 1e-3, (months, lat.size, lon.size))
+    field[:, :, (lon > 290) & (lon < 300)] = np.nan  # "continente"
+    scale = {"sst": 1.0, "msl": 100.0}[variable]  # msl em Pa, como no ERA5
+    ds = xr.Dataset({variable: (("time", "lat", "lon"), (field * scale).astype("float32"))},
+                    coords={"time": times, "lat": lat, "lon": lon})
+    ds.to_netcdf(path)
+    return anomaly
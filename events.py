@@ -0,0 +1,134 @@
+# Detecção de eventos (El Niño/La Niña, IOD, MJO ativa, fases dos demais índices)
+import numpy as np
+import pandas as pd
+from aggregation import continuous_monthly, rolling_stats
+from index_store import MJO_AMPLITUDE, MJO_PHASE
+
+# Critério de cada índice: limiar mantido por `min_length` períodos consecutivos.
+#   smooth: média móvel centrada aplicada antes do limiar (meses)
+#   standardize: limiar em desvios padrão da série
+#   names: (evento acima de +threshold, evento abaixo de -threshold); None = sem evento
+EVENT_RULES = {
+    "ONI": {"threshold": 0.5, "min_length": 5, "names": ("El Niño", "La Niña")},
+    "NIN34": {"threshold": 0.5, "min_length": 5, "smooth": 3, "names": ("El Niño", "La Niña")},
+    "DMI/IOD": {"threshold": 0.4, "min_length": 3, "names": ("Positive IOD", "Negative IOD")},
+    MJO_AMPLITUDE: {"threshold": 1.0, "min_length": 5, "names": ("Active MJO", None)},
+}
+# Demais índices mensais: anomalia padronizada além de ±1 desvio padrão por 3 meses
+DEFAULT_RULE = {"threshold": 1.0, "min_length": 3, "standardize": True, "names": ("Positive phase", "Negative phase")}
+
+EVENT_COLUMNS = ["name", "event", "start", "end", "length", "peak", "peak_date", "mean"]
+
+
+def rule_for(var):
+    if var == MJO_PHASE:
+        return None
+    return EVENT_RULES.get(var, DEFAULT_RULE)
+
+
+def describe_rule(var):
+    """Texto curto do critério (ajuda dos controles da interface)."""
+    rule = rule_for(var)
+    if rule is None:
+        return ""
+    unit = "months" if var != MJO_AMPLITUDE else "days"
+    limite = f"{rule['threshold']:g} standard deviation" if rule.get("standardize") else f"{rule['threshold']:g}"
+    media = f" ({rule['smooth']}-month running mean)" if rule.get("smooth") else ""
+    partes = [f"{name}: {'≥ +' if sign > 0 else '≤ -'}{limite}{media} for at least {rule['min_length']} consecutive {unit}"
+              for name, sign in zip(rule["names"], (1, -1)) if name]
+    return "; ".join(partes) + "."
+
+
+def runs(mask, min_length=1):
+    """Sequências de True com tamanho >= min_length: (início, fim exclusivo), via diferenças da máscara."""
+    edges = np.diff(np.concatenate([[0], mask.astype("int8"), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    keep = ends - starts >= min_length
+    return starts[keep], ends[keep]
+
+
+def detect_events(serie, threshold, min_length, sign=1, name="event", report=None):
+    """Tabela de eventos (início, fim, duração, pico e média) em que sign*valor >= threshold.
+
+    `report` (opcional, mesmo índice) é a série usada para o pico e a média, quando a
+    detecção é feita sobre a série padronizada. Tudo vetorizado: as sequências vêm da
+    máscara e o pico/média de cada evento de reduções por segmento (reduceat/bincount).
+    """
+    signed = sign * serie.to_numpy(dtype="float64")
+    values = serie.to_numpy(dtype="float64") if report is None else report.to_numpy(dtype="float64")
+    with np.errstate(invalid="ignore"):
+        starts, ends = runs(signed >= threshold, min_length)
+
+    lengths = ends - starts
+    offsets = np.cumsum(lengths) - lengths
+    run_id = np.repeat(np.arange(starts.size), lengths)
+    positions = np.arange(lengths.sum()) + np.repeat(starts - offsets, lengths)
+    peak = np.maximum.reduceat(signed[positions], offsets) if starts.size else np.empty(0)
+    # Primeira posição de cada evento em que o pico é atingido
+    is_peak = signed[positions] == np.repeat(peak, lengths)
+    _, first = np.unique(run_id[is_peak], return_index=True)
+    peak_pos = positions[is_peak][first]
+
+    index = serie.index
+    return pd.DataFrame({
+        "event": np.full(starts.size, name, dtype=object),
+        "start": index[starts],
+        "end": index[ends - 1],
+        "length": lengths,
+        "peak": values[peak_pos],
+        "peak_date": index[peak_pos],
+        "mean": np.bincount(run_id, weights=values[positions], minlength=starts.size) / np.maximum(lengths, 1),
+    })
+
+
+def _event_series(store, var, rule):
+    """Séries de detecção e de valores reportados (meses/dias consecutivos, suavizada ou padronizada)."""
+    if var == MJO_AMPLITUDE:
+        serie = store.series(var)
+        serie = serie[~serie.index.duplicated(keep="last")]
+        serie = serie.reindex(pd.date_range(serie.index[0], serie.index[-1], freq="D", name="time"))
+        return serie, serie
+    serie = continuous_monthly(store, var)
+    if serie is None or serie.empty:
+        return None, None
+    if rule.get("smooth"):
+        mean, _, _ = rolling_stats(serie.to_numpy(dtype="float64"), rule["smooth"])
+        serie = pd.Series(mean, index=serie.index)
+    if rule.get("standardize"):
+        return (serie - serie.mean()) / serie.std(), serie
+    return serie, serie
+
+
+def index_events(store, var):
+    """Eventos de um índice (positivos e negativos em ordem cronológica)."""
+    rule = rule_for(var)
+    if rule is None or var not in store:
+        return None
+    serie, report = _event_series(store, var, rule)
+    if serie is None:
+        return None
+
+    tables = [
+        detect_events(serie, rule["threshold"], rule["min_length"], sign, name, report)
+        for name, sign in zip(rule["names"], (1, -1)) if name
+    ]
+    events = pd.concat(tables, ignore_index=True).sort_values("start", kind="stable", ignore_index=True)
+    events.insert(0, "name", var)
+    return events
+
+
+def event_catalog(store):
+    """Eventos de todos os índices, calculados uma vez por versão dos dados."""
+    def compute():
+        tables = {var: index_events(store, var) for var in store.names}
+        return {var: events for var, events in tables.items() if events is not None}
+    return store.memo("event_catalog", compute)
+
+
+def catalog_frame(store):
+    """Catálogo completo em uma única tabela (download)."""
+    tables = list(event_catalog(store).values())
+    if not tables:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+    return pd.concat(tables, ignore_index=True)
@@ -0,0 +1,61 @@
+# Codificação dos dados para download (CSV, TXT, Parquet, JSON, NetCDF e pacote ZIP)
+from functools import lru_cache
+from importlib.util import find_spec
+from io import BytesIO
+import zipfile
+
+# Rótulo exibido -> (extensão, mime type)
+FORMATS = {
+    "CSV (.csv)": ("csv", "text/csv"),
+    "Text (.txt)": ("txt", "text/plain"),
+    "Parquet (.parquet)": ("parquet", "application/vnd.apache.parquet"),
+    "JSON (.json)": ("json", "application/json"),
+    "NetCDF (.nc)": ("nc", "application/x-netcdf"),
+}
+
+
+@lru_cache(maxsize=1)
+def netcdf_available():
+    """NetCDF depende do xarray (e do scipy para gerar o arquivo em memória), listados no requirements.txt.
+
+    Só procura os pacotes (sem importá-los): o xarray é importado no primeiro download em NetCDF.
+    Sem eles (instalação parcial), o formato some da interface e da API em vez de falhar no download.
+    """
+    return all(find_spec(name) is not None for name in ("xarray", "scipy"))
+
+
+def available_formats():
+    return [label for label, (ext, _) in FORMATS.items() if ext != "nc" or netcdf_available()]
+
+
+def encode_frame(df, ext):
+    """Codifica um DataFrame (time, valor) no formato da extensão escolhida e retorna os bytes."""
+    if ext == "csv":
+        return df.to_csv(index=False).encode("utf-8")
+    if ext == "txt":
+        return df.to_csv(index=False, sep="\t").encode("utf-8")
+    if ext == "json":
+        return df.to_json(orient="records", date_format="iso", date_unit="s").encode("utf-8")
+    if ext == "parquet":
+        buffer = BytesIO()
+        df.to_parquet(buffer, index=False)
+        return buffer.getvalue()
+    if ext == "nc":
+        # Sem caminho, o xarray retorna o arquivo NetCDF3 em memória (engine scipy);
+        # tabelas sem coluna de tempo (ex.: catálogo de eventos) usam a numeração das linhas
+        return bytes((df.set_index("time") if "time" in df else df).to_xarray().to_netcdf())
+    raise ValueError(f"Formato de download desconhecido: {ext}")
+
+
+def member_name(var, ext):
+    """Nome do arquivo de um índice dentro do pacote ZIP (sem barras, ex.: DMI/IOD)."""
+    return f"{var.replace('/', '-')}.{ext}"
+
+
+def build_bundle(members):
+    """Monta um ZIP a partir de {nome do arquivo: bytes já codificados}."""
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buffer.getvalue()
@@ -0,0 +1,303 @@
+# Construção das figuras Plotly dos índices
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# Número máximo de barras enviadas ao navegador (aprox. a largura do gráfico em pixels)
+MAX_POINTS = 1200
+
+# Janelas do seletor de período (o recorte é feito no servidor, não no navegador)
+MONTHLY_PERIODS = {
+    "All": None,
+    "30 years": pd.DateOffset(years=30),
+    "20 years": pd.DateOffset(years=20),
+    "10 years": pd.DateOffset(years=10),
+    "5 years": pd.DateOffset(years=5),
+    "1 year": pd.DateOffset(years=1),
+}
+
+# Janelas da MJO em dias, recortadas no store (IndexStore.mjo_window); a visão padrão são os
+# últimos 90 dias e as janelas maiores só são montadas quando escolhidas
+DAILY_PERIODS = {
+    "All": None,
+    "1 year": 365,
+    "6 months": 183,
+    "90 days": 90,
+    "1 month": 30,
+}
+DEFAULT_DAILY_PERIOD = "90 days"
+
+# Janelas (dias) do diagrama de fase da MJO
+PHASE_SPACE_WINDOWS = (30, 60, 90, 180, 365)
+
+# Ângulo (graus) do centro de cada fase no diagrama de Wheeler e Hendon (2004): a fase 1
+# ocupa 180°–225° e as fases avançam no sentido anti-horário, 45° cada
+PHASE_ANGLES = 202.5 + 45.0 * np.arange(8)
+# Regiões do diagrama: (texto, x, y) em unidades do raio máximo
+PHASE_REGIONS = (
+    ("Indian Ocean", 0.0, -0.93),
+    ("Maritime Continent", 0.93, 0.0),
+    ("Western Pacific", 0.0, 0.93),
+    ("West. Hem. and Africa", -0.93, 0.0),
+)
+
+
+def window(serie, offset):
+    """Recorta (sem cópia) os últimos `offset` da série ordenada; None retorna a série inteira."""
+    if offset is None or serie.empty:
+        return serie
+    start = serie.index.searchsorted(serie.index[-1] - offset, side="left")
+    return serie.iloc[start:]
+
+
+def bucket_extremes(times, values, max_points=MAX_POINTS):
+    """Reduz a série a no máximo `max_points` blocos consecutivos, preservando os picos.
+
+    Retorna (data inicial de cada bloco, mínimo do bloco, máximo do bloco). Se a série já
+    cabe em `max_points`, retorna os próprios valores (resolução completa).
+    """
+    n = len(values)
+    if n <= max_points:
+        return times, values, values
+
+    size = -(-n // max_points)
+    n_buckets = -(-n // size)
+    padded = np.concatenate([values, np.full(n_buckets * size - n, np.nan)]).reshape(n_buckets, size)
+    # fmin/fmax ignoram NaN (e retornam NaN apenas para blocos sem dados)
+    return times[::size], np.fmin.reduce(padded, axis=1), np.fmax.reduce(padded, axis=1)
+
+
+def bucket_mode(times, values, max_points=MAX_POINTS):
+    """Como bucket_extremes, para séries categóricas (fase da MJO, 1-8): o valor mais frequente do bloco.
+
+    Máximo ou mínimo de categorias não fazem sentido (puxariam todo bloco para a fase 8 ou 1).
+    Empates ficam com a menor categoria; blocos sem dados ficam NaN.
+    """
+    n = len(values)
+    if n <= max_points:
+        return times, values
+
+    size = -(-n // max_points)
+    n_buckets = -(-n // size)
+    valid = ~np.isnan(values)
+    categories, codes = np.unique(values[valid], return_inverse=True)
+    counts = np.zeros((n_buckets, len(categories)), dtype="int64")
+    np.add.at(counts, (np.flatnonzero(valid) // size, codes), 1)
+    mode = np.full(n_buckets, np.nan)
+    filled = counts.any(axis=1)
+    mode[filled] = categories[counts[filled].argmax(axis=1)]
+    return times[::size], mode
+
+
+def _apply_layout(fig, title, y_title):
+    fig.update_layout(
+        title=title,
+        showlegend=False,
+        bargap=0,
+        height=500,
+        xaxis=dict(
+            title=dict(text="Date", font=dict(color="black")),
+            tickfont=dict(color="black"),
+            rangeslider=dict(visible=True),
+            type="date"
+        ),
+        yaxis=dict(
+            title=dict(text=y_title, font=dict(color="black")),
+            tickfont=dict(color="black")
+        )
+    )
+
+
+def shade_events(fig, events, step, start=None):
+    """Faixas verticais (vermelhas para eventos positivos, azuis para negativos) atrás das barras.
+
+    `events` tem colunas start, end (inclusivo) e mean; `step` é a duração de um período
+    (1 mês ou 1 dia). As faixas são montadas de uma vez em layout.shapes (add_vrect
+    evento a evento é lento para centenas de eventos).
+    """
+    if start is not None:
+        events = events[events["end"] >= start]
+    shapes = [
+        dict(
+            type="rect", xref="x", yref="paper", x0=x0, x1=x1 + step, y0=0, y1=1, layer="below", line_width=0,
+            fillcolor="rgba(255, 0, 0, 0.12)" if mean > 0 else "rgba(0, 0, 255, 0.12)"
+        )
+        for x0, x1, mean in zip(events["start"], events["end"], events["mean"])
+    ]
+    fig.update_layout(shapes=shapes)
+
+
+def monthly_figure(serie, title, y_title, offset=None, max_points=MAX_POINTS, overlay=None, overlay_name=None,
+                   events=None):
+    """Barras vermelhas (positivas) e azuis (negativas) de um índice mensal.
+
+    `overlay` (opcional) é uma série agregada (média móvel ou sazonal) desenhada como linha
+    sobre as barras, recortada na mesma janela; `events` (opcional) sombreia os eventos.
+    """
+    serie = window(serie, offset)
+    times, low, high = bucket_extremes(serie.index, serie.to_numpy(dtype="float64"), max_points)
+
+    # Separa positivos e negativos com máscaras: cada barra é enviada uma única vez
+    pos = high > 0
+    neg = low < 0
+    fig = go.Figure([
+        go.Bar(x=times[pos], y=high[pos], marker_color="red", name="Positive"),
+        go.Bar(x=times[neg], y=low[neg], marker_color="blue", name="Negative")
+    ])
+    _apply_layout(fig, title, y_title)
+    fig.update_traces(hovertemplate="Date: %{x|%b %Y}<br>Value: %{y:.2f}")
+    if overlay is not None and not serie.empty:
+        overlay = overlay.iloc[overlay.index.searchsorted(serie.index[0], side="left"):]
+        fig.add_trace(go.Scatter(
+            x=overlay.index, y=overlay.to_numpy(dtype="float64"), mode="lines", name=overlay_name,
+            line=dict(color="black", width=2),
+            hovertemplate=f"Date: %{{x|%b %Y}}<br>{overlay_name}: %{{y:.2f}}<extra></extra>"
+        ))
+    if events is not None and not serie.empty:
+        shade_events(fig, events, pd.DateOffset(months=1), serie.index[0])
+    return fig
+
+
+def daily_figure(
+    serie, title, y_title, name, color, hovertemplate, offset=None, max_points=MAX_POINTS, events=None, categorical=False
+):
+    """Barras de uma série diária (MJO); na visão reduzida cada barra mostra o máximo do bloco
+    (ou o valor mais frequente, se `categorical`, como na fase)."""
+    serie = window(serie, offset)
+    values = serie.to_numpy(dtype="float64", na_value=np.nan)
+    if categorical:
+        times, y = bucket_mode(serie.index, values, max_points)
+    else:
+        times, _, y = bucket_extremes(serie.index, values, max_points)
+
+    fig = go.Figure([go.Bar(x=times, y=y, marker_color=color, name=name)])
+    _apply_layout(fig, title, y_title)
+    fig.update_traces(hovertemplate=hovertemplate)
+    if events is not None and not serie.empty:
+        shade_events(fig, events, pd.Timedelta(days=1), serie.index[0])
+    return fig
+
+
+def rmm_components(amplitude, phase):
+    """RMM1 e RMM2 aproximados a partir da amplitude e da fase (1-8).
+
+    Os arquivos trazem só amplitude e fase, então o ângulo dentro do setor se perde: cada dia
+    fica no raio central do setor da sua fase (erro angular de até 22,5°); a amplitude
+    (distância à origem) é exata. Dias sem fase válida ficam NaN.
+    """
+    amplitude = np.asarray(amplitude, dtype="float64")
+    phase = np.asarray(phase, dtype="float64")
+    valid = (phase >= 1) & (phase <= 8)
+    angle = np.full(phase.shape, np.nan)
+    angle[valid] = np.deg2rad(PHASE_ANGLES[phase[valid].astype(int) - 1])
+    return amplitude * np.cos(angle), amplitude * np.sin(angle)
+
+
+def phase_space_figure(df, title):
+    """Diagrama de fase RMM1 × RMM2 (Wheeler e Hendon, 2004) da janela `df` (amplitude, fase).
+
+    Trajetória colorida do dia mais antigo ao mais recente (destacado), círculo de amplitude 1
+    e os 8 setores das fases com as regiões de atividade convectiva.
+    """
+    amplitude = df["amplitude"].to_numpy(dtype="float64", na_value=np.nan)
+    phase = df["phase"].to_numpy(dtype="float64", na_value=np.nan)
+    rmm1, rmm2 = rmm_components(amplitude, phase)
+    peak = np.nanmax(amplitude) if np.isfinite(amplitude).any() else 0.0
+    limit = max(4.0, np.ceil(peak) + 0.5)
+
+    # Setores: eixos e diagonais a partir do círculo unitário, em layout.shapes de uma vez
+    line = dict(color="gray", width=1, dash="dot")
+    shapes = [dict(type="circle", x0=-1, y0=-1, x1=1, y1=1, line=dict(color="gray", width=1))]
+    for angle in np.deg2rad(np.arange(0, 360, 45)):
+        shapes.append(dict(
+            type="line", x0=np.cos(angle), y0=np.sin(angle), x1=limit * np.cos(angle), y1=limit * np.sin(angle),
+            line=line
+        ))
+    centers = np.deg2rad(PHASE_ANGLES)
+    annotations = [
+        dict(x=0.8 * limit * np.cos(a), y=0.8 * limit * np.sin(a), text=str(k), showarrow=False,
+             font=dict(size=16, color="gray"))
+        for k, a in enumerate(centers, start=1)
+    ] + [
+        dict(x=x * limit, y=y * limit, text=text, showarrow=False, font=dict(color="black"),
+             textangle=-90 if x < 0 else (90 if x > 0 else 0))
+        for text, x, y in PHASE_REGIONS
+    ]
+
+    dates = df.index.strftime("%b-%d-%Y").to_numpy()
+    customdata = np.column_stack([amplitude, phase])
+    hover = "Date: %{text}<br>Amplitude: %{customdata[0]:.2f}<br>Phase: %{customdata[1]}<extra></extra>"
+    fig = go.Figure([
+        go.Scatter(
+            x=rmm1, y=rmm2, mode="lines+markers", name="MJO", text=dates, customdata=customdata,
+            hovertemplate=hover, line=dict(color="lightgray", width=1),
+            marker=dict(size=6, color=np.arange(len(df)), colorscale="Viridis", showscale=False)
+        ),
+        go.Scatter(
+            x=rmm1[-1:], y=rmm2[-1:], mode="markers", name="Latest", text=dates[-1:], customdata=customdata[-1:],
+            hovertemplate=hover, marker=dict(size=14, color="red", symbol="star")
+        ),
+    ])
+    fig.update_layout(
+        title=title,
+        showlegend=False,
+        height=600,
+        shapes=shapes,
+        annotations=annotations,
+        xaxis=dict(title=dict(text="RMM1", font=dict(color="black")), tickfont=dict(color="black"),
+                   range=[-limit, limit], zeroline=False),
+        yaxis=dict(title=dict(text="RMM2", font=dict(color="black")), tickfont=dict(color="black"),
+                   range=[-limit, limit], zeroline=False, scaleanchor="x", scaleratio=1)
+    )
+    return fig
+
+
+def correlation_heatmap(df, title):
+    """Mapa de calor índice × índice (escala fixa de -1 a 1)."""
+    fig = go.Figure(go.Heatmap(
+        z=df.to_numpy(), x=list(df.columns), y=list(df.index),
+        zmin=-1, zmax=1, colorscale="RdBu_r",
+        hovertemplate="%{y} × %{x}<br>r = %{z:.2f}<extra></extra>"
+    ))
+    fig.update_layout(
+        title=title,
+        height=700,
+        xaxis=dict(tickfont=dict(color="black"), side="bottom"),
+        yaxis=dict(tickfont=dict(color="black"), autorange="reversed")
+    )
+    return fig
+
+
+def lag_correlation_figure(serie, title):
+    """Correlação em função da defasagem (meses) para um par de índices."""
+    fig = go.Figure(go.Scatter(
+        x=serie.index, y=serie.to_numpy(), mode="lines+markers", line=dict(color="#001f3f"),
+        hovertemplate="Lag: %{x} months<br>r = %{y:.2f}<extra></extra>"
+    ))
+    fig.add_hline(y=0, line=dict(color="black", width=1))
+    fig.update_layout(
+        title=title,
+        showlegend=False,
+        height=400,
+        xaxis=dict(title=dict(text="Lag (months)", font=dict(color="black")), tickfont=dict(color="black")),
+        yaxis=dict(title=dict(text="Correlation", font=dict(color="black")), tickfont=dict(color="black"), range=[-1, 1])
+    )
+    return fig
+
+
+def comparison_figure(series, title, y_title="Value"):
+    """Vários índices sobrepostos em um único eixo de datas, com traços WebGL (Scattergl).
+
+    `series` mapeia o rótulo exibido -> série. O WebGL desenha dezenas de milhares de pontos
+    (AMO desde 1854, MJO diária) sem travar o navegador, ao contrário das barras em SVG.
+    """
+    fig = go.Figure([
+        go.Scattergl(
+            x=serie.index, y=serie.to_numpy(dtype="float64", na_value=np.nan), mode="lines", name=label,
+            hovertemplate=f"{label}<br>Date: %{{x|%b-%d-%Y}}<br>Value: %{{y:.2f}}<extra></extra>"
+        )
+        for label, serie in series.items()
+    ])
+    _apply_layout(fig, title, y_title)
+    fig.update_layout(showlegend=True, height=550, legend=dict(orientation="h", y=1.1))
+    return fig
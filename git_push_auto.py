@@ -2,6 +2,8 @@ import os
 import shutil
 import subprocess
 import datetime
+import hashlib
+import json
 
 # 📁 Define o diretório raiz do projeto
 projeto = "/home/nathan/DAS/APP-INDEX"
@@ -11,29 +13,111 @@ os.chdir(projeto)
 origem = "/home/nathan/DAS/Indices"
 destino = os.path.join(projeto, "dataset")
 
-# 🔧 Cria a pasta 'dataset' se ela não existir
-if not os.path.exists(destino):
-    os.makedirs(destino)
+# 📝 Manifesto das alterações, usado pelo app para invalidar só os índices afetados
+# (não pode terminar em .txt, senão seria lido como um índice)
+ARQUIVO_ALTERACOES = "changes.json"
 
-# 🧹 Limpa o conteúdo da pasta 'dataset' antes de copiar novos dados
-for item in os.listdir(destino):
-    item_path = os.path.join(destino, item)
-    if os.path.isdir(item_path):
-        shutil.rmtree(item_path)
-    else:
-        os.remove(item_path)
 
-# 📦 Copia os arquivos da pasta 'Indices' para 'dataset'
-for item in os.listdir(origem):
-    origem_item = os.path.join(origem, item)
-    destino_item = os.path.join(destino, item)
+def sha256_bytes(conteudo):
+    return hashlib.sha256(conteudo).hexdigest()
 
-    if os.path.isdir(origem_item):
-        shutil.copytree(origem_item, destino_item)
-    else:
-        shutil.copy2(origem_item, destino_item)
 
-print("✅ Dados copiados de 'Indices' para 'dataset' com sucesso.")
+def escrever_atomico(caminho, conteudo):
+    """Escreve em um temporário na mesma pasta e troca com os.replace (nunca deixa arquivo parcial)."""
+    tmp = f"{caminho}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(conteudo)
+    os.replace(tmp, caminho)
+
+
+def sincronizar(origem, destino, prefixo=""):
+    """Sincroniza origem -> destino comparando o conteúdo (sha256) de cada arquivo.
+
+    Arquivos iguais não são tocados (mtime preservado); quando o destino é um prefixo da origem
+    só as novas linhas são acrescentadas; os demais são substituídos. Retorna {arquivo: alteração}.
+    """
+    os.makedirs(destino, exist_ok=True)
+    alteracoes = {}
+
+    for item in sorted(os.listdir(origem)):
+        origem_item = os.path.join(origem, item)
+        destino_item = os.path.join(destino, item)
+        nome = prefixo + item
+
+        if os.path.isdir(origem_item):
+            alteracoes.update(sincronizar(origem_item, destino_item, f"{nome}/"))
+            continue
+
+        with open(origem_item, "rb") as f:
+            novo = f.read()
+        antigo = None
+        if os.path.isfile(destino_item):
+            with open(destino_item, "rb") as f:
+                antigo = f.read()
+
+        if antigo == novo:
+            continue
+        if antigo is None:
+            status, linhas = "added", novo.count(b"\n")
+        elif antigo and novo.startswith(antigo) and antigo.endswith(b"\n"):
+            status, linhas = "appended", novo[len(antigo):].count(b"\n")
+        else:
+            status, linhas = "replaced", novo.count(b"\n")
+
+        escrever_atomico(destino_item, novo)
+        stat = os.stat(destino_item)
+        alteracoes[nome] = {
+            "status": status,
+            "rows": linhas,
+            "sha256": sha256_bytes(novo),
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+        }
+
+    # Remove o que não existe mais na origem
+    for item in sorted(os.listdir(destino)):
+        if item == ARQUIVO_ALTERACOES and not prefixo:
+            continue
+        if not os.path.exists(os.path.join(origem, item)):
+            destino_item = os.path.join(destino, item)
+            if os.path.isdir(destino_item):
+                shutil.rmtree(destino_item)
+            else:
+                os.remove(destino_item)
+            alteracoes[prefixo + item] = {"status": "removed"}
+
+    return alteracoes
+
+
+# 📦 Sincroniza 'Indices' -> 'dataset' sem apagar e recopiar tudo
+alteracoes = sincronizar(origem, destino)
+if alteracoes:
+    escrever_atomico(
+        os.path.join(destino, ARQUIVO_ALTERACOES),
+        json.dumps({
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "files": alteracoes,
+        }, indent=1).encode("utf-8")
+    )
+    for nome, alteracao in alteracoes.items():
+        print(f"   {alteracao['status']:>9}  {nome}")
+    print(f"✅ {len(alteracoes)} arquivo(s) sincronizado(s) de 'Indices' para 'dataset'.")
+else:
+    print("ℹ️ Nenhum arquivo de 'Indices' mudou.")
+
+# 📚 Compila Metodologias.xlsx em Metodologias.json (o app só lê o JSON)
+from methodology import CATALOG_FILE, EXCEL_FILE, write_catalog
+catalogo = write_catalog(os.path.join(projeto, EXCEL_FILE), os.path.join(projeto, CATALOG_FILE))
+print(f"✅ Catálogo de metodologias: {len(catalogo['entries'])} índices.")
+
+# 🔥 Pré-aquece o cache compartilhado (cache colunar, resumo da Home e downloads) e copia o
+# resumo pré-montado da Home para o repositório (primeira pintura sem importar pandas/abrir o store)
+from home_summary import SUMMARY_FILE
+from prewarm import prewarm
+from shared_cache import cache_root
+dir_cache = cache_root(projeto)
+prewarm(destino, dir_cache)
+shutil.copy2(os.path.join(dir_cache, SUMMARY_FILE), os.path.join(projeto, SUMMARY_FILE))
 
 # ⚙️ Função para executar comandos shell
 def run(cmd):
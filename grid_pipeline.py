@@ -0,0 +1,323 @@
+# Cálculo dos índices de média regional a partir dos campos em grade (arquivos NetCDF locais)
+#
+# Para cada índice: climatologia mensal em cada ponto de grade no período base (1991–2020),
+# anomalia em cada ponto e média na área (pesos cos(lat), ignorando pontos sem dado, como
+# os de continente na TSM). Índices de dipolo são a diferença entre as médias de duas áreas.
+#
+# - Leitura preguiçosa: cada arquivo é aberto com xarray sem carregar os dados, e só a caixa
+#   do índice é lida, em blocos de `chunk` meses.
+# - Paralelo: um processo por índice (ProcessPoolExecutor).
+# - Incremental: se o TSV de saída já existe, só os meses depois da última data são
+#   calculados e acrescentados, sem reescrever as linhas antigas. A climatologia de cada
+#   caixa fica gravada no cache do app (.cache/climatology/) e é reaproveitada.
+#
+# Os índices por EOF (AAO, PSA, AO, PNA, NAO, SAD, SWSA), o SOI (estações) e os externos
+# (ONI, QBO, PDO, AMO, MJO) continuam vindo prontos da pasta Indices.
+#
+#     python grid_pipeline.py --sst 'ersst/*.nc' --msl 'era5/msl_*.nc' --output /caminho/Indices
+#     python grid_pipeline.py ... --full            # recalcula todo o período
+#     python grid_pipeline.py ... --cache .cache    # atualiza também o cache colunar
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import hashlib
+import os
+from pathlib import Path
+import time
+import numpy as np
+import pandas as pd
+
+BASE_PERIOD = (1991, 2020)
+CHUNK_MONTHS = 120
+CLIMATOLOGY_DIR = "climatology"
+
+# Nomes alternativos das coordenadas e variáveis (ERSST, ERA5 antigo e novo do CDS)
+COORD_NAMES = {
+    "time": ("time", "valid_time"),
+    "lat": ("lat", "latitude"),
+    "lon": ("lon", "longitude"),
+}
+VARIABLE_NAMES = {
+    "sst": ("sst", "tos", "analysed_sst"),
+    "msl": ("msl", "slp", "mslp", "prmsl"),
+}
+# Conversão para a unidade dos índices (ERA5: Pa -> hPa)
+UNIT_SCALE = {"msl": 0.01}
+
+# Caixa: (lat sul, lat norte, lon oeste, lon leste), longitudes em -180..180 (oeste negativo).
+# Com lon oeste > lon leste a caixa cruza a linha de data (ex.: Niño 4).
+# areas: [(sinal, caixa)]; o índice é a soma sinal × média das anomalias na caixa.
+INDEX_DEFINITIONS = {
+    "NIN12": {"file": "NINO12.txt", "variable": "sst", "areas": [(1, (-10, 0, -90, -80))]},
+    "NIN03": {"file": "NINO3.txt", "variable": "sst", "areas": [(1, (-5, 5, -150, -90))]},
+    "NIN34": {"file": "NINO34.txt", "variable": "sst", "areas": [(1, (-5, 5, -170, -120))]},
+    "NIN04": {"file": "NINO4.txt", "variable": "sst", "areas": [(1, (-5, 5, 160, -150))]},
+    "TNA": {"file": "TNA.txt", "variable": "sst", "areas": [(1, (5.5, 23.5, -57.5, -15))]},
+    "TSA": {"file": "TSA.txt", "variable": "sst", "areas": [(1, (-20, 0, -30, 10))]},
+    "SSTRG2": {"file": "SSTRG2.txt", "variable": "sst", "areas": [(1, (-40, -30, -57, -47))]},
+    "DMI/IOD": {"file": "DMI-IOD.txt", "variable": "sst", "areas": [(1, (-10, 10, 50, 70)), (-1, (-10, 0, 90, 110))]},
+    "IOSD": {"file": "IOSD.txt", "variable": "sst", "areas": [(1, (-37, -27, 55, 65)), (-1, (-28, -18, 90, 100))]},
+    "SAODI": {"file": "SAODI.txt", "variable": "sst", "areas": [(1, (-15, 0, -20, 10)), (-1, (-40, -25, -40, -10))]},
+    # Definição original é SWP - NEP; aqui NEP - SWP, como no SAODI
+    "SASDI": {"file": "SASDI.txt", "variable": "sst", "areas": [(1, (-25, -15, -20, 0)), (-1, (-40, -30, -30, -10))]},
+    "SASAI": {"file": "SASAI.txt", "variable": "msl", "areas": [(1, (-25, -15, -50, -40)), (-1, (-37.5, -27.5, -60, -50))]},
+}
+
+
+def _import_xarray():
+    try:
+        import xarray as xr
+    except ImportError as exc:
+        raise ImportError("O cálculo a partir das grades precisa do xarray (pip install xarray scipy).") from exc
+    return xr
+
+
+# ======================
+# LEITURA DAS GRADES
+# ======================
+def _pick(names, candidates, what):
+    for name in candidates:
+        if name in names:
+            return name
+    raise KeyError(f"{what} não encontrado (procurado: {', '.join(candidates)})")
+
+
+class GridSource:
+    """Arquivos NetCDF de uma variável, abertos sem carregar os dados, em ordem de tempo."""
+
+    def __init__(self, paths, variable):
+        xr = _import_xarray()
+        self.variable = variable
+        self.scale = UNIT_SCALE.get(variable, 1.0)
+        self.parts = []
+        self.datasets = []
+        try:
+            self._open(xr, paths)
+        except BaseException:
+            self.close()
+            raise
+        first = self.parts[0][0]
+        self.lat = np.asarray(first[first.dims[1]].values, dtype="float64")
+        self.lon = np.asarray(first[first.dims[2]].values, dtype="float64")
+        # Longitudes em -180..180
+        self.lon = np.where(self.lon > 180, self.lon - 360, self.lon)
+
+    def _open(self, xr, paths):
+        for path in sorted(paths):
+            ds = xr.open_dataset(path, decode_times=True)
+            self.datasets.append(ds)
+            names = {
+                key: _pick(list(ds.variables), candidates, f"Coordenada '{key}' em {path}")
+                for key, candidates in COORD_NAMES.items()
+            }
+            data = ds[_pick(list(ds.data_vars), VARIABLE_NAMES[self.variable], f"Variável '{self.variable}' em {path}")]
+            # Grades com nível único (ex.: zlev do ERSST) viram 2D
+            extra = [dim for dim in data.dims if dim not in names.values()]
+            data = data.isel({dim: 0 for dim in extra}).transpose(names["time"], names["lat"], names["lon"])
+            months = pd.DatetimeIndex(ds[names["time"]].values).to_period("M").to_timestamp()
+            self.parts.append((data, months))
+        if not self.parts:
+            raise FileNotFoundError(f"Nenhum arquivo NetCDF para '{self.variable}'.")
+
+    def close(self):
+        """Fecha os arquivos abertos."""
+        for ds in self.datasets:
+            ds.close()
+        self.datasets, self.parts = [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def box_index(self, box):
+        """Índices (lat, lon) dos pontos dentro da caixa."""
+        south, north, west, east = box
+        lat_idx = np.flatnonzero((self.lat >= south) & (self.lat <= north))
+        if west <= east:
+            lon_mask = (self.lon >= west) & (self.lon <= east)
+        else:
+            lon_mask = (self.lon >= west) | (self.lon <= east)
+        lon_idx = np.flatnonzero(lon_mask)
+        if not lat_idx.size or not lon_idx.size:
+            raise ValueError(f"A caixa {box} não tem pontos na grade.")
+        return lat_idx, lon_idx
+
+    def blocks(self, box, start=None, chunk=CHUNK_MONTHS):
+        """(meses, campo[tempo, lat, lon]) da caixa em blocos de `chunk` meses a partir de `start`."""
+        lat_idx, lon_idx = self.box_index(box)
+        for data, months in self.parts:
+            first = 0 if start is None else int(np.searchsorted(months.values, np.datetime64(start, "ns")))
+            for inicio in range(first, len(months), chunk):
+                fim = min(inicio + chunk, len(months))
+                # Só esta fatia (tempo × caixa) é lida do arquivo
+                values = data.isel({data.dims[0]: slice(inicio, fim), data.dims[1]: lat_idx, data.dims[2]: lon_idx}).values
+                yield months[inicio:fim], np.asarray(values, dtype="float64") * self.scale
+
+
+def area_weights(lat):
+    return np.cos(np.deg2rad(lat))
+
+
+# ======================
+# CLIMATOLOGIA E ANOMALIAS
+# ======================
+def box_climatology(source, box, base=BASE_PERIOD, chunk=CHUNK_MONTHS):
+    """Média de cada mês do calendário em cada ponto da caixa no período base: [12, lat, lon]."""
+    lat_idx, lon_idx = source.box_index(box)
+    total = np.zeros((12, lat_idx.size, lon_idx.size))
+    count = np.zeros((12, lat_idx.size, lon_idx.size))
+    for months, values in source.blocks(box, pd.Timestamp(base[0], 1, 1), chunk):
+        keep = months.year <= base[1]
+        if not keep.any():
+            break
+        valid = ~np.isnan(values[keep])
+        calendar = months.month.to_numpy()[keep] - 1
+        np.add.at(total, calendar, np.where(valid, values[keep], 0.0))
+        np.add.at(count, calendar, valid)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan)
+
+
+def _climatology_path(clim_dir, variable, box, base):
+    digest = hashlib.sha256(repr((variable, box, base)).encode("utf-8")).hexdigest()[:16]
+    return Path(clim_dir) / f"{variable}_{digest}.npy"
+
+
+def load_climatology(source, box, base, clim_dir=None, chunk=CHUNK_MONTHS):
+    """Climatologia da caixa, lida de `clim_dir` se já calculada (ou calculada e gravada)."""
+    path = _climatology_path(clim_dir, source.variable, box, base) if clim_dir else None
+    if path is not None and path.is_file():
+        return np.load(path)
+    clim = box_climatology(source, box, base, chunk)
+    if path is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.stem}.{os.getpid()}.npy")
+        np.save(tmp, clim)
+        os.replace(tmp, path)
+    return clim
+
+
+def area_mean_anomalies(source, box, clim, start=None, chunk=CHUNK_MONTHS):
+    """Média ponderada (cos lat) das anomalias na caixa, mês a mês, a partir de `start`."""
+    lat_idx, _ = source.box_index(box)
+    weights = area_weights(source.lat[lat_idx])[None, :, None]
+    pieces = []
+    for months, values in source.blocks(box, start, chunk):
+        anomalies = values - clim[months.month.to_numpy() - 1]
+        valid = ~np.isnan(anomalies)
+        pesos = np.where(valid, weights, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(valid, anomalies * weights, 0.0).sum(axis=(1, 2)) / pesos.sum(axis=(1, 2))
+        pieces.append(pd.Series(mean, index=months))
+    if not pieces:
+        return pd.Series(dtype="float64", index=pd.DatetimeIndex([], name="time"))
+    return pd.concat(pieces)
+
+
+def compute_index(var, paths, start=None, base=BASE_PERIOD, clim_dir=None, chunk=CHUNK_MONTHS):
+    """Série do índice `var` (INDEX_DEFINITIONS) a partir dos arquivos da variável."""
+    definition = INDEX_DEFINITIONS[var]
+    serie = None
+    with GridSource(paths, definition["variable"]) as source:
+        for sign, box in definition["areas"]:
+            clim = load_climatology(source, box, base, clim_dir, chunk)
+            part = sign * area_mean_anomalies(source, box, clim, start, chunk)
+            serie = part if serie is None else serie + part
+    serie.index.name = "time"
+    return serie.rename(var)
+
+
+# ======================
+# SAÍDA (TSV no formato da pasta dataset/)
+# ======================
+def format_value(value):
+    """Valor como nos arquivos atuais (float32, menor representação exata), 'nan' se faltar."""
+    return "nan" if np.isnan(value) else str(np.float32(value))
+
+
+def last_date(path):
+    """Última data do TSV de saída (None se não existir ou estiver vazio)."""
+    from index_store import parse_index_file
+
+    if not Path(path).is_file():
+        return None
+    _, serie = parse_index_file(path)
+    return serie.index[-1] if len(serie) else None
+
+
+def write_index(path, serie, append=False):
+    """Grava (ou acrescenta ao fim, sem reescrever as linhas antigas) o TSV do índice. Atômico."""
+    path = Path(path)
+    linhas = "".join(f"{data:%Y-%m-%d}\t{format_value(valor)}\n" for data, valor in serie.items())
+    antigo = path.read_bytes() if append and path.is_file() else f"time\t{serie.name}\n".encode("utf-8")
+    if antigo and not antigo.endswith(b"\n"):
+        antigo += b"\n"
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(antigo + linhas.encode("utf-8"))
+    os.replace(tmp, path)
+
+
+def _run_index(var, paths, output, full, base, clim_dir, chunk):
+    """Tarefa de um processo: calcula o índice (inteiro ou só os meses novos) e grava o TSV."""
+    inicio = time.perf_counter()
+    path = Path(output) / INDEX_DEFINITIONS[var]["file"]
+    ultimo = None if full else last_date(path)
+    start = None if ultimo is None else ultimo + pd.offsets.MonthBegin(1)
+    serie = compute_index(var, paths, start, base, clim_dir, chunk)
+    if ultimo is not None:
+        serie = serie[serie.index > ultimo]
+    if ultimo is None or len(serie):
+        write_index(path, serie, append=ultimo is not None)
+    return var, len(serie), ultimo is None, time.perf_counter() - inicio
+
+
+def run_pipeline(sources, output, clim_dir, indices=None, full=False, base=BASE_PERIOD, chunk=CHUNK_MONTHS,
+                 workers=None):
+    """Calcula os índices em paralelo. `sources`: {variável: [arquivos NetCDF]}.
+
+    Retorna [(índice, meses gravados, recalculado inteiro?, segundos)]. Índices cuja variável
+    não tem arquivos são ignorados.
+    """
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    if full:
+        for path in Path(clim_dir).glob("*.npy"):
+            path.unlink()
+    indices = [var for var in (indices or INDEX_DEFINITIONS) if sources.get(INDEX_DEFINITIONS[var]["variable"])]
+    tasks = [(var, sources[INDEX_DEFINITIONS[var]["variable"]], output, full, base, clim_dir, chunk) for var in indices]
+    if workers == 1:
+        return [_run_index(*task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run_index, *zip(*tasks))) if tasks else []
+
+
+if __name__ == "__main__":
+    import argparse
+    from shared_cache import cache_root
+
+    parser = argparse.ArgumentParser(description="Calcula os índices de média regional a partir de NetCDF locais.")
+    parser.add_argument("--sst", help="Arquivos de TSM (glob), ex.: 'ersst/*.nc'")
+    parser.add_argument("--msl", help="Arquivos de pressão ao nível do mar (glob), ex.: 'era5/msl_*.nc'")
+    parser.add_argument("--output", required=True, type=Path, help="Pasta dos TSVs (ex.: a pasta Indices).")
+    parser.add_argument("--indices", nargs="+", choices=list(INDEX_DEFINITIONS))
+    parser.add_argument("--full", action="store_true", help="Recalcula todo o período (e a climatologia).")
+    parser.add_argument("--base", nargs=2, type=int, default=list(BASE_PERIOD), metavar=("INICIO", "FIM"))
+    parser.add_argument("--chunk", type=int, default=CHUNK_MONTHS, help="Meses lidos por bloco.")
+    parser.add_argument("--workers", type=int, help="Processos em paralelo (padrão: número de CPUs).")
+    parser.add_argument("--climatology", type=Path, help="Pasta das climatologias (padrão: <cache do app>/climatology).")
+    parser.add_argument("--cache", type=Path, help="Atualiza também o cache colunar nesta pasta.")
+    args = parser.parse_args()
+
+    clim_dir = args.climatology or cache_root(Path(__file__).resolve().parent) / CLIMATOLOGY_DIR
+    sources = {name: sorted(glob.glob(pattern)) for name, pattern in (("sst", args.sst), ("msl", args.msl)) if pattern}
+    resultados = run_pipeline(sources, args.output, clim_dir, args.indices, args.full, tuple(args.base), args.chunk,
+                              args.workers)
+    for var, meses, inteiro, segundos in resultados:
+        print(f"   {var:<8} {'completo' if inteiro else 'novos meses'}: {meses:>4} meses em {segundos:.1f} s")
+    print(f"✅ {len(resultados)} índice(s) calculado(s) em {args.output}")
+
+    if args.cache:
+        from index_store import build_cache
+        manifest, _ = build_cache(args.output, args.cache)
+        print(f"✅ Cache colunar atualizado: versão {manifest['version'][:12]}")
@@ -0,0 +1,194 @@
+# Tabela de resumo da aba Home e sua versão pré-montada (primeira pintura)
+#
+# O HTML do resumo é gravado em home_summary.json junto com o tamanho/mtime/sha256 de cada
+# arquivo da pasta dataset/. Numa partida a frio o app confere esses arquivos (só stat, ou
+# sha256 se o mtime mudou, como num checkout novo) e pinta a Home com o HTML pronto antes
+# de importar pandas e abrir o store. O arquivo é refeito pelo git_push_auto.py após a
+# sincronização e pelo próprio app sempre que recalcula o resumo.
+#
+# Este módulo só usa a biblioteca padrão na importação (o pandas entra em summary_html).
+import hashlib
+import json
+import os
+from pathlib import Path
+
+SUMMARY_FORMAT = 1
+SUMMARY_FILE = "home_summary.json"
+# Manifesto do cache colunar (index_store.MANIFEST_FILE), com o sha256 de cada arquivo
+CACHE_MANIFEST = "manifest.json"
+
+# Ordem fixa dos índices na tabela (e nas demais abas)
+display_order_tab = [
+    "AAO", "PSA1", "PSA2", "AO", "PNA", "NAO", "DMI/IOD", "IOSD",
+    "NINO12", "NINO3", "NINO34", "NINO4", "SOI", "TNA", "TSA", "SASAI",
+    "SSTRG2", "SAODI", "SASDI", "SAD", "SWSA","ONI", "QBO", "PDO", "AMO"
+]
+
+display_order_tab_mjo = ["Amplitude MJO", "Phase MJO"]
+
+
+def summary_html(store, alias):
+    """HTML das tabelas de resumo (índices mensais e MJO) com o último valor de cada índice.
+
+    Só é chamado quando o home_summary.json falta ou está desatualizado (read_summary retorna None);
+    o resultado é gravado de novo com write_summary.
+    """
+    import pandas as pd
+
+    # Última linha de cada arquivo, vinda dos metadados de cabeçalho (as séries não são carregadas);
+    # rótulo -> variável resolvido uma vez pelo store.lookup (alias e caixa)
+    summary = store.latest_summary()
+    last_date = summary["month"]
+    last_date_mjo = summary["daily_date"]
+    last_values = store.lookup(summary["values"], display_order_tab, alias)
+    last_values_mjo = store.lookup(summary["daily_values"], display_order_tab_mjo, alias)
+
+    def get_from_last_values(label: str):
+        """Valor já resolvido para o rótulo da tabela, ou "-" se o índice não tem o mês mais recente."""
+        val = last_values.get(label)
+        return "-" if pd.isna(val) else val
+
+    def get_from_last_values_mjo(label: str):
+        """Último valor diário já resolvido para o rótulo da tabela da MJO, ou "-"."""
+        val = last_values_mjo.get(label)
+        return "-" if pd.isna(val) else val
+
+    # quebra em 3 linhas com 9 colunas cada, mantendo a ordem fixa
+    rows = [display_order_tab[i:i + 9] for i in range(0, len(display_order_tab), 9)]
+    rows_mjo = [display_order_tab_mjo[i:i + 2] for i in range(0, len(display_order_tab_mjo), 2)]
+
+    formatted_date = last_date.strftime("%B %Y") if last_date else "Last month"
+    formatted_date_mjo = last_date_mjo.strftime("%B %dth, %Y") if last_date_mjo else "Last month"
+
+    # bloco HTML
+    html = f"""
+    <div style="background-color:#e3e2e2ff; padding:20px; border-radius:10px; color:black; font-family:monospace; text-align:center;">
+        <h4 style="color:black; margin-bottom:25px;">Indices for {formatted_date}</h4>
+    """
+
+    for row in rows:
+        html += "<table style='width:100%; border-collapse:collapse; margin-bottom:20px;'>"
+        # cabeçalho
+        html += "<tr>" + "".join(
+            f"<th style='padding:6px; font-size:16px; color:black;'>{label}</th>" for label in row
+        ) + "<tr>"
+
+        # valores
+        html += "<tr>"
+        for label in row:
+            val = get_from_last_values(label)
+            if val == "-":
+                color = "black"
+                display_val = "-"
+            else:
+                color = "red" if val > 0 else "blue" if val < 0 else "black"
+                display_val = f"{val:.2f}"
+            html += f"<td style='padding:6px; font-size:16px; font-weight:bold; color:{color};'>{display_val}</td>"
+        html += "</tr></table>"
+
+    html += "</div>"
+
+    html_mjo = f"""
+    <div style="background-color:#e3e2e2ff; padding:20px; border-radius:10px; color:black; font-family:monospace; text-align:center;">
+        <h4 style="color:black; margin-bottom:25px;">Indices for {formatted_date_mjo}</h4>
+    """
+    for row_mjo in rows_mjo:
+        html_mjo += "<table style='width:100%; border-collapse:collapse; margin-bottom:20px;'>"
+        # cabeçalho
+        html_mjo += "<tr>" + "".join(
+            f"<th style='padding:6px; font-size:16px; color:black;'>{label_mjo}</th>" for label_mjo in row_mjo
+        ) + "</tr>"
+
+        # valores
+        html_mjo += "<tr>"
+        for label_mjo in row_mjo:
+            val_mjo = get_from_last_values_mjo(label_mjo)
+            if val_mjo == "-":
+                color = "black"
+                display_val_mjo = "-"
+            else:
+                color = "red" if val_mjo > 0 else "blue" if val_mjo < 0 else "black"
+                display_val_mjo = f"{val_mjo:.2f}"
+            html_mjo += f"<td style='padding:6px; font-size:16px; font-weight:bold; color:{color};'>{display_val_mjo}</td>"
+        html_mjo += "<tr></tr>"
+
+    html_mjo += "</div>"
+
+    return html, html_mjo
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def source_files(dir_dataset, cache_dir, known=None):
+    """{arquivo: {mtime_ns, size, sha256}} da pasta de dados.
+
+    O sha256 vem de `known` ou do manifesto do cache colunar quando mtime e tamanho
+    coincidem; só os demais arquivos são relidos.
+    """
+    manifest = _read_json(Path(cache_dir) / CACHE_MANIFEST) or {}
+    sources = [known or {}, manifest.get("files", {})]
+    files = {}
+    for path in sorted(Path(dir_dataset).glob("*.txt")):
+        stat = path.stat()
+        sha256 = next((
+            source[path.name]["sha256"] for source in sources
+            if source.get(path.name, {}).get("mtime_ns") == stat.st_mtime_ns
+            and source[path.name].get("size") == stat.st_size
+        ), None)
+        if sha256 is None:
+            sha256 = hashlib.sha256(path.read_bytes()).hexdigest()
+        files[path.name] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": sha256}
+    return files
+
+
+def read_summary(path, dir_dataset, cache_dir):
+    """(html, html_mjo) pré-montados, ou None se o arquivo faltar ou os dados tiverem mudado."""
+    summary = _read_json(path)
+    if not summary or summary.get("format") != SUMMARY_FORMAT:
+        return None
+    known = summary.get("files", {})
+    files = source_files(dir_dataset, cache_dir, known)
+    if {name: entry["sha256"] for name, entry in files.items()} != {name: entry.get("sha256") for name, entry in known.items()}:
+        return None
+    return summary["html"], summary["html_mjo"]
+
+
+def write_summary(path, files, html, html_mjo):
+    """Grava o resumo pré-montado (atômico). Retorna False se a pasta não puder ser escrita."""
+    conteudo = json.dumps({
+        "format": SUMMARY_FORMAT,
+        "files": files,
+        "html": html,
+        "html_mjo": html_mjo,
+    }, ensure_ascii=False, indent=1)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(conteudo)
+        os.replace(tmp, path)
+    except OSError:
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    import argparse
+    from index_store import alias, open_index_store
+
+    base_path = Path(__file__).resolve().parent
+    parser = argparse.ArgumentParser(description="Monta o resumo pré-montado da aba Home.")
+    parser.add_argument("--dataset", default=base_path / "dataset", type=Path)
+    parser.add_argument("--cache", default=base_path / ".cache", type=Path)
+    parser.add_argument("--output", default=base_path / SUMMARY_FILE, type=Path)
+    args = parser.parse_args()
+
+    store = open_index_store(args.dataset, args.cache)
+    files = source_files(args.dataset, args.cache)
+    write_summary(args.output, files, *summary_html(store, alias))
+    print(f"✅ Resumo da Home: {args.output}")
@@ -0,0 +1,538 @@
+# Armazenamento dos índices já processados em memória
+#
+# Além do parse direto dos TSVs, a pasta de dados pode ser convertida em um único
+# arquivo colunar (Arrow/Feather, lido via memory-map) com um manifest contendo
+# mtime/tamanho/sha256 de cada arquivo de origem. Apenas os arquivos alterados são
+# re-codificados. Para gerar o cache no build da imagem:
+#
+#     python index_store.py build
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+# Tabela nomeada pela versão do conteúdo: o manifest aponta para ela ("table"), então trocar
+# o manifest (um único os.replace) troca tabela e offsets juntos para todos os leitores
+CACHE_FILE = "indices-{}.arrow"
+MANIFEST_FILE = "manifest.json"
+MANIFEST_FORMAT = 3
+# Manifesto de alterações escrito pelo git_push_auto.py na pasta de dados
+CHANGES_FILE = "changes.json"
+
+# Mapeamento rótulos -> nomes reais nos dados
+alias = {
+    "NINO12": "NIN12",
+    "NINO3":  "NIN03",
+    "NINO34": "NIN34",
+    "NINO4":  "NIN04",
+    "DNI/IOD": "DMI/IOD",
+    "Amplitude MJO": "Amplitude MJO/RMM",
+    "Phase MJO": "Fase MJO/RMM"
+}
+
+# Nomes das variáveis diárias da MJO nos arquivos de dados
+MJO_AMPLITUDE = "Amplitude MJO/RMM"
+MJO_PHASE = "Fase MJO/RMM"
+# Janela padrão da visão diária da MJO (últimos dias)
+MJO_WINDOW_DAYS = 90
+
+
+def is_mjo(var):
+    """Índices da MJO (diários) são exibidos separadamente dos mensais."""
+    return "MJO" in var.upper()
+
+
+def parse_index_file(dataset_path):
+    """Lê um arquivo TSV de índice e retorna (nome da variável, série float64 ordenada por data)."""
+    df = pd.read_csv(dataset_path, sep="\t")
+    var = df.columns[1] if len(df.columns) > 1 else df.columns[0]
+
+    time = pd.to_datetime(df.iloc[:, 0], errors="coerce")
+    if len(df.columns) > 1:
+        values = pd.to_numeric(df.iloc[:, 1], errors="coerce").to_numpy(dtype="float64")
+    else:
+        values = np.full(len(df), np.nan)
+
+    serie = pd.Series(values, index=pd.DatetimeIndex(time, name="time"), name=var)
+    serie = serie[serie.index.notna()].sort_index(kind="stable")
+    return var, serie
+
+
+def series_meta(serie):
+    """Metadados pré-calculados de uma série (datas válidas, contagem e frequência)."""
+    if serie.empty:
+        return dict(EMPTY_META, count=0)
+
+    passo = serie.index.to_series().diff().median()
+    return {
+        "first_date": serie.index[0],
+        "last_date": serie.index[-1],
+        "last_value": float(serie.iloc[-1]),
+        "first_valid": serie.first_valid_index(),
+        "last_valid": serie.last_valid_index(),
+        "count": int(serie.notna().sum()),
+        "freq": _freq(passo),
+    }
+
+
+def _freq(passo):
+    return "D" if pd.notna(passo) and passo <= pd.Timedelta(days=1) else "MS"
+
+
+# Metadados de um índice sem dados (ou ainda não carregado, no caso de count/first_valid/last_valid)
+EMPTY_META = {
+    "first_date": None, "last_date": None, "last_value": np.nan,
+    "first_valid": None, "last_valid": None, "count": None, "freq": None,
+}
+_DATE_KEYS = ("first_date", "last_date", "first_valid", "last_valid")
+
+
+def scan_index_header(dataset_path):
+    """Lê só o cabeçalho, as duas primeiras linhas e a última linha do TSV (sem carregar a série).
+
+    Retorna (nome da variável, metadados de cabeçalho). Assume o arquivo ordenado por data, como
+    são gerados; count/first_valid/last_valid só são conhecidos depois de carregar a série.
+    """
+    with open(dataset_path, "rb") as f:
+        head = [f.readline() for _ in range(3)]
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(0, size - 4096))
+        tail = [line for line in f.read().splitlines() if line.strip()]
+
+    columns = head[0].decode("utf-8").rstrip("\r\n").split("\t")
+    var = columns[1] if len(columns) > 1 else columns[0]
+    rows = [line.decode("utf-8").rstrip("\r\n").split("\t") for line in head[1:] if line.strip()]
+    if not rows:
+        return var, dict(EMPTY_META)
+
+    last = tail[-1].decode("utf-8").split("\t")
+    dates = pd.to_datetime([row[0] for row in rows] + [last[0]], errors="coerce")
+    last_value = pd.to_numeric(last[1] if len(last) > 1 else None, errors="coerce")
+    return var, dict(
+        EMPTY_META,
+        first_date=dates[0],
+        last_date=dates[-1],
+        last_value=float(last_value) if pd.notna(last_value) else np.nan,
+        freq=_freq(dates[1] - dates[0]) if len(rows) > 1 else None,
+    )
+
+
+def _meta_to_json(meta):
+    out = dict(meta)
+    for key in _DATE_KEYS:
+        out[key] = None if out[key] is None or pd.isna(out[key]) else out[key].isoformat()
+    out["last_value"] = None if pd.isna(out["last_value"]) else out["last_value"]
+    return out
+
+
+def _meta_from_json(meta):
+    out = dict(EMPTY_META, **meta)
+    for key in _DATE_KEYS:
+        out[key] = pd.Timestamp(out[key]) if out[key] else None
+    out["last_value"] = np.nan if out["last_value"] is None else out["last_value"]
+    return out
+
+
+def file_sha256(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def dataset_version(hashes):
+    """Hash do conteúdo da pasta inteira, a partir do sha256 de cada arquivo."""
+    digest = hashlib.sha256()
+    for name in sorted(hashes):
+        digest.update(f"{name}:{hashes[name]}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def dataset_fingerprint(dir_dataset):
+    """Assinatura barata (nome, mtime, tamanho) da pasta, usada como chave de cache no app."""
+    fingerprint = []
+    for path in sorted(Path(dir_dataset).glob("*.txt")):
+        stat = path.stat()
+        fingerprint.append((path.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(fingerprint)
+
+
+class IndexStore:
+    """Registro dos índices: metadados de cabeçalho já na abertura, séries carregadas sob demanda.
+
+    Cada série é carregada uma única vez, no primeiro acesso, e compartilhada entre as abas e
+    sessões sem cópias. `registry` mapeia o nome da variável -> (metadados, função de carga).
+    """
+
+    def __init__(self, registry, version=None, hashes=None):
+        self.meta = {var: dict(meta) for var, (meta, _) in registry.items()}
+        self._loaders = {var: loader for var, (_, loader) in registry.items()}
+        self._series = {}
+        self._load_stats = {var: {"loads": 0, "seconds": 0.0} for var in registry}
+        self._lock = threading.RLock()
+        self._lookup = {var.casefold(): var for var in registry}
+        # Versão do conteúdo (sha256) e hash de cada índice, para chaves de cache
+        self.hashes = dict(hashes or {})
+        self.version = version or dataset_version(self.hashes)
+        # Resultados derivados, calculados uma vez por versão do store
+        self._derived = {}
+
+    @classmethod
+    def from_series(cls, series, version=None, hashes=None):
+        """Store a partir de séries já carregadas (ex.: dados sintéticos)."""
+        registry = {var: (series_meta(serie), lambda serie=serie: serie) for var, serie in series.items()}
+        return cls(registry, version=version, hashes=hashes)
+
+    def memo(self, key, compute):
+        """Resultado derivado calculado uma única vez por versão do store (chave hashable)."""
+        if key not in self._derived:
+            with self._lock:
+                if key not in self._derived:
+                    self._derived[key] = compute()
+        return self._derived[key]
+
+    @property
+    def names(self):
+        return sorted(self.meta)
+
+    def __contains__(self, var):
+        return self.resolve(var) is not None
+
+    def resolve(self, label, alias=None):
+        """Retorna o nome real da variável para um rótulo (respeitando alias e case-insensitive)."""
+        key = (alias or {}).get(label, label)
+        if key in self.meta:
+            return key
+        return self._lookup.get(str(key).casefold())
+
+    def series(self, var, alias=None):
+        """Série do índice, carregada no primeiro acesso (não copiar: é compartilhada entre sessões)."""
+        key = self.resolve(var, alias)
+        if key is None:
+            return None
+        serie = self._series.get(key)
+        if serie is None:
+            with self._lock:
+                serie = self._series.get(key)
+                if serie is None:
+                    inicio = time.perf_counter()
+                    serie = self._loaders[key]()
+                    self._load_stats[key]["loads"] += 1
+                    self._load_stats[key]["seconds"] += time.perf_counter() - inicio
+                    self.meta[key].update(series_meta(serie))
+                    self._series[key] = serie
+        return serie
+
+    def stats(self):
+        """Contagem e tempo das cargas de cada índice (para diagnóstico)."""
+        return {
+            "indices": len(self.meta),
+            "loaded": len(self._series),
+            "loads": sum(stat["loads"] for stat in self._load_stats.values()),
+            "seconds": sum(stat["seconds"] for stat in self._load_stats.values()),
+            "per_index": {var: dict(stat) for var, stat in self._load_stats.items()},
+        }
+
+    def frame(self, var, alias=None, value_name="value"):
+        """DataFrame com colunas (time, valor), no formato usado para download."""
+        serie = self.series(var, alias)
+        if serie is None:
+            return None
+        return serie.rename(value_name).reset_index()
+
+    def monthly_matrix(self):
+        """Matriz mês × índice (PeriodIndex mensal, uma coluna float64 por índice mensal)."""
+        return self.memo("monthly_matrix", self._build_monthly_matrix)
+
+    def _build_monthly_matrix(self):
+        columns = {}
+        for var in self.names:
+            if is_mjo(var) or self.meta[var]["freq"] != "MS":
+                continue
+            serie = self.series(var)
+            months = serie.index.to_period("M")
+            keep = ~months.duplicated(keep="last")
+            columns[var] = pd.Series(serie.to_numpy()[keep], index=months[keep])
+        matrix = pd.DataFrame(columns, dtype="float64").sort_index()
+        matrix.index.name = "time"
+        return matrix
+
+    def latest_summary(self):
+        """Resumo da aba Home: valores no mês mais recente e últimos valores diários da MJO."""
+        return self.memo("latest_summary", self._build_latest_summary)
+
+    def _build_latest_summary(self):
+        # Usa apenas a última linha de cada arquivo (metadados de cabeçalho): não carrega as séries
+        monthly = [var for var in self.names if not is_mjo(var) and self.meta[var]["freq"] == "MS"]
+        months = pd.DatetimeIndex([self.meta[var]["last_date"] for var in monthly]).to_period("M")
+        last_values = np.array([self.meta[var]["last_value"] for var in monthly], dtype="float64")
+        latest_month = months.max() if len(months) else None
+        if latest_month is not None and pd.isna(latest_month):
+            latest_month = None
+        # Só aparece o índice cuja última linha é exatamente o mês mais recente
+        values = pd.Series(np.where(months == latest_month, last_values, np.nan), index=monthly).round(2)
+
+        daily = [var for var in self.names if is_mjo(var) and self.meta[var]["last_date"] is not None]
+        daily_values = pd.Series({var: self.meta[var]["last_value"] for var in daily}, dtype="float64").round(2)
+        return {
+            "month": latest_month.to_timestamp() if latest_month is not None else None,
+            "values": values,
+            "daily_date": max((self.meta[var]["last_date"] for var in daily), default=None),
+            "daily_values": daily_values,
+        }
+
+    def lookup(self, values, labels, alias=None):
+        """Seleciona, na ordem dos rótulos, os valores de uma série indexada pelo nome da variável."""
+        return pd.Series(
+            values.reindex([self.resolve(label, alias) for label in labels]).to_numpy(),
+            index=labels
+        )
+
+    def mjo_frame(self):
+        """Amplitude e fase diárias da MJO alinhadas por data (None se faltar algum dos arquivos)."""
+        return self.memo("mjo_frame", self._build_mjo_frame)
+
+    def _build_mjo_frame(self):
+        amplitude = self.series(MJO_AMPLITUDE)
+        phase = self.series(MJO_PHASE)
+        if amplitude is None or phase is None:
+            return None
+
+        df = pd.concat({"amplitude": amplitude, "phase": phase}, axis=1, join="outer")
+        # mjo_window recorta por busca binária: o índice precisa estar ordenado
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index(kind="stable")
+        df["phase"] = integer_phase(df["phase"])
+        return df
+
+    def mjo_window(self, days=MJO_WINDOW_DAYS, end=None):
+        """Amplitude e fase da MJO nos últimos `days` dias até `end` (padrão: o último dia).
+
+        Busca binária (searchsorted) no índice diário ordenado: o resultado é uma fatia do
+        mjo_frame compartilhado, sem cópia (não modificar). days=None vai desde o início.
+        """
+        df = self.mjo_frame()
+        if df is None or df.empty:
+            return df
+        index = df.index
+        stop = len(index) if end is None else index.searchsorted(pd.Timestamp(end), side="right")
+        start = 0
+        if days is not None and stop > 0:
+            start = index.searchsorted(index[stop - 1] - pd.Timedelta(days=days - 1), side="left")
+        return df.iloc[start:stop]
+
+
+def integer_phase(values):
+    """A fase da MJO é categórica (1-8): inteiros (Int64) quando todos os valores válidos são inteiros."""
+    valid = values.dropna()
+    if (valid == valid.round()).all():
+        return values.astype("Int64")
+    return values
+
+
+def build_index_store(dir_dataset):
+    """Registro dos arquivos *.txt da pasta lendo só os cabeçalhos; as séries são parseadas no primeiro acesso.
+
+    Sem o cache colunar não há sha256 do conteúdo: a versão usa (nome, mtime, tamanho) de cada arquivo.
+    """
+    registry = {}
+    hashes = {}
+    file_hashes = {}
+    for dataset_path in sorted(Path(dir_dataset).glob("*.txt")):
+        var, meta = scan_index_header(dataset_path)
+        registry[var] = (meta, lambda path=dataset_path: parse_index_file(path)[1])
+        stat = dataset_path.stat()
+        hashes[var] = file_hashes[dataset_path.name] = f"{stat.st_mtime_ns}-{stat.st_size}"
+    return IndexStore(registry, version=dataset_version(file_hashes), hashes=hashes)
+
+
+# ======================
+# CACHE COLUNAR (Arrow/Feather)
+# ======================
+
+def _read_manifest(cache_dir):
+    try:
+        with open(Path(cache_dir) / MANIFEST_FILE, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if manifest.get("format") == MANIFEST_FORMAT else {}
+
+
+def _write_atomic(path, write):
+    """Escreve em um arquivo temporário e troca com os.replace (leitores nunca veem arquivo parcial)."""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _read_changes(dir_dataset):
+    try:
+        with open(Path(dir_dataset) / CHANGES_FILE, encoding="utf-8") as f:
+            return json.load(f).get("files", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def _scan_sources(dir_dataset, old_files):
+    """Stat de cada arquivo; o sha256 só é recalculado quando mtime ou tamanho mudaram.
+
+    Se o manifesto de alterações da sincronização já traz o sha256 do arquivo com o mesmo
+    mtime/tamanho, ele é reutilizado em vez de reler o arquivo.
+    """
+    changes = _read_changes(dir_dataset)
+    entries = {}
+    for path in sorted(Path(dir_dataset).glob("*.txt")):
+        stat = path.stat()
+        old = old_files.get(path.name, {})
+        change = changes.get(path.name, {})
+        if old.get("mtime_ns") == stat.st_mtime_ns and old.get("size") == stat.st_size:
+            sha256 = old["sha256"]
+        elif change.get("sha256") and change.get("mtime_ns") == stat.st_mtime_ns and change.get("size") == stat.st_size:
+            sha256 = change["sha256"]
+        else:
+            sha256 = file_sha256(path)
+        entries[path.name] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": sha256}
+    return entries
+
+
+def _open_table(cache_dir, manifest):
+    """Tabela para a qual o manifest aponta (None se faltar)."""
+    from pyarrow import feather
+    try:
+        return feather.read_table(Path(cache_dir) / manifest["table"], memory_map=True)
+    except (KeyError, OSError, ValueError):
+        return None
+
+
+def _remove_old_tables(cache_dir, keep):
+    """Apaga as tabelas que nenhum dos manifests em `keep` usa.
+
+    A tabela do manifest anterior fica: uma réplica que acabou de ler o manifest antigo ainda
+    consegue abri-la (quem já a mapeou em memória não é afetado pela remoção).
+    """
+    for path in Path(cache_dir).glob(CACHE_FILE.format("*")):
+        if path.name not in keep:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def build_cache(dir_dataset, cache_dir):
+    """Atualiza o cache colunar, re-codificando apenas os arquivos que mudaram.
+
+    Retorna (manifest, tabela Arrow mapeada em memória).
+    """
+    import pyarrow as pa
+    from pyarrow import feather
+
+    cache_dir = Path(cache_dir)
+    manifest = _read_manifest(cache_dir)
+    old_files = manifest.get("files", {})
+    entries = _scan_sources(dir_dataset, old_files)
+    table = _open_table(cache_dir, manifest) if manifest else None
+
+    changed = {
+        name for name, entry in entries.items()
+        if table is None or old_files.get(name, {}).get("sha256") != entry["sha256"]
+    }
+    if table is not None and not changed and set(entries) == set(old_files):
+        # Conteúdo idêntico (ex.: checkout novo alterou apenas o mtime): só atualiza o manifest
+        if any(old_files[name]["mtime_ns"] != entry["mtime_ns"] for name, entry in entries.items()):
+            for name, entry in entries.items():
+                old_files[name].update(entry)
+            _write_manifest(cache_dir, manifest)
+        return manifest, table
+
+    pieces = []
+    offset = 0
+    for name, entry in entries.items():
+        if name in changed:
+            var, serie = parse_index_file(Path(dir_dataset) / name)
+            piece = pa.table({"time": serie.index.values, "value": serie.to_numpy()})
+            meta = _meta_to_json(series_meta(serie))
+        else:
+            var, meta = old_files[name]["var"], old_files[name]["meta"]
+            piece = table.slice(old_files[name]["offset"], old_files[name]["length"])
+        entry.update(var=var, offset=offset, length=piece.num_rows, meta=meta)
+        offset += piece.num_rows
+        pieces.append(piece)
+
+    schema = pa.schema([("time", pa.timestamp("ns")), ("value", pa.float64())])
+    new_table = pa.concat_tables([piece.cast(schema) for piece in pieces]) if pieces else schema.empty_table()
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    version = dataset_version({name: entry["sha256"] for name, entry in entries.items()})
+    # A tabela é escrita antes e com nome próprio; só a troca do manifest a torna visível
+    table_name = CACHE_FILE.format(version[:16])
+    _write_atomic(
+        cache_dir / table_name,
+        lambda tmp: feather.write_feather(new_table.combine_chunks(), tmp, compression="uncompressed")
+    )
+    previous = manifest.get("table")
+    manifest = {"format": MANIFEST_FORMAT, "version": version, "table": table_name, "files": entries}
+    _write_manifest(cache_dir, manifest)
+    _remove_old_tables(cache_dir, {table_name, previous})
+    return manifest, _open_table(cache_dir, manifest)
+
+
+def _write_manifest(cache_dir, manifest):
+    def write(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+    _write_atomic(Path(cache_dir) / MANIFEST_FILE, write)
+
+
+def _column_view(column):
+    """Array numpy sobre a coluna Arrow, sem cópia quando possível (um bloco, sem nulos).
+
+    A visão é somente leitura e aponta para o arquivo mapeado em memória: processos que
+    abrem o mesmo cache compartilham as páginas em vez de ter cada um a sua cópia.
+    """
+    if column.num_chunks == 1 and column.null_count == 0:
+        return column.chunk(0).to_numpy(zero_copy_only=True)
+    return column.to_numpy()
+
+
+def _slice_loader(table, entry):
+    """Função que materializa a série de um índice a partir da tabela mapeada em memória."""
+    def load():
+        piece = table.slice(entry["offset"], entry["length"])
+        times = _column_view(piece.column("time"))
+        values = _column_view(piece.column("value"))
+        return pd.Series(values, index=pd.DatetimeIndex(times, name="time", copy=False), name=entry["var"], copy=False)
+    return load
+
+
+def open_index_store(dir_dataset, cache_dir):
+    """Monta o registro de índices a partir do cache colunar (atualizando-o se necessário).
+
+    Os metadados vêm do manifest; o corpo de cada série só é lido da tabela no primeiro acesso.
+    Sem pyarrow, ou se o cache não puder ser escrito, volta aos TSVs (também sob demanda).
+    """
+    try:
+        manifest, table = build_cache(dir_dataset, cache_dir)
+    except (ImportError, OSError):
+        return build_index_store(dir_dataset)
+
+    registry = {}
+    hashes = {}
+    for entry in manifest["files"].values():
+        registry[entry["var"]] = (_meta_from_json(entry["meta"]), _slice_loader(table, entry))
+        hashes[entry["var"]] = entry["sha256"]
+    return IndexStore(registry, version=manifest["version"], hashes=hashes)
+
+
+if __name__ == "__main__":
+    base_path = Path(__file__).resolve().parent
+    parser = argparse.ArgumentParser(description="Cache colunar dos índices.")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--dataset", default=base_path / "dataset", type=Path)
+    parser.add_argument("--cache", default=base_path / ".cache", type=Path)
+    args = parser.parse_args()
+
+    manifest, _ = build_cache(args.dataset, args.cache)
+    print(f"✅ Cache atualizado: {len(manifest['files'])} arquivos, versão {manifest['version'][:12]}")
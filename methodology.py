@@ -0,0 +1,125 @@
+# Catálogo das metodologias (Metodologias.xlsx compilado em JSON)
+#
+# A planilha é convertida uma vez (na atualização dos dados, pelo git_push_auto.py, ou com
+# `python methodology.py`) em um JSON pequeno, já normalizado e com o símbolo de grau
+# corrigido. O app só lê o JSON: nada de openpyxl/Excel a cada processo novo. Se o JSON
+# faltar ou estiver desatualizado em relação à planilha, ele é recompilado (import tardio
+# do pandas/openpyxl).
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+import re
+from index_store import alias
+
+CATALOG_FORMAT = 1
+EXCEL_FILE = "Metodologias.xlsx"
+CATALOG_FILE = "Metodologias.json"
+
+# Coluna da planilha -> campo do catálogo
+COLUMNS = {
+    "Index": "index",
+    "Unit": "unit",
+    "Index_Unit": "index_unit",
+    "Name_Index": "name",
+    "Methodology": "methodology",
+    "Access": "access",
+    "Reference": "reference",
+}
+
+
+def normalize(name):
+    """Chave de busca: sem espaços nas pontas e em minúsculas (como Index_normalizado)."""
+    return str(name).strip().lower()
+
+
+def corrigir_simbolo_grau(texto):
+    """Troca o 'o' usado como grau na planilha (ex.: 20oS) pelo símbolo °."""
+    return re.sub(r'(?<=\d)o(?=[A-Za-z-])', '°', texto)
+
+
+def file_sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def compile_catalog(excel_path):
+    """Lê a planilha (pandas/openpyxl) e monta o catálogo {entries, aliases}."""
+    import pandas as pd
+
+    df = pd.read_excel(excel_path)
+    entries = {}
+    for row in df.to_dict("records"):
+        entry = {field: str(row.get(column, "")).strip() for column, field in COLUMNS.items()}
+        entry["methodology"] = corrigir_simbolo_grau(entry["methodology"])
+        entries[normalize(row["Index"])] = entry
+
+    # Rótulos exibidos no app (ex.: NINO34) -> nome da variável nos dados (ex.: NIN34)
+    aliases = {
+        normalize(label): normalize(var) for label, var in alias.items()
+        if normalize(var) in entries and normalize(label) not in entries
+    }
+    return {
+        "format": CATALOG_FORMAT,
+        "source_sha256": file_sha256(excel_path),
+        "entries": entries,
+        "aliases": aliases,
+    }
+
+
+def write_catalog(excel_path, catalog_path):
+    """Compila a planilha e grava o JSON (só se o conteúdo mudou). Retorna o catálogo."""
+    catalog = compile_catalog(excel_path)
+    conteudo = json.dumps(catalog, ensure_ascii=False, indent=1).encode("utf-8")
+    try:
+        with open(catalog_path, "rb") as f:
+            if f.read() == conteudo:
+                return catalog
+    except OSError:
+        pass
+    tmp = f"{catalog_path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(conteudo)
+    os.replace(tmp, catalog_path)
+    return catalog
+
+
+def load_catalog(excel_path, catalog_path):
+    """Catálogo compilado; recompila a partir da planilha se o JSON faltar ou estiver desatualizado."""
+    try:
+        with open(catalog_path, encoding="utf-8") as f:
+            catalog = json.load(f)
+    except (OSError, ValueError):
+        catalog = None
+
+    if Path(excel_path).is_file():
+        stale = (
+            catalog is None
+            or catalog.get("format") != CATALOG_FORMAT
+            or catalog.get("source_sha256") != file_sha256(excel_path)
+        )
+        if stale:
+            try:
+                catalog = write_catalog(excel_path, catalog_path)
+            except OSError:
+                catalog = compile_catalog(excel_path)
+    return catalog or {"format": CATALOG_FORMAT, "entries": {}, "aliases": {}}
+
+
+def lookup(catalog, name):
+    """Metodologia de um índice pelo nome da variável ou pelo rótulo exibido (None se não houver)."""
+    key = normalize(name)
+    entries = catalog["entries"]
+    return entries.get(key) or entries.get(catalog["aliases"].get(key))
+
+
+if __name__ == "__main__":
+    base_path = Path(__file__).resolve().parent
+    parser = argparse.ArgumentParser(description="Compila Metodologias.xlsx em JSON.")
+    parser.add_argument("--excel", default=base_path / EXCEL_FILE, type=Path)
+    parser.add_argument("--output", default=base_path / CATALOG_FILE, type=Path)
+    args = parser.parse_args()
+
+    catalog = write_catalog(args.excel, args.output)
+    print(f"✅ Catálogo de metodologias: {len(catalog['entries'])} índices em {args.output}")
@@ -0,0 +1,260 @@
+# Instrumentação do app: tempo de cada etapa, acertos/erros dos caches e reruns por sessão
+#
+# Tudo fica em um registro em memória do processo (compartilhado entre sessões) e é exposto
+# no formato texto do Prometheus:
+#   - pelo servidor embutido, se APP_INDEX_METRICS_PORT estiver definida (GET /metrics);
+#   - pela rota /metrics do api_server.py;
+#   - e no painel de depuração da barra lateral (APP_INDEX_DEBUG=1 ou ?debug=1 na URL).
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import contextmanager
+import functools
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import threading
+import time
+
+# Limites (s) dos histogramas de tempo
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Limites do histograma de reruns por sessão
+RERUN_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+# Sessões lembradas para a contagem de reruns (as mais antigas são descartadas)
+MAX_SESSIONS = 1000
+
+METRICS_PORT_ENV = "APP_INDEX_METRICS_PORT"
+DEBUG_ENV = "APP_INDEX_DEBUG"
+
+HELP = {
+    "app_stage_seconds": ("histogram", "Tempo de cada etapa do script (spans)."),
+    "app_rerun_seconds": ("histogram", "Tempo total de cada rerun (scope=script para a página inteira, scope=fragment:<nome> para um fragmento)."),
+    "app_first_paint_seconds": ("histogram", "Tempo do início do script até o resumo da Home ser enviado (run=cold no primeiro rerun do processo)."),
+    "app_reruns_total": ("counter", "Reruns do script e dos fragmentos, por scope."),
+    "app_sessions": ("gauge", "Sessões vistas (limitado a MAX_SESSIONS)."),
+    "app_session_reruns": ("histogram", "Reruns por sessão."),
+    "app_cache_requests_total": ("counter", "Chamadas das funções com cache."),
+    "app_cache_hits_total": ("counter", "Chamadas respondidas pelo cache."),
+    "app_cache_misses_total": ("counter", "Chamadas que executaram a função (cache vazio)."),
+    "app_shared_cache_requests_total": ("counter", "Leituras do cache compartilhado em disco (shared_cache)."),
+    "app_shared_cache_misses_total": ("counter", "Produtos calculados por não estarem no cache compartilhado."),
+    "api_request_seconds": ("histogram", "Tempo de resposta da API por rota."),
+}
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+class Registry:
+    """Contadores e histogramas (thread-safe), indexados por (nome, rótulos)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.sessions = OrderedDict()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=BUCKETS, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = {"buckets": buckets, "counts": [0] * (len(buckets) + 1), "sum": 0.0, "count": 0}
+            hist["counts"][bisect_left(buckets, value)] += 1
+            hist["sum"] += value
+            hist["count"] += 1
+
+    def session_rerun(self, session_id, scope="script"):
+        """Conta um rerun da sessão (página inteira ou fragmento) e retorna o total de reruns dela."""
+        with self._lock:
+            count = self.sessions.pop(session_id, 0) + 1
+            self.sessions[session_id] = count
+            while len(self.sessions) > MAX_SESSIONS:
+                self.sessions.popitem(last=False)
+        self.inc("app_reruns_total", scope=scope)
+        return count
+
+    def cache_stats(self):
+        """{cache: (chamadas, erros)} para o painel de depuração."""
+        with self._lock:
+            stats = {}
+            for (name, labels), value in self.counters.items():
+                if name in ("app_cache_requests_total", "app_cache_misses_total"):
+                    cache = dict(labels)["cache"]
+                    requests, misses = stats.get(cache, (0, 0))
+                    stats[cache] = (value, misses) if name == "app_cache_requests_total" else (requests, value)
+            return stats
+
+    def exposition(self):
+        """Texto no formato de exposição do Prometheus (text/plain; version=0.0.4)."""
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = {key: {**hist, "counts": list(hist["counts"])} for key, hist in self.histograms.items()}
+            sessions = list(self.sessions.values())
+
+        # Acertos derivados: chamadas - erros
+        for (name, labels), value in list(counters.items()):
+            if name == "app_cache_requests_total":
+                counters[("app_cache_hits_total", labels)] = value - counters.get(("app_cache_misses_total", labels), 0)
+        # Histograma de reruns por sessão, montado a partir das contagens atuais
+        if sessions:
+            counts = [0] * (len(RERUN_BUCKETS) + 1)
+            for count in sessions:
+                counts[bisect_left(RERUN_BUCKETS, count)] += 1
+            histograms[("app_session_reruns", ())] = {
+                "buckets": RERUN_BUCKETS, "counts": counts, "sum": float(sum(sessions)), "count": len(sessions)
+            }
+        gauges = {("app_sessions", ()): len(sessions)}
+
+        lines = []
+        for name in sorted({name for name, _ in list(counters) + list(histograms) + list(gauges)}):
+            kind, text = HELP.get(name, ("untyped", name))
+            lines += [f"# HELP {name} {text}", f"# TYPE {name} {kind}"]
+            for (metric, labels), value in sorted({**counters, **gauges}.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+            for (metric, labels), hist in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(list(hist["buckets"]) + ["+Inf"], hist["counts"]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {hist['sum']}")
+                lines.append(f"{name}_count{_format_labels(labels)} {hist['count']}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Spans do rerun em andamento (cada sessão do Streamlit roda o script em sua própria thread)
+_local = threading.local()
+# Marcada na primeira pintura do processo
+_painted = threading.Event()
+_painted_lock = threading.Lock()
+
+
+@contextmanager
+def span(stage, registry=REGISTRY):
+    """Mede o bloco e registra em app_stage_seconds{stage=...} (e no rerun em andamento)."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - inicio
+        registry.observe("app_stage_seconds", elapsed, stage=stage)
+        spans = getattr(_local, "spans", None)
+        if spans is not None:
+            spans.append((stage, elapsed))
+
+
+def begin_rerun(session_id, registry=REGISTRY, scope="script"):
+    """Início do script (ou de um fragmento, scope="fragment:<nome>"): conta o rerun da sessão
+    e passa a coletar os spans. Retorna o total da sessão."""
+    _local.spans = []
+    _local.start = time.perf_counter()
+    _local.scope = scope
+    return registry.session_rerun(session_id, scope)
+
+
+def rerun_in_progress():
+    """Há um rerun sendo medido nesta thread? (um fragmento chamado durante o script completo entra nele)"""
+    return getattr(_local, "start", None) is not None
+
+
+def first_paint(registry=REGISTRY):
+    """Resumo da Home enviado: registra app_first_paint_seconds desde o início do rerun.
+
+    O primeiro rerun do processo (partida a frio, com as importações pesadas) recebe run="cold".
+    """
+    start = getattr(_local, "start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    with _painted_lock:
+        run = "warm" if _painted.is_set() else "cold"
+        _painted.set()
+    registry.observe("app_first_paint_seconds", elapsed, run=run)
+    _local.spans.append(("first_paint", elapsed))
+
+
+def end_rerun(registry=REGISTRY):
+    """Fim do script ou do fragmento: registra o tempo total e retorna os spans coletados [(etapa, segundos)]."""
+    spans = getattr(_local, "spans", None) or []
+    start = getattr(_local, "start", None)
+    if start is not None:
+        registry.observe("app_rerun_seconds", time.perf_counter() - start, scope=_local.scope)
+    _local.spans = _local.start = _local.scope = None
+    return spans
+
+
+def tracked(name, cache, registry=REGISTRY):
+    """Aplica o decorador de cache do Streamlit contando chamadas e erros (cache misses).
+
+        @tracked("monthly_figure", st.cache_resource(max_entries=64))
+        def get_monthly_figure(...): ...
+
+    A função interna só roda quando o cache não tem o resultado; a externa roda sempre.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def miss(*args, **kwargs):
+            registry.inc("app_cache_misses_total", cache=name)
+            return func(*args, **kwargs)
+
+        cached = cache(miss)
+
+        @functools.wraps(func)
+        def call(*args, **kwargs):
+            registry.inc("app_cache_requests_total", cache=name)
+            return cached(*args, **kwargs)
+
+        call.clear = cached.clear
+        return call
+    return decorate
+
+
+def debug_enabled(query_params=None):
+    if os.environ.get(DEBUG_ENV, "").lower() in ("1", "true", "yes"):
+        return True
+    return bool(query_params) and query_params.get("debug") in ("1", "true")
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0].rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.exposition().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Sem log por requisição (o Prometheus consulta a cada poucos segundos)
+        pass
+
+
+def start_metrics_server(port=None, host="0.0.0.0"):
+    """Sobe o servidor /metrics em uma thread (porta da variável APP_INDEX_METRICS_PORT); None se não definida."""
+    port = port if port is not None else os.environ.get(METRICS_PORT_ENV)
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host, int(port)), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
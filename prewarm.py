@@ -0,0 +1,65 @@
+# Pré-aquecimento do cache compartilhado logo após a atualização mensal dos dados
+#
+# Atualiza o cache colunar, grava o resumo pré-montado da Home e codifica os downloads
+# (índices, MJO, catálogos de eventos e pacotes ZIP em todos os formatos disponíveis), de
+# modo que o primeiro usuário de cada réplica já encontre tudo pronto:
+#
+#     python prewarm.py               # uma vez (o git_push_auto.py chama após a sincronização)
+#     python prewarm.py --watch 300   # junto das réplicas: confere a pasta a cada 5 minutos
+import argparse
+from pathlib import Path
+import time
+from events import event_catalog
+from exports import FORMATS, available_formats
+from home_summary import SUMMARY_FILE, source_files, summary_html, write_summary
+from index_store import alias, dataset_fingerprint, open_index_store
+import products
+from shared_cache import MAX_AGE_DAYS, SharedCache, cache_root
+
+
+def prewarm(dir_dataset, root, max_age_days=MAX_AGE_DAYS):
+    """Preenche o cache em `root` para os dados atuais. Retorna o store aberto."""
+    inicio = time.perf_counter()
+    root = Path(root)
+    store = open_index_store(dir_dataset, root)
+    shared = SharedCache(root)
+
+    write_summary(root / SUMMARY_FILE, source_files(dir_dataset, root), *summary_html(store, alias))
+
+    exts = [FORMATS[label][0] for label in available_formats()]
+    eventos = event_catalog(store)
+    for ext in exts:
+        for var in store.names:
+            products.index_download(shared, store, var, ext)
+            if var in eventos:
+                products.events_download(shared, store, var, ext)
+        for column, var in products.MJO_COLUMNS.items():
+            if var in store:
+                products.mjo_download(shared, store, column, ext)
+        products.catalog_download(shared, store, ext)
+        products.bundle(shared, store, ext)
+
+    removed = shared.prune(max_age_days)
+    print(f"🔥 Cache pré-aquecido em {root} ({len(store.names)} índices, {len(exts)} formatos, "
+          f"{removed} produtos antigos apagados) em {time.perf_counter() - inicio:.1f} s")
+    return store
+
+
+if __name__ == "__main__":
+    base_path = Path(__file__).resolve().parent
+    parser = argparse.ArgumentParser(description="Pré-aquece o cache compartilhado do app.")
+    parser.add_argument("--dataset", default=base_path / "dataset", type=Path)
+    parser.add_argument("--cache", default=cache_root(base_path), type=Path)
+    parser.add_argument("--max-age-days", default=MAX_AGE_DAYS, type=int)
+    parser.add_argument("--watch", type=float, metavar="SEGUNDOS",
+                        help="Fica rodando e pré-aquece de novo sempre que a pasta de dados mudar.")
+    args = parser.parse_args()
+
+    fingerprint = dataset_fingerprint(args.dataset)
+    prewarm(args.dataset, args.cache, args.max_age_days)
+    while args.watch:
+        time.sleep(args.watch)
+        atual = dataset_fingerprint(args.dataset)
+        if atual != fingerprint:
+            fingerprint = atual
+            prewarm(args.dataset, args.cache, args.max_age_days)
@@ -0,0 +1,66 @@
+# Produtos em bytes servidos pelo app (downloads, pacotes ZIP e catálogos de eventos)
+#
+# Cada função monta a chave a partir do hash do conteúdo dos dados e passa pelo cache
+# compartilhado (shared_cache.SharedCache): o app e o prewarm.py usam as mesmas chaves.
+from aggregation import aggregate, rebaseline
+from events import catalog_frame, event_catalog
+from exports import build_bundle, encode_frame, member_name
+from index_store import MJO_AMPLITUDE, MJO_PHASE, integer_phase
+
+# Versão do formato dos produtos, parte de todas as chaves: o volume compartilhado sobrevive
+# às réplicas, então uma mudança na codificação (encode_frame, colunas, esquema do Parquet,
+# conteúdo do ZIP) precisa incrementá-la para que as réplicas não sirvam os bytes antigos
+# (que deixam de ser lidos e o prune apaga depois de MAX_AGE_DAYS).
+PRODUCTS_FORMAT = 2
+
+# Coluna do download da MJO -> arquivo de origem
+MJO_COLUMNS = {"amplitude": MJO_AMPLITUDE, "phase": MJO_PHASE}
+
+
+def _get(shared, namespace, key, compute):
+    return shared.get(namespace, (PRODUCTS_FORMAT,) + key, compute)
+
+
+def index_download(shared, store, var, ext):
+    return _get(shared, "download", (var, store.hashes.get(var), ext), lambda: encode_frame(store.frame(var), ext))
+
+
+def mjo_download(shared, store, column, ext):
+    """Amplitude ou fase com as datas do próprio arquivo (o mjo_frame, com as duas alinhadas, é só para o diagrama)."""
+    var = MJO_COLUMNS[column]
+
+    def compute():
+        df = store.frame(var, value_name=column)
+        if column == "phase":
+            df[column] = integer_phase(df[column])
+        return encode_frame(df, ext)
+    return _get(shared, "mjo_download", (column, store.hashes.get(var), ext), compute)
+
+
+def aggregate_download(shared, store, var, method, param, ext, base=None, padronizar=False):
+    return _get(
+        shared, "aggregate_download", (var, store.hashes.get(var), method, param, ext, base, padronizar),
+        lambda: encode_frame(aggregate(store, var, method, param, base, padronizar).reset_index(), ext)
+    )
+
+
+def rebaselined_download(shared, store, var, base, padronizar, ext):
+    return _get(
+        shared, "rebaselined_download", (var, store.hashes.get(var), base, padronizar, ext),
+        lambda: encode_frame(rebaseline(store, var, base, padronizar).rename("value").reset_index(), ext)
+    )
+
+
+def events_download(shared, store, var, ext):
+    return _get(shared, "events_download", (var, store.hashes.get(var), ext), lambda: encode_frame(event_catalog(store)[var], ext))
+
+
+def catalog_download(shared, store, ext):
+    return _get(shared, "catalog_download", (store.version, ext), lambda: encode_frame(catalog_frame(store), ext))
+
+
+def bundle(shared, store, ext):
+    """Pacote com todos os índices, montado a partir dos arquivos já codificados."""
+    def compute():
+        return build_bundle({member_name(var, ext): index_download(shared, store, var, ext) for var in store.names})
+    return _get(shared, "bundle", (store.version, ext), compute)
@@ -0,0 +1,94 @@
+# Cache compartilhado entre processos (várias réplicas do app atrás de um balanceador)
+#
+# Fica no diretório apontado por APP_INDEX_SHARED_CACHE (um volume comum às réplicas) ou,
+# por padrão, na pasta .cache do projeto (réplicas no mesmo host). Guarda:
+#   - o cache colunar dos índices (index_store: indices-<versão>.arrow + manifest.json), aberto com
+#     mmap: as séries são visões sem cópia sobre o arquivo e as páginas ficam uma única vez
+#     no cache do sistema operacional, para todas as réplicas do host;
+#   - o resumo pré-montado da Home (home_summary.json);
+#   - os produtos em bytes (downloads, pacotes ZIP, catálogos de eventos) em products/,
+#     endereçados pelo sha256 da chave, que inclui o hash do conteúdo dos dados: uma versão
+#     nova dos dados gera chaves novas, sem invalidação entre réplicas.
+# O prewarm.py preenche o cache logo após a atualização mensal dos dados.
+import hashlib
+import os
+from pathlib import Path
+import time
+from metrics import REGISTRY
+
+SHARED_CACHE_ENV = "APP_INDEX_SHARED_CACHE"
+PRODUCTS_DIR = "products"
+# Produtos não usados (lidos ou gravados) há mais tempo que isso são apagados pelo prewarm
+MAX_AGE_DAYS = 62
+# Um acesso renova o mtime do produto no máximo uma vez nesse intervalo (s), para não
+# gravar metadados no volume a cada leitura
+TOUCH_INTERVAL = 86400
+
+
+def cache_root(base_path):
+    """Diretório do cache: APP_INDEX_SHARED_CACHE ou <projeto>/.cache."""
+    return Path(os.environ.get(SHARED_CACHE_ENV) or Path(base_path) / ".cache")
+
+
+class SharedCache:
+    """Bytes endereçados por conteúdo em disco, lidos por todos os processos que apontam para o mesmo diretório.
+
+    A escrita é atômica (arquivo temporário + os.replace), então réplicas calculando a mesma
+    chave ao mesmo tempo só desperdiçam trabalho. Num volume somente leitura o cache apenas
+    calcula (sem gravar).
+    """
+
+    def __init__(self, root, registry=REGISTRY):
+        self.root = Path(root) / PRODUCTS_DIR
+        self.registry = registry
+
+    def path(self, namespace, key):
+        digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+        return self.root / namespace / digest[:2] / digest
+
+    def get(self, namespace, key, compute):
+        """Bytes da chave: lidos do disco ou calculados por `compute()` e gravados."""
+        path = self.path(namespace, key)
+        self.registry.inc("app_shared_cache_requests_total", namespace=namespace)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            pass
+        else:
+            self.touch(path)
+            return data
+        self.registry.inc("app_shared_cache_misses_total", namespace=namespace)
+        data = compute()
+        self.put(path, data)
+        return data
+
+    def put(self, path, data):
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        except OSError:
+            return False
+        return True
+
+    def touch(self, path):
+        """Renova o mtime (último uso) do produto, que o prune usa como idade."""
+        try:
+            if path.stat().st_mtime < time.time() - TOUCH_INTERVAL:
+                os.utime(path)
+        except OSError:
+            pass
+
+    def prune(self, max_age_days=MAX_AGE_DAYS):
+        """Apaga os produtos sem uso há mais de `max_age_days` dias. Retorna quantos foram apagados."""
+        limite = time.time() - max_age_days * 86400
+        removed = 0
+        for path in self.root.glob("*/*/*"):
+            try:
+                if path.stat().st_mtime < limite:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                pass
+        return removed
@@ -0,0 +1,91 @@
+# Médias móveis, médias sazonais e reamostragem (aggregation.py) comparadas com o pandas
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from aggregation import DAILY_AGGREGATIONS, MONTHLY_AGGREGATIONS, aggregate, rolling_stats, seasonal_means  # noqa: E402
+from index_store import MJO_AMPLITUDE, IndexStore  # noqa: E402
+
+
+def monthly_serie(seed=0, years=20):
+    """Série mensal com meses NaN e um mês ausente do arquivo (2005-06)."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("1990-01-01", periods=12 * years, freq="MS", name="time")
+    serie = pd.Series(rng.normal(0.0, 1.0, index.size) + 50.0, index=index, name="AAA")
+    serie.iloc[[7, 30, 31, 100]] = np.nan
+    return serie.drop(pd.Timestamp("2005-06-01"))
+
+
+def store_for(serie):
+    return IndexStore.from_series({serie.name: serie})
+
+
+@pytest.mark.parametrize("window", [3, 12, 60])
+def test_rolling_stats_matches_pandas(window):
+    serie = monthly_serie().asfreq("MS")
+    mean, std, count = rolling_stats(serie.to_numpy(), window)
+    rolling = serie.rolling(window, center=True, min_periods=window)
+
+    np.testing.assert_allclose(mean, rolling.mean().to_numpy(), rtol=0, atol=1e-9)
+    np.testing.assert_allclose(std, rolling.std().to_numpy(), rtol=0, atol=1e-9)
+    # Contagem só conta quando a janela está inteira (o resto já é NaN na média)
+    full = ~np.isnan(mean)
+    assert (count[full] == window).all()
+
+
+@pytest.mark.parametrize("label", [label for label, (method, _) in MONTHLY_AGGREGATIONS.items() if method == "rolling"])
+def test_running_mean_fills_missing_months(label):
+    serie = monthly_serie()
+    _, window = MONTHLY_AGGREGATIONS[label]
+    result = aggregate(store_for(serie), "AAA", "rolling", window)
+
+    # O mês ausente do arquivo entra como NaN: nenhuma janela atravessa a lacuna
+    expected = serie.asfreq("MS").rolling(window, center=True, min_periods=window).mean()
+    assert result.index.equals(expected.index)
+    np.testing.assert_allclose(result["mean"].to_numpy(), expected.to_numpy(), rtol=0, atol=1e-9)
+
+
+def test_seasonal_means_match_pandas_resample():
+    serie = monthly_serie()
+    result = aggregate(store_for(serie), "AAA", "seasonal", None)
+
+    # Referência: trimestres começando em dezembro (DJF, MAM, JJA, SON), só com os 3 meses
+    expected = serie.dropna().resample("QS-DEC").agg(["mean", "std", "count"])
+    expected = expected[expected["count"] == 3]
+    expected.index = expected.index + pd.DateOffset(months=1)  # datada pelo mês central
+
+    assert list(result.index) == list(expected.index)
+    np.testing.assert_allclose(result["mean"].to_numpy(), expected["mean"].to_numpy(), rtol=0, atol=1e-9)
+    np.testing.assert_allclose(result["std"].to_numpy(), expected["std"].to_numpy(), rtol=0, atol=1e-9)
+    seasons = {1: "DJF", 4: "MAM", 7: "JJA", 10: "SON"}
+    assert list(result["season"]) == [seasons[month] for month in expected.index.month]
+
+
+def test_seasonal_means_of_empty_serie():
+    empty = pd.Series([np.nan, np.nan], index=pd.date_range("2000-01-01", periods=2, freq="MS", name="time"))
+    assert seasonal_means(empty).empty
+
+
+@pytest.mark.parametrize("label", list(DAILY_AGGREGATIONS))
+def test_daily_resample_matches_pandas(label):
+    rng = np.random.default_rng(1)
+    index = pd.date_range("2020-01-01", periods=200, freq="D", name="time")
+    serie = pd.Series(np.abs(rng.normal(1.0, 0.5, index.size)), index=index)
+    serie.iloc[10:20] = np.nan
+    store = IndexStore.from_series({MJO_AMPLITUDE: serie})
+
+    method, rule = DAILY_AGGREGATIONS[label]
+    result = aggregate(store, MJO_AMPLITUDE, method, rule)
+    # Semanas sem dado (2020-01-19) ficam como lacuna: média NaN e contagem 0
+    grouped = serie.groupby(pd.Grouper(freq=rule))
+    expected = pd.DataFrame({"mean": grouped.mean(), "count": grouped.count()})
+
+    assert list(result.index) == list(expected.index)
+    np.testing.assert_allclose(result["mean"].to_numpy(), expected["mean"].to_numpy(), rtol=0, atol=1e-12)
+    assert list(result["count"]) == list(expected["count"])
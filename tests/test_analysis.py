@@ -0,0 +1,78 @@
+# Correlações defasadas entre índices (analysis.py) comparadas com Series.corr do pandas
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from analysis import MAX_LAG, MIN_PERIODS, correlation_matrix, lag_correlation_cube, pair_lag_correlation  # noqa: E402
+from index_store import MJO_AMPLITUDE, IndexStore  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def indices():
+    """AAA; BBB segue AAA com 3 meses de atraso; CCC começa depois e tem um mês fora do arquivo;
+    DDD começa depois do fim dos demais: nem com a defasagem máxima há MIN_PERIODS meses em comum."""
+    rng = np.random.default_rng(0)
+    months = pd.date_range("1980-01-01", periods=300, freq="MS", name="time")
+    aaa = pd.Series(rng.normal(size=months.size), index=months)
+    bbb = pd.Series(0.8 * aaa.shift(3).to_numpy() + rng.normal(0.0, 0.5, months.size), index=months)
+    ccc = pd.Series(rng.normal(size=months.size), index=months).iloc[40:].drop(pd.Timestamp("1995-05-01"))
+    ccc.iloc[[10, 11, 90]] = np.nan
+    ddd = pd.Series(rng.normal(size=MIN_PERIODS + 10), index=pd.date_range("2005-06-01", periods=MIN_PERIODS + 10, freq="MS", name="time"))
+    daily = pd.Series(rng.normal(size=60), index=pd.date_range("2000-01-01", periods=60, freq="D", name="time"))
+    return {"AAA": aaa, "BBB": bbb, "CCC": ccc, "DDD": ddd, MJO_AMPLITUDE: daily}
+
+
+@pytest.fixture(scope="module")
+def store(indices):
+    return IndexStore.from_series(indices)
+
+
+def reference(indices, var_a, var_b, lag):
+    """corr(a(t), b(t + lag)) em meses consecutivos, só com os meses em que os dois têm dado."""
+    a, b = indices[var_a].asfreq("MS"), indices[var_b].asfreq("MS")
+    months = pd.date_range(min(a.index[0], b.index[0]), max(a.index[-1], b.index[-1]), freq="MS")
+    a, b = a.reindex(months), b.reindex(months)
+    return a.corr(b.shift(-lag), min_periods=MIN_PERIODS)
+
+
+@pytest.mark.parametrize("lag", [0, 1, 3, -3, MAX_LAG, -MAX_LAG])
+def test_correlation_matrix_matches_pandas(indices, store, lag):
+    matrix = correlation_matrix(store, lag)
+    # Só os índices mensais entram na matriz
+    assert list(matrix.index) == ["AAA", "BBB", "CCC", "DDD"]
+    for var_a in matrix.index:
+        for var_b in matrix.columns:
+            expected = reference(indices, var_a, var_b, lag)
+            assert matrix.loc[var_a, var_b] == pytest.approx(expected, abs=1e-9, nan_ok=True), (var_a, var_b)
+
+
+def test_pair_lag_correlation_peaks_at_injected_lag(indices, store):
+    serie = pair_lag_correlation(store, "AAA", "BBB")
+    assert list(serie.index) == list(range(-MAX_LAG, MAX_LAG + 1))
+    assert serie.idxmax() == 3 and serie[3] > 0.7
+    expected = [reference(indices, "AAA", "BBB", lag) for lag in serie.index]
+    np.testing.assert_allclose(serie.to_numpy(), expected, rtol=0, atol=1e-9)
+
+
+def test_short_overlap_is_nan(store):
+    # AAA termina em 2004-12 e DDD começa em 2005-06: correlação indefinida em todas as defasagens
+    assert np.isnan(pair_lag_correlation(store, "AAA", "DDD")).all()
+    assert pair_lag_correlation(store, "DDD", "DDD")[0] == pytest.approx(1.0)
+
+
+def test_cube_is_symmetric_between_opposite_lags():
+    rng = np.random.default_rng(1)
+    values = rng.normal(size=(120, 4))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    lags, cube, counts = lag_correlation_cube(values, max_lag=6)
+    for lag in range(7):
+        np.testing.assert_array_equal(cube[6 - lag], cube[6 + lag].T)
+        np.testing.assert_array_equal(counts[6 - lag], counts[6 + lag].T)
+    # Na defasagem 0, a diagonal é 1 (cada índice com ele mesmo)
+    np.testing.assert_allclose(np.diag(cube[6]), 1.0)
@@ -0,0 +1,128 @@
+# API HTTP/JSON (api_server.py) sobre a pasta dataset/ do repositório, servida numa porta livre
+from io import StringIO
+import gzip
+import json
+from pathlib import Path
+import sys
+import threading
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import api_server  # noqa: E402
+from index_store import parse_index_file  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def base_url(tmp_path_factory):
+    server = api_server.make_server("127.0.0.1", 0, ROOT / "dataset", tmp_path_factory.mktemp("cache"))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def get(base_url, path, **headers):
+    """(status, cabeçalhos, corpo já descomprimido)."""
+    try:
+        response = urlopen(Request(base_url + path, headers=headers), timeout=30)
+    except HTTPError as err:
+        response = err
+    body = response.read()
+    if response.headers.get("Content-Encoding") == "gzip":
+        body = gzip.decompress(body)
+    return response.status, response.headers, body
+
+
+def amo():
+    return parse_index_file(ROOT / "dataset" / "AMO.txt")[1]
+
+
+def test_list_indices(base_url):
+    status, headers, body = get(base_url, "/indices")
+    indices = {entry["name"]: entry for entry in json.loads(body)}
+    assert status == 200 and headers["Content-Type"] == "application/json"
+    assert indices["AMO"]["count"] == int(amo().notna().sum())
+    assert indices["Amplitude MJO/RMM"]["frequency"] == "daily"
+
+
+def test_etag_round_trip(base_url):
+    status, headers, body = get(base_url, "/indices/AMO?format=csv")
+    etag = headers["ETag"]
+    assert status == 200 and etag.startswith('"') and not etag.endswith('-gzip"')
+
+    status, headers, body = get(base_url, "/indices/AMO?format=csv", **{"If-None-Match": etag})
+    assert (status, headers["ETag"], body) == (304, etag, b"")
+    # Outra query é outro recurso: outro ETag
+    assert get(base_url, "/indices/AMO?format=txt")[1]["ETag"] != etag
+
+
+def test_gzip_and_plain_have_different_etags(base_url):
+    status, plain, plain_body = get(base_url, "/indices/AMO?format=csv")
+    status_gz, gz, gz_body = get(base_url, "/indices/AMO?format=csv", **{"Accept-Encoding": "gzip"})
+    assert status == status_gz == 200
+    assert gz["Content-Encoding"] == "gzip" and plain["Content-Encoding"] is None
+    assert gz["ETag"] == plain["ETag"][:-1] + '-gzip"'
+    assert gz_body == plain_body
+
+    # Cada ETag só vale para a sua codificação
+    assert get(base_url, "/indices/AMO?format=csv", **{"Accept-Encoding": "gzip", "If-None-Match": gz["ETag"]})[0] == 304
+    assert get(base_url, "/indices/AMO?format=csv", **{"Accept-Encoding": "gzip", "If-None-Match": plain["ETag"]})[0] == 200
+    assert get(base_url, "/indices/AMO?format=csv", **{"If-None-Match": gz["ETag"]})[0] == 200
+
+
+def test_date_slicing(base_url):
+    status, _, body = get(base_url, "/indices/AMO?start=2000-01-01&end=2000-12-31&format=csv")
+    df = pd.read_csv(StringIO(body.decode("utf-8")), parse_dates=["time"])
+    expected = amo().loc["2000-01-01":"2000-12-31"]
+    assert status == 200
+    assert list(df["time"]) == list(expected.index)
+    assert df["value"].to_numpy() == pytest.approx(expected.to_numpy(), nan_ok=True)
+
+
+@pytest.mark.parametrize("query, first, last", [
+    # Com fuso: convertido para UTC (00:00+03:00 é 21:00 do dia anterior em UTC)
+    ("start=2000-02-01T00:00:00%2B03:00&end=2000-03-01", "2000-02-01", "2000-03-01"),
+    # 00:00-03:00 é 03:00 UTC, depois do valor de 2000-02-01
+    ("start=2000-02-01T00:00:00-03:00&end=2000-03-01", "2000-03-01", "2000-03-01"),
+    # Fora do intervalo do datetime64[ns]: limitado ao início/fim da série
+    ("start=1500-01-01", None, None),
+    ("end=3000-01-01", None, None),
+    ("start=1500-01-01&end=3000-01-01", None, None),
+])
+def test_dates_with_timezone_or_out_of_range(base_url, query, first, last):
+    status, _, body = get(base_url, f"/indices/AMO?format=json&{query}")
+    records = json.loads(body)
+    serie = amo()
+    assert status == 200
+    assert records[0]["time"][:10] == (first or f"{serie.index[0]:%Y-%m-%d}")
+    assert records[-1]["time"][:10] == (last or f"{serie.index[-1]:%Y-%m-%d}")
+
+
+@pytest.mark.parametrize("path, status", [
+    ("/indices/AMO?format=xlsx", 400),
+    ("/indices/AMO?start=2020-13-01", 400),
+    ("/indices/AMO?end=not-a-date", 400),
+    ("/indices/AMO?start=99999-01-01", 400),
+    ("/indices/NOPE", 404),
+    ("/nope", 404),
+])
+def test_bad_requests_get_json_errors(base_url, path, status):
+    got, headers, body = get(base_url, path)
+    assert got == status
+    assert headers["Content-Type"] == "application/json" and "error" in json.loads(body)
+
+
+def test_unexpected_error_is_a_500_response(base_url, monkeypatch):
+    def broken(*args):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(api_server, "render", broken)
+    status, headers, body = get(base_url, "/indices/AMO")
+    assert status == 500 and json.loads(body) == {"error": "Internal error: RuntimeError"}
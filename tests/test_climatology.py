@@ -0,0 +1,82 @@
+# Climatologias em outros períodos base (aggregation.climatology/rebaseline) comparadas com o pandas
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from aggregation import BASE_PERIODS, MIN_BASE_YEARS, aggregate, climatology, rebaseline  # noqa: E402
+from index_store import IndexStore  # noqa: E402
+
+
+def monthly_serie(seed=0):
+    """1965-2024 com tendência (os períodos base diferem) e março quase sem dados antes de 1995."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("1965-01-01", "2024-12-01", freq="MS", name="time")
+    seasonal = np.sin(2 * np.pi * (index.month - 1) / 12)
+    trend = 0.02 * (index.year - 1965)
+    serie = pd.Series(seasonal + trend + rng.normal(0.0, 0.3, index.size), index=index, name="AAA")
+    serie[(serie.index.month == 3) & (serie.index.year < 1995)] = np.nan
+    return serie.drop(pd.Timestamp("1990-07-01"))
+
+
+def reference_climatology(serie, first_year, last_year):
+    base = serie[(serie.index.year >= first_year) & (serie.index.year <= last_year)].dropna()
+    stats = base.groupby(base.index.month).agg(["mean", "std", "count"]).reindex(range(1, 13))
+    stats["count"] = stats["count"].fillna(0).astype("int64")
+    valid = stats["count"] >= MIN_BASE_YEARS
+    stats["mean"] = stats["mean"].where(valid)
+    stats["std"] = stats["std"].where(valid)
+    return stats
+
+
+@pytest.mark.parametrize("base", list(BASE_PERIODS))
+def test_climatology_matches_groupby(base):
+    serie = monthly_serie()
+    result = climatology(IndexStore.from_series({"AAA": serie}), "AAA", base)
+    expected = reference_climatology(serie, *BASE_PERIODS[base])
+
+    assert list(result.index) == list(range(1, 13))
+    assert list(result["count"]) == list(expected["count"])
+    np.testing.assert_allclose(result["mean"].to_numpy(), expected["mean"].to_numpy(), rtol=0, atol=1e-12)
+    np.testing.assert_allclose(result["std"].to_numpy(), expected["std"].to_numpy(), rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("base", list(BASE_PERIODS))
+@pytest.mark.parametrize("standardize", [False, True])
+def test_rebaseline_matches_groupby_transform(base, standardize):
+    serie = monthly_serie()
+    result = rebaseline(IndexStore.from_series({"AAA": serie}), "AAA", base, standardize)
+
+    stats = reference_climatology(serie, *BASE_PERIODS[base])
+    expected = serie - stats["mean"].reindex(serie.index.month).to_numpy()
+    if standardize:
+        expected = expected / stats["std"].reindex(serie.index.month).to_numpy()
+
+    # Mesmas datas do arquivo; março sem climatologia válida em 1971-2000 e 1981-2010 vira NaN
+    assert result.index.equals(serie.index)
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=0, atol=1e-12)
+    assert result[result.index.month == 3].isna().all() == (base != "1991–2020")
+
+
+def test_bases_differ_with_trend():
+    store = IndexStore.from_series({"AAA": monthly_serie()})
+    recent = rebaseline(store, "AAA", "1991–2020")
+    older = rebaseline(store, "AAA", "1971–2000")
+    # Tendência de 0,02/ano: 20 anos de diferença entre os períodos dão ~0,4 de deslocamento
+    shift = (older - recent)[older.index.month != 3]
+    assert shift.mean() == pytest.approx(0.4, abs=0.05)
+
+
+def test_running_mean_on_rebaselined_serie():
+    serie = monthly_serie()
+    store = IndexStore.from_series({"AAA": serie})
+    result = aggregate(store, "AAA", "rolling", 12, "1981–2010", True)
+
+    anomalies = rebaseline(store, "AAA", "1981–2010", True).asfreq("MS")
+    expected = anomalies.rolling(12, center=True, min_periods=12).mean()
+    np.testing.assert_allclose(result["mean"].to_numpy(), expected.to_numpy(), rtol=0, atol=1e-9)
@@ -0,0 +1,111 @@
+# Detecção de eventos (events.py) comparada com uma referência em pandas, evento a evento
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from events import DEFAULT_RULE, EVENT_RULES, describe_rule, detect_events, index_events  # noqa: E402
+from index_store import MJO_AMPLITUDE, MJO_PHASE, IndexStore  # noqa: E402
+
+
+def reference_events(serie, threshold, min_length, sign=1, name="event", report=None):
+    """Sequências acima do limiar via groupby nos trechos consecutivos (sem numpy vetorizado)."""
+    report = serie if report is None else report
+    above = (sign * serie) >= threshold
+    trecho = (above != above.shift()).cumsum()
+    rows = []
+    for _, group in (sign * serie)[above].groupby(trecho[above]):
+        if len(group) < min_length:
+            continue
+        peak_date = group.idxmax()
+        rows.append({
+            "event": name, "start": group.index[0], "end": group.index[-1], "length": len(group),
+            "peak": report[peak_date], "peak_date": peak_date, "mean": report[group.index].mean(),
+        })
+    return pd.DataFrame(rows, columns=["event", "start", "end", "length", "peak", "peak_date", "mean"])
+
+
+def assert_same_events(result, expected):
+    assert len(result) == len(expected)
+    for column in ("event", "start", "end", "length", "peak_date"):
+        assert list(result[column]) == list(expected[column]), column
+    np.testing.assert_allclose(result["peak"].to_numpy(), expected["peak"].to_numpy(), rtol=0, atol=1e-12)
+    np.testing.assert_allclose(result["mean"].to_numpy(), expected["mean"].to_numpy(), rtol=0, atol=1e-12)
+
+
+def monthly_serie(name, seed=0, months=360):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("1990-01-01", periods=months, freq="MS", name="time")
+    # Passeio aleatório amortecido: sequências longas acima/abaixo do limiar
+    values = np.zeros(months)
+    for i in range(1, months):
+        values[i] = 0.8 * values[i - 1] + rng.normal(0.0, 0.4)
+    serie = pd.Series(values.round(2), index=index, name=name)
+    serie.iloc[[50, 51, 200]] = np.nan
+    return serie
+
+
+@pytest.mark.parametrize("sign", [1, -1])
+@pytest.mark.parametrize("min_length", [1, 3, 5])
+def test_detect_events_matches_reference(sign, min_length):
+    serie = monthly_serie("AAA")
+    result = detect_events(serie, 0.5, min_length, sign, "evento")
+    expected = reference_events(serie, 0.5, min_length, sign, "evento")
+    assert len(expected) > 0
+    assert_same_events(result, expected)
+
+
+def test_detect_events_on_empty_mask():
+    serie = monthly_serie("AAA")
+    assert detect_events(serie, 99.0, 1).empty
+
+
+def catalog_reference(rule, detection, report):
+    tables = [
+        reference_events(detection, rule["threshold"], rule["min_length"], sign, name, report)
+        for name, sign in zip(rule["names"], (1, -1)) if name
+    ]
+    tables = [table for table in tables if not table.empty]
+    assert tables, "série sintética sem eventos"
+    return pd.concat(tables, ignore_index=True).sort_values("start", kind="stable", ignore_index=True)
+
+
+def test_smoothed_rule_uses_centered_running_mean():
+    # NIN34: média móvel centrada de 3 meses antes do limiar; pico e média sobre a série suavizada
+    serie = monthly_serie("NIN34", seed=1)
+    rule = EVENT_RULES["NIN34"]
+    smooth = serie.asfreq("MS").rolling(rule["smooth"], center=True, min_periods=rule["smooth"]).mean()
+
+    result = index_events(IndexStore.from_series({"NIN34": serie}), "NIN34")
+    assert (result["name"] == "NIN34").all()
+    assert_same_events(result, catalog_reference(rule, smooth, smooth))
+
+
+def test_default_rule_uses_standardized_anomaly():
+    # Índice sem regra própria: limiar em desvios padrão, pico e média na unidade do índice
+    serie = monthly_serie("XYZ", seed=2)
+    standardized = (serie - serie.mean()) / serie.std()
+
+    result = index_events(IndexStore.from_series({"XYZ": serie}), "XYZ")
+    assert_same_events(result, catalog_reference(DEFAULT_RULE, standardized, serie))
+
+
+def test_active_mjo_on_daily_amplitude_with_missing_day():
+    rng = np.random.default_rng(3)
+    index = pd.date_range("2020-01-01", periods=400, freq="D", name="time")
+    amplitude = pd.Series(np.abs(rng.normal(1.0, 0.6, index.size)).round(2), index=index)
+    # Dia ausente do arquivo: quebra a sequência como um dia sem dado
+    amplitude = amplitude.drop(index[100])
+    store = IndexStore.from_series({MJO_AMPLITUDE: amplitude, MJO_PHASE: amplitude * 0 + 1})
+
+    rule = EVENT_RULES[MJO_AMPLITUDE]
+    daily = amplitude.asfreq("D")
+    result = index_events(store, MJO_AMPLITUDE)
+    assert set(result["event"]) == {"Active MJO"}
+    assert_same_events(result, catalog_reference(rule, daily, daily))
+    assert index_events(store, MJO_PHASE) is None and describe_rule(MJO_PHASE) == ""
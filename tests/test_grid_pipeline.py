@@ -0,0 +1,114 @@
+# Pipeline de índices a partir de grades sintéticas (offline, sem arquivos reais de TSM/PNM)
+from pathlib import Path
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from grid_pipeline import GridSource, run_pipeline  # noqa: E402
+from index_store import parse_index_file  # noqa: E402
+from synthetic import make_synthetic_grid  # noqa: E402
+
+MONTHS = 480  # 1985-01 a 2024-12
+TOLERANCE = 2e-3
+
+
+def west_indian_ocean(lat, lon):
+    """Anomalia só a oeste de 80°E: polo oeste do DMI e do IOSD."""
+    return (lon < 80).astype("float64")
+
+
+@pytest.fixture(scope="module")
+def grids(tmp_path_factory):
+    folder = tmp_path_factory.mktemp("grids")
+    uniform = make_synthetic_grid(folder / "sst.nc", months=MONTHS)
+    dipole = make_synthetic_grid(folder / "sst_dipole.nc", months=MONTHS, pattern=west_indian_ocean, seed=1)
+    return folder, uniform, dipole
+
+
+def computed(output, name):
+    return parse_index_file(Path(output) / name)[1]
+
+
+def test_box_index_recovers_injected_anomaly(grids, tmp_path):
+    folder, uniform, _ = grids
+    result = run_pipeline({"sst": [folder / "sst.nc"]}, tmp_path / "out", tmp_path / "clim", ["NIN34", "NIN04"], workers=1)
+
+    assert [(var, months, full) for var, months, full, _ in result] == [("NIN34", MONTHS, True), ("NIN04", MONTHS, True)]
+    for name in ("NINO34.txt", "NINO4.txt"):  # NINO4 cruza a linha de data
+        serie = computed(tmp_path / "out", name)
+        assert serie.index.equals(uniform.index)
+        assert np.abs(serie.to_numpy() - uniform.to_numpy()).max() < TOLERANCE
+
+
+def test_dipole_index_is_west_minus_east(grids, tmp_path):
+    folder, uniform, dipole = grids
+    run_pipeline({"sst": [folder / "sst_dipole.nc"]}, tmp_path / "dipole", tmp_path / "clim_d", ["DMI/IOD"], workers=1)
+    run_pipeline({"sst": [folder / "sst.nc"]}, tmp_path / "uniform", tmp_path / "clim_u", ["DMI/IOD"], workers=1)
+
+    # Anomalia só no polo oeste: o índice é a própria anomalia
+    assert np.abs(computed(tmp_path / "dipole", "DMI-IOD.txt").to_numpy() - dipole.to_numpy()).max() < TOLERANCE
+    # Mesma anomalia nos dois polos: se cancela
+    assert np.abs(computed(tmp_path / "uniform", "DMI-IOD.txt").to_numpy()).max() < TOLERANCE
+
+
+def test_incremental_run_appends_only_new_months(grids, tmp_path):
+    folder, _, _ = grids
+    output, clim = tmp_path / "out", tmp_path / "clim"
+    run_pipeline({"sst": [folder / "sst.nc"]}, output, clim, ["NIN34"], workers=1)
+    before = (output / "NINO34.txt").read_bytes()
+
+    # Mesma grade (mesma semente) com 3 meses a mais
+    extended = make_synthetic_grid(tmp_path / "sst_ext.nc", months=MONTHS + 3)
+    result = run_pipeline({"sst": [tmp_path / "sst_ext.nc"]}, output, clim, ["NIN34"], workers=1)
+    after = (output / "NINO34.txt").read_bytes()
+
+    assert [(var, months, full) for var, months, full, _ in result] == [("NIN34", 3, False)]
+    assert after.startswith(before)
+    novas = after[len(before):].decode("utf-8").splitlines()
+    assert [line.split("\t")[0] for line in novas] == ["2025-01-01", "2025-02-01", "2025-03-01"]
+    assert np.abs(np.array([float(line.split("\t")[1]) for line in novas]) - extended.to_numpy()[-3:]).max() < TOLERANCE
+
+    # Sem meses novos nada é regravado
+    result = run_pipeline({"sst": [tmp_path / "sst_ext.nc"]}, output, clim, ["NIN34"], workers=1)
+    assert result[0][1] == 0
+    assert (output / "NINO34.txt").read_bytes() == after
+
+
+def test_full_rebuild_from_cli(grids, tmp_path):
+    folder, _, _ = grids
+    output, clim = tmp_path / "out", tmp_path / "clim"
+    args = [sys.executable, str(ROOT / "grid_pipeline.py"), "--sst", str(folder / "sst.nc"), "--output", str(output),
+            "--climatology", str(clim), "--indices", "NIN34", "TNA", "--workers", "2"]
+    subprocess.run(args, check=True, capture_output=True)
+    expected = {name: (output / name).read_bytes() for name in ("NINO34.txt", "TNA.txt")}
+
+    # Saída e climatologia corrompidas: o modo incremental não as corrige, o --full sim
+    (output / "NINO34.txt").write_text("time\tNIN34\n1985-01-01\t99.0\n")
+    for path in clim.glob("*.npy"):
+        np.save(path, np.zeros_like(np.load(path)))
+    subprocess.run(args + ["--full"], check=True, capture_output=True)
+
+    assert {name: (output / name).read_bytes() for name in expected} == expected
+
+
+def open_handles(path):
+    """Descritores do processo abertos para `path` (Linux)."""
+    fds = Path("/proc/self/fd")
+    return sum(1 for fd in fds.iterdir() if fd.exists() and fd.resolve() == Path(path).resolve())
+
+
+@pytest.mark.skipif(not Path("/proc/self/fd").is_dir(), reason="precisa de /proc")
+def test_grid_source_closes_files(grids):
+    folder, _, _ = grids
+    path = folder / "sst.nc"
+    with GridSource([path], "sst") as source:
+        next(source.blocks((-5, 5, -170, -120)))
+        assert open_handles(path) > 0
+    assert open_handles(path) == 0
+    assert not source.datasets
@@ -0,0 +1,127 @@
+# Cache colunar da pasta de dados (index_store.build_cache): invalidação por mtime/sha256 e troca do manifest
+import json
+import os
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import index_store  # noqa: E402
+from index_store import MANIFEST_FILE, build_cache, open_index_store, parse_index_file  # noqa: E402
+
+
+def write_index(path, var, start, values):
+    dates = pd.date_range(start, periods=len(values), freq="MS")
+    lines = [f"time\t{var}"] + [f"{date:%Y-%m-%d}\t{value}" for date, value in zip(dates, values)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    folder = tmp_path / "dataset"
+    folder.mkdir()
+    write_index(folder / "AAA.txt", "AAA", "2000-01-01", [0.5, -1.0, 2.0])
+    write_index(folder / "BBB.txt", "BBB", "1990-01-01", [1.25, 0.75])
+    write_index(folder / "CCC.txt", "CCC", "2010-06-01", [-0.1, 0.2, 0.3, 0.4])
+    return folder
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Arquivos parseados e arquivos relidos para o sha256 em cada build_cache."""
+    calls = {"parse": [], "sha256": []}
+    parse, sha256 = index_store.parse_index_file, index_store.file_sha256
+
+    def counting_parse(path):
+        calls["parse"].append(Path(path).name)
+        return parse(path)
+
+    def counting_sha256(path):
+        calls["sha256"].append(Path(path).name)
+        return sha256(path)
+
+    monkeypatch.setattr(index_store, "parse_index_file", counting_parse)
+    monkeypatch.setattr(index_store, "file_sha256", counting_sha256)
+    return calls
+
+
+def clear(calls):
+    for names in calls.values():
+        names.clear()
+
+
+def read_manifest(cache):
+    return json.loads((cache / MANIFEST_FILE).read_text(encoding="utf-8"))
+
+
+def assert_matches_sources(dataset, cache):
+    store = open_index_store(dataset, cache)
+    for path in sorted(dataset.glob("*.txt")):
+        var, expected = parse_index_file(path)
+        serie = store.series(var)
+        assert serie.index.equals(expected.index)
+        np.testing.assert_array_equal(serie.to_numpy(), expected.to_numpy())
+
+
+def test_only_the_edited_file_is_rebuilt(dataset, tmp_path, calls):
+    cache = tmp_path / "cache"
+    build_cache(dataset, cache)
+    assert sorted(calls["parse"]) == ["AAA.txt", "BBB.txt", "CCC.txt"]
+    first = read_manifest(cache)
+
+    # Sem mudanças: nada é relido nem regravado
+    clear(calls)
+    build_cache(dataset, cache)
+    assert calls == {"parse": [], "sha256": []}
+    assert read_manifest(cache) == first
+
+    # Um arquivo editado: só ele é relido (sha256) e re-parseado; os demais vêm da tabela anterior
+    write_index(dataset / "BBB.txt", "BBB", "1990-01-01", [1.25, 0.75, 3.5])
+    manifest, table = build_cache(dataset, cache)
+    assert calls == {"parse": ["BBB.txt"], "sha256": ["BBB.txt"]}
+    assert manifest["version"] != first["version"]
+    for name in ("AAA.txt", "CCC.txt"):
+        assert manifest["files"][name]["sha256"] == first["files"][name]["sha256"]
+        assert manifest["files"][name]["meta"] == first["files"][name]["meta"]
+    assert manifest["files"]["BBB.txt"]["length"] == 3
+    assert table.num_rows == 3 + 3 + 4
+    assert_matches_sources(dataset, cache)
+
+
+def test_same_content_with_new_mtime_keeps_the_table(dataset, tmp_path, calls):
+    # Checkout novo: mtime muda, conteúdo não. O sha256 é conferido, mas nada é re-parseado
+    cache = tmp_path / "cache"
+    first, _ = build_cache(dataset, cache)
+    clear(calls)
+    stat = (dataset / "AAA.txt").stat()
+    os.utime(dataset / "AAA.txt", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    manifest, _ = build_cache(dataset, cache)
+    assert calls == {"parse": [], "sha256": ["AAA.txt"]}
+    assert (manifest["version"], manifest["table"]) == (first["version"], first["table"])
+    assert read_manifest(cache)["files"]["AAA.txt"]["mtime_ns"] == stat.st_mtime_ns + 10**9
+
+
+def test_manifest_swap_keeps_the_previous_table(dataset, tmp_path):
+    cache = tmp_path / "cache"
+    first, _ = build_cache(dataset, cache)
+
+    write_index(dataset / "AAA.txt", "AAA", "2000-01-01", [0.5, -1.0, 2.0, 9.0])
+    second, _ = build_cache(dataset, cache)
+    # Cada versão tem a sua tabela; o manifest passa a apontar para a nova
+    assert second["table"] != first["table"]
+    assert read_manifest(cache)["table"] == second["table"]
+    # Uma réplica que leu o manifest anterior ainda abre a tabela dele
+    old = index_store._open_table(cache, first)
+    assert old is not None and old.num_rows == 3 + 2 + 4
+
+    write_index(dataset / "CCC.txt", "CCC", "2010-06-01", [-0.1, 0.5])
+    third, _ = build_cache(dataset, cache)
+    # Ficam só a tabela atual e a anterior
+    assert sorted(path.name for path in cache.glob("indices-*.arrow")) == sorted([second["table"], third["table"]])
+    assert_matches_sources(dataset, cache)
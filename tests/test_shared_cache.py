@@ -0,0 +1,67 @@
+# Cache compartilhado de produtos (shared_cache.SharedCache + products)
+from io import BytesIO
+import os
+from pathlib import Path
+import sys
+import time
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from index_store import MJO_AMPLITUDE, MJO_PHASE, IndexStore  # noqa: E402
+import products  # noqa: E402
+from shared_cache import SharedCache  # noqa: E402
+
+
+def small_store():
+    serie = pd.Series([0.5, -1.0, 2.0], index=pd.date_range("2000-01-01", periods=3, freq="MS", name="time"), name="AAA")
+    return IndexStore.from_series({"AAA": serie}, hashes={"AAA": "sha-aaa"})
+
+
+def test_products_format_is_part_of_every_key(tmp_path, monkeypatch):
+    shared, store = SharedCache(tmp_path), small_store()
+    calls = []
+    encode = products.encode_frame
+
+    def counting(df, ext):
+        calls.append(ext)
+        return encode(df, ext)
+
+    monkeypatch.setattr(products, "encode_frame", counting)
+    first = products.index_download(shared, store, "AAA", "csv")
+    assert products.index_download(shared, store, "AAA", "csv") == first
+    assert len(calls) == 1
+
+    # Outra versão do formato: a chave muda e os bytes antigos não são servidos
+    monkeypatch.setattr(products, "PRODUCTS_FORMAT", products.PRODUCTS_FORMAT + 1)
+    products.index_download(shared, store, "AAA", "csv")
+    assert len(calls) == 2
+
+
+def test_mjo_downloads_keep_each_file_dates(tmp_path):
+    # Amplitude e fase com períodos diferentes: nenhuma linha vazia vinda do alinhamento
+    amplitude = pd.Series([1.2, 0.8, 1.5], index=pd.date_range("2020-01-01", periods=3, name="time"))
+    phase = pd.Series([3.0, 4.0], index=pd.date_range("2020-01-02", periods=2, name="time"))
+    store = IndexStore.from_series({MJO_AMPLITUDE: amplitude, MJO_PHASE: phase}, hashes={MJO_AMPLITUDE: "a", MJO_PHASE: "p"})
+    shared = SharedCache(tmp_path)
+
+    amp = pd.read_csv(BytesIO(products.mjo_download(shared, store, "amplitude", "csv")), parse_dates=["time"])
+    fase = pd.read_csv(BytesIO(products.mjo_download(shared, store, "phase", "csv")), parse_dates=["time"])
+    assert list(amp["time"]) == list(amplitude.index) and list(amp["amplitude"]) == list(amplitude)
+    assert list(fase["time"]) == list(phase.index) and list(fase["phase"]) == [3, 4]
+    assert fase["phase"].dtype == "int64"
+
+
+def test_prune_keeps_products_that_are_still_read(tmp_path):
+    shared = SharedCache(tmp_path)
+    velho = time.time() - 90 * 86400
+    usado, esquecido = shared.path("download", "usado"), shared.path("download", "esquecido")
+    for key, path in (("usado", usado), ("esquecido", esquecido)):
+        shared.get("download", key, lambda: b"bytes")
+        os.utime(path, (velho, velho))
+
+    assert shared.get("download", "usado", lambda: b"outro") == b"bytes"  # acerto renova o mtime
+    assert shared.prune(62) == 1
+    assert usado.exists() and not esquecido.exists()